@@ -1,15 +1,33 @@
 """FastAPI application."""
 
+import asyncio
+import os
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Header, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Header, Response, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 from internal.config import load_config
+from internal.custody.logger import ChainOfCustodyLogger
+from internal.pack.bundle import BundleBuilder
+from internal.pack.compression import CompressionPolicy
+from internal.pack.packer import PackGenerator
+from internal.pack.serving import (
+    PackMetadataCache,
+    etag_matches,
+    iter_file_range,
+    pack_etag,
+    parse_range,
+    slice_stream,
+)
 from internal.pipeline import IngestionPipeline
 from internal.store.case_store import CaseStore
+from internal.store.export import VaultExporter
 from internal.store.vault import Vault
 
 
@@ -26,20 +44,54 @@ class IngestResponse(BaseModel):
     status: str
 
 
+class ResolveTokensRequest(BaseModel):
+    """Pseudonym token resolution request model."""
+
+    tokens: List[str]
+
+
+class ExportRequest(BaseModel):
+    """Vault export request model."""
+
+    case_ids: List[str]
+    passphrase: str
+
+
+class BundleRequest(BaseModel):
+    """Evidence bundle request model: case ids, or filters selecting cases."""
+
+    case_ids: List[str] = []
+    status: Optional[str] = None
+    created_after: Optional[str] = None
+    created_before: Optional[str] = None
+    url_contains: Optional[str] = None
+
+
 # Global pipeline instance
 pipeline: IngestionPipeline = None
 config = None
+# Pack serving objects used when the pipeline is not initialized, created once
+pack_services: Optional[Tuple] = None
+# Progress of recent bundle downloads, oldest first
+bundle_progress: "OrderedDict[str, Dict]" = OrderedDict()
+_BUNDLE_PROGRESS_ENTRIES = 256
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     global pipeline, config
+    resume_task = None
     try:
         config = load_config()
         # Only initialize pipeline if HMAC key is configured
         if config.pii.hmac_key:
             pipeline = IngestionPipeline(config)
+            if pipeline.scrubber is not None:
+                pipeline.scrubber.start(config.scrub.interval_hours * 3600)
+            if config.classify.deferred:
+                # In the background: with a full queue, requeueing waits for room
+                resume_task = asyncio.create_task(pipeline.resume_deferred())
         else:
             pipeline = None
     except Exception as e:
@@ -48,6 +100,8 @@ async def lifespan(app: FastAPI):
         pipeline = None
         config = None
     yield
+    if resume_task is not None:
+        await resume_task
     if pipeline:
         await pipeline.close()
 
@@ -114,37 +168,235 @@ async def ingest(request: IngestRequest):
         )
 
 
+@app.get("/admin/metrics")
+async def get_metrics(authorization: str = Header(None)):
+    """Report signing and pack cache metrics (admin only)."""
+    verify_admin_token(authorization)
+    if pipeline is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Pipeline not initialized - check configuration",
+        )
+    return {"signing": pipeline.signer.metrics(), "pack_cache": pipeline.pack_cache.stats()}
+
+
+def _pack_services() -> Tuple:
+    """Return the case store, pack metadata cache, pack generator and custody logger.
+
+    These are the pipeline's when it is initialized, otherwise built on first use.
+    """
+    global pack_services
+    if pipeline:
+        return (
+            pipeline.case_store,
+            pipeline.pack_cache,
+            pipeline.pack_generator,
+            pipeline.custody_logger,
+        )
+    if pack_services is None:
+        pack_generator = PackGenerator(
+            Path(config.storage.base_path),
+            Path(config.crypto.key_path),
+            config.crypto.key_name,
+            compression=CompressionPolicy(
+                level=config.pack.compress_level,
+                entropy_threshold=config.pack.store_entropy_threshold,
+                block_size=config.pack.compress_block_kb * 1024,
+            ),
+            workers=config.pack.compress_workers,
+        )
+        pack_services = (
+            CaseStore(Path(config.storage.sqlite_path)),
+            PackMetadataCache(
+                max_entries=config.pack.metadata_cache_entries,
+                ttl_seconds=config.pack.metadata_cache_ttl_seconds,
+            ),
+            pack_generator,
+            ChainOfCustodyLogger(Path(config.storage.base_path) / "chain_of_custody.log"),
+        )
+    return pack_services
+
+
 @app.get("/cases/{case_id}/pack.zip")
-async def get_pack(case_id: str):
-    """Get case pack ZIP file."""
+async def get_pack(
+    case_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+):
+    """Get case pack ZIP file.
+
+    Packs are served with a strong ETag (their manifest hash); a matching
+    If-None-Match gets 304 and a single byte range gets 206, for stored packs
+    and for packs rebuilt from the signed manifest alike.
+    """
     if config is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Service not configured",
         )
-    case_store = CaseStore(Path(config.storage.sqlite_path))
-    case = case_store.get_case(case_id)
-
-    if not case:
+    case_store, cache, pack_generator, custody_logger = _pack_services()
+    metadata = cache.get(case_store, case_id)
+    if metadata and metadata["pack_path"] and not Path(metadata["pack_path"]).exists():
+        # Pack removed since it was cached (e.g. switched to on-demand packs)
+        cache.invalidate(case_id)
+        metadata = cache.get(case_store, case_id)
+    if metadata is None:
+        if not case_store.get_case(case_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Case {case_id} not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Case {case_id} not found",
+            detail=f"Pack for case {case_id} not found",
+        )
+
+    etag = pack_etag(metadata["manifest_hash"], pack_generator.build_id)
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    filename = f"case_{case_id}_pack.zip"
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    pack_path = metadata["pack_path"]
+    if pack_path and range_header is None:
+        return FileResponse(
+            pack_path, media_type="application/zip", filename=filename, headers=headers
+        )
+
+    def rebuild():
+        custody_events = custody_logger.get_events(case_id)[: metadata["custody_count"]]
+        return pack_generator.iter_pack(metadata["manifest_json"], custody_events)
+
+    if pack_path:
+        size = os.stat(pack_path).st_size
+    elif metadata["size"] is None and range_header is not None:
+        # A rebuilt pack's size is only known by building it; done once per cache entry
+        metadata["size"] = await asyncio.to_thread(lambda: sum(len(c) for c in rebuild()))
+        size = metadata["size"]
+    else:
+        size = metadata["size"]
+
+    byte_range = None
+    if range_header is not None and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416,  # constant renamed across Starlette versions
+                headers={"Content-Range": f"bytes */{size}", "ETag": etag},
+            )
+
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        body = (
+            iter_file_range(Path(pack_path), start, end)
+            if pack_path
+            else slice_stream(rebuild(), start, end)
+        )
+        return StreamingResponse(
+            body,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type="application/zip",
+            headers=headers,
+        )
+
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    body = iter_file_range(Path(pack_path), 0, size - 1) if pack_path else rebuild()
+    return StreamingResponse(body, media_type="application/zip", headers=headers)
+
+
+@app.post("/bundles")
+async def create_bundle(request: BundleRequest, authorization: str = Header(None)):
+    """Stream one archive with the packs of many cases and a signed index (admin only).
+
+    Cases are given by id or selected by filters. Progress of the download
+    can be followed at GET /bundles/{bundle_id} (id in the X-Bundle-Id header).
+    """
+    verify_admin_token(authorization)
+    filters = {
+        "status": request.status,
+        "created_after": request.created_after,
+        "created_before": request.created_before,
+        "url_contains": request.url_contains,
+    }
+    if bool(request.case_ids) == any(filters.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either case ids or filters",
         )
 
-    pack_path = Path(case.get("pack_path"))
-    if not pack_path or not pack_path.exists():
+    case_store, cache, pack_generator, custody_logger = _pack_services()
+    builder = BundleBuilder(case_store, pack_generator, custody_logger, cache)
+    max_cases = config.pack.bundle_max_cases
+    try:
+        case_ids = builder.select(request.case_ids, limit=max_cases + 1, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if not case_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No cases match")
+    if len(case_ids) > max_cases:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Pack for case {case_id} not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many cases for one bundle (at most {max_cases})",
         )
 
-    return FileResponse(
-        pack_path,
+    bundle_id = str(uuid4())
+    progress = {
+        "bundle_id": bundle_id,
+        "status": "running",
+        "cases_total": len(case_ids),
+        "cases_done": 0,
+        "bytes_sent": 0,
+    }
+    bundle_progress[bundle_id] = progress
+    while len(bundle_progress) > _BUNDLE_PROGRESS_ENTRIES:
+        bundle_progress.popitem(last=False)
+
+    def report(done: int, total: int):
+        progress["cases_done"] = done
+
+    def stream():
+        try:
+            for chunk in builder.iter_bundle(
+                case_ids, actor="admin", bundle_id=bundle_id, progress=report
+            ):
+                progress["bytes_sent"] += len(chunk)
+                yield chunk
+            progress["status"] = "complete"
+        finally:
+            if progress["status"] == "running":
+                progress["status"] = "failed"
+
+    return StreamingResponse(
+        stream(),
         media_type="application/zip",
-        filename=f"case_{case_id}_pack.zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="bundle_{bundle_id}.zip"',
+            "X-Bundle-Id": bundle_id,
+        },
     )
 
 
+@app.get("/bundles/{bundle_id}")
+async def get_bundle_progress(bundle_id: str, authorization: str = Header(None)):
+    """Report the progress of a recent bundle download (admin only)."""
+    verify_admin_token(authorization)
+    if bundle_id not in bundle_progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bundle {bundle_id} not found",
+        )
+    return bundle_progress[bundle_id]
+
+
 @app.post("/cases/{case_id}/request_vault_access")
 async def request_vault_access(case_id: str, authorization: str = Header(None)):
     """Request vault access for a case (admin only)."""
@@ -164,23 +416,34 @@ async def request_vault_access(case_id: str, authorization: str = Header(None)):
             detail=f"Case {case_id} not found",
         )
 
-    # Get artifacts with vault references
-    artifacts = case_store.get_artifacts(case_id)
-    vault_refs = [
-        {
-            "artifact_id": a["artifact_id"],
-            "artifact_type": a["artifact_type"],
-            "vault_ref": a.get("vault_ref"),
-        }
-        for a in artifacts
-        if a.get("vault_ref")
-    ]
+    # List the case's vault objects from the vault metadata index
+    vault = pipeline.vault if pipeline else Vault(Path(config.storage.vault_path))
+    artifacts_by_ref = {
+        a["vault_ref"]: a for a in case_store.get_artifacts(case_id) if a.get("vault_ref")
+    }
+    vault_refs = []
+    for entry in vault.find(case_id=case_id):
+        artifact = artifacts_by_ref.get(entry["vault_ref"], {})
+        vault_refs.append(
+            {
+                "artifact_id": artifact.get("artifact_id"),
+                "artifact_type": artifact.get("artifact_type"),
+                "vault_ref": entry["vault_ref"],
+                "type": entry["type"],
+                "source_url": entry["source_url"],
+                "size": entry["size"],
+                "created_at": entry["created_at"],
+            }
+        )
 
     return JSONResponse(
         content={
             "case_id": case_id,
             "vault_references": vault_refs,
-            "message": "Vault access granted. Use admin CLI to retrieve content.",
+            "message": (
+                "Vault access granted. Use POST /admin/export or the admin export CLI "
+                "to retrieve content."
+            ),
         }
     )
 
@@ -219,3 +482,54 @@ async def get_case(case_id: str):
     )
 
 
+@app.post("/admin/resolve_tokens")
+async def resolve_tokens(request: ResolveTokensRequest, authorization: str = Header(None)):
+    """Resolve a batch of pseudonym tokens to their originals (admin only)."""
+    verify_admin_token(authorization)
+
+    vault = pipeline.vault if pipeline else Vault(Path(config.storage.vault_path))
+    resolved = vault.resolve_tokens(request.tokens)
+
+    custody_logger = (
+        pipeline.custody_logger
+        if pipeline
+        else ChainOfCustodyLogger(Path(config.storage.base_path) / "chain_of_custody.log")
+    )
+    custody_logger.log_token_resolution(resolved, actor="admin")
+
+    return JSONResponse(content={"tokens": resolved})
+
+
+@app.post("/admin/export")
+async def export_vault(request: ExportRequest, authorization: str = Header(None)):
+    """Stream a passphrase-encrypted archive of the cases' vault originals (admin only)."""
+    verify_admin_token(authorization)
+
+    if not request.case_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No cases given")
+    if len(request.passphrase) < 12:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Passphrase must be at least 12 characters",
+        )
+
+    case_store = CaseStore(Path(config.storage.sqlite_path))
+    missing = [case_id for case_id in request.case_ids if not case_store.get_case(case_id)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cases not found: {', '.join(missing)}",
+        )
+
+    vault = pipeline.vault if pipeline else Vault(Path(config.storage.vault_path))
+    custody_logger = (
+        pipeline.custody_logger
+        if pipeline
+        else ChainOfCustodyLogger(Path(config.storage.base_path) / "chain_of_custody.log")
+    )
+    exporter = VaultExporter(vault, custody_logger)
+    return StreamingResponse(
+        exporter.iter_archive(request.case_ids, request.passphrase, actor="admin"),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="vault_export.shx"'},
+    )
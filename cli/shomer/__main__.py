@@ -1,6 +1,8 @@
 """Main CLI entry point."""
 
+import argparse
 import asyncio
+import json
 import sys
 from pathlib import Path
 
@@ -23,7 +25,7 @@ def serve():
 def main():
     """Main CLI entry point."""
     if len(sys.argv) < 2:
-        print("Usage: python -m cli.shomer [serve|ingest|admin]")
+        print("Usage: python -m cli.shomer [serve|ingest|verify|bundle|admin]")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -32,13 +34,18 @@ def main():
         serve()
     elif command == "ingest":
         if len(sys.argv) < 3:
-            print("Usage: python -m cli.shomer ingest <url>")
+            print("Usage: python -m cli.shomer ingest <url> [<url> ...]")
             sys.exit(1)
-        url = sys.argv[2]
-        asyncio.run(ingest_url(url))
+        if len(sys.argv) == 3:
+            asyncio.run(ingest_url(sys.argv[2]))
+        else:
+            asyncio.run(ingest_batch(sys.argv[2:]))
+    elif command == "verify":
+        verify(sys.argv[2:])
+    elif command == "bundle":
+        bundle(sys.argv[2:])
     elif command == "admin":
-        print("Admin CLI not yet implemented")
-        sys.exit(1)
+        admin(sys.argv[2:])
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -62,6 +69,322 @@ async def ingest_url(url: str):
         await pipeline.close()
 
 
+async def ingest_batch(urls: list):
+    """Ingest several URLs via CLI and sign them as one batch."""
+    from internal.pipeline import IngestionPipeline
+
+    config = load_config()
+    pipeline = IngestionPipeline(config)
+
+    try:
+        summary = await pipeline.ingest_batch(urls)
+    finally:
+        await pipeline.close()
+
+    summary["signing"] = pipeline.signer.metrics()
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+def verify(argv: list):
+    """Verify a pack, or every pack under a directory, and print a JSON report."""
+    from internal.pack.verify import load_public_key, verify_directory, verify_pack
+
+    parser = argparse.ArgumentParser(prog="python -m cli.shomer verify")
+    parser.add_argument("path", help="pack ZIP or directory of packs")
+    parser.add_argument(
+        "--public-key", help="trusted signing key (PEM); defaults to the key inside each pack"
+    )
+    parser.add_argument("--workers", type=int, help="packs verified in parallel")
+    parser.add_argument("--output", help="write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    public_key = load_public_key(args.public_key) if args.public_key else None
+    path = Path(args.path)
+    if path.is_dir():
+        report = verify_directory(path, public_key, args.workers)
+        ok = report["invalid"] == 0
+    else:
+        report = verify_pack(path, public_key)
+        ok = report["valid"]
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if not ok:
+        sys.exit(1)
+
+
+def bundle(argv: list):
+    """Write the packs of several cases, with a signed index, into one bundle archive."""
+    from internal.custody.logger import ChainOfCustodyLogger
+    from internal.pack.bundle import BundleBuilder
+    from internal.pack.compression import CompressionPolicy
+    from internal.pack.packer import PackGenerator
+    from internal.store.case_store import CaseStore
+
+    parser = argparse.ArgumentParser(prog="python -m cli.shomer bundle")
+    parser.add_argument("case_ids", nargs="*", help="cases to bundle (or use filters)")
+    parser.add_argument("--output", required=True, help="bundle ZIP file to write")
+    parser.add_argument("--status", help="select cases with this status")
+    parser.add_argument("--created-after", help="select cases created at or after (ISO 8601)")
+    parser.add_argument("--created-before", help="select cases created before (ISO 8601)")
+    parser.add_argument("--url-contains", help="select cases whose URL contains this text")
+    parser.add_argument("--limit", type=int, help="bundle at most this many selected cases")
+    args = parser.parse_args(argv)
+
+    filters = {
+        "status": args.status,
+        "created_after": args.created_after,
+        "created_before": args.created_before,
+        "url_contains": args.url_contains,
+    }
+    if bool(args.case_ids) == any(filters.values()):
+        parser.error("give either case ids or filters")
+
+    config = load_config()
+    builder = BundleBuilder(
+        CaseStore(Path(config.storage.sqlite_path)),
+        PackGenerator(
+            Path(config.storage.base_path),
+            Path(config.crypto.key_path),
+            config.crypto.key_name,
+            compression=CompressionPolicy(
+                level=config.pack.compress_level,
+                entropy_threshold=config.pack.store_entropy_threshold,
+                block_size=config.pack.compress_block_kb * 1024,
+            ),
+            workers=config.pack.compress_workers,
+        ),
+        ChainOfCustodyLogger(Path(config.storage.base_path) / "chain_of_custody.log"),
+    )
+    try:
+        case_ids = builder.select(args.case_ids, limit=args.limit, **filters)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not case_ids:
+        print("Error: no cases match", file=sys.stderr)
+        sys.exit(1)
+
+    def report(done: int, total: int):
+        if done == total or done % 10 == 0:
+            print(f"Bundled {done}/{total} cases", file=sys.stderr)
+
+    output = Path(args.output)
+    with open(output, "wb") as f:
+        summary = builder.write_bundle(case_ids, f, actor="cli", progress=report)
+    print(json.dumps(summary, indent=2))
+
+
+def admin(argv: list):
+    """Run an admin command."""
+    parser = argparse.ArgumentParser(prog="python -m cli.shomer admin")
+    subcommands = parser.add_subparsers(dest="subcommand", required=True)
+
+    resolve = subcommands.add_parser("resolve", help="resolve pseudonym tokens to originals")
+    resolve.add_argument("tokens", nargs="+", help="tokens such as [EMA_1a2b3c4d]")
+
+    compact = subcommands.add_parser(
+        "compact-vault", help="reclaim space from deleted blobs in vault segment files"
+    )
+    compact.add_argument(
+        "--min-garbage-ratio",
+        type=float,
+        default=0.5,
+        help="only rewrite segments with at least this fraction of deleted bytes",
+    )
+
+    rotate = subcommands.add_parser(
+        "rotate-key", help="rewrap all vault blobs under the active (or a new) master key"
+    )
+    rotate.add_argument("--new-key", action="store_true", help="generate a new active master key")
+    rotate.add_argument("--workers", type=int, default=4, help="parallel rotation workers")
+    rotate.add_argument(
+        "--retire-old",
+        action="store_true",
+        help="remove other keyring keys once every blob has been rotated "
+        "(.vault_key is kept: it still protects the token index)",
+    )
+
+    export = subcommands.add_parser(
+        "export", help="export cases' vault originals into a passphrase-encrypted archive"
+    )
+    export.add_argument("case_ids", nargs="+", help="cases to export")
+    export.add_argument("--output", required=True, help="archive file to write")
+    export.add_argument(
+        "--passphrase-env", help="read the passphrase from this environment variable"
+    )
+
+    decrypt = subcommands.add_parser("decrypt-export", help="decrypt an export into a ZIP file")
+    decrypt.add_argument("archive", help="export archive")
+    decrypt.add_argument("--output", required=True, help="ZIP file to write")
+    decrypt.add_argument(
+        "--passphrase-env", help="read the passphrase from this environment variable"
+    )
+
+    scrub = subcommands.add_parser(
+        "scrub", help="re-check stored artifacts and vault blobs (resumes where it stopped)"
+    )
+    scrub.add_argument("--max-items", type=int, help="stop after this many items")
+    scrub.add_argument("--max-seconds", type=float, help="stop after this long")
+    scrub.add_argument("--mb-per-second", type=float, help="read budget (default from config)")
+    scrub.add_argument(
+        "--status", action="store_true", help="only report progress and failed items"
+    )
+
+    args = parser.parse_args(argv)
+    if args.subcommand == "resolve":
+        resolve_tokens(args.tokens)
+    elif args.subcommand == "compact-vault":
+        compact_vault(args.min_garbage_ratio)
+    elif args.subcommand == "rotate-key":
+        rotate_key(args.new_key, args.workers, args.retire_old)
+    elif args.subcommand == "export":
+        export_cases(args.case_ids, Path(args.output), read_passphrase(args.passphrase_env))
+    elif args.subcommand == "decrypt-export":
+        decrypt_archive(
+            Path(args.archive), Path(args.output), read_passphrase(args.passphrase_env)
+        )
+    elif args.subcommand == "scrub":
+        scrub_storage(args.max_items, args.max_seconds, args.mb_per_second, args.status)
+
+
+def resolve_tokens(tokens: list):
+    """Resolve pseudonym tokens via the vault token index."""
+    from internal.custody.logger import ChainOfCustodyLogger
+    from internal.store.vault import Vault
+
+    config = load_config()
+    vault = Vault(Path(config.storage.vault_path))
+    resolved = vault.resolve_tokens(tokens)
+
+    custody_logger = ChainOfCustodyLogger(
+        Path(config.storage.base_path) / "chain_of_custody.log"
+    )
+    custody_logger.log_token_resolution(resolved, actor="admin-cli")
+    print(json.dumps(resolved, indent=2, ensure_ascii=False))
+
+
+def compact_vault(min_garbage_ratio: float):
+    """Compact vault segment files."""
+    from internal.store.vault import Vault
+
+    config = load_config()
+    vault = Vault(Path(config.storage.vault_path))
+    print(json.dumps(vault.compact(min_garbage_ratio), indent=2))
+
+
+def rotate_key(new_key: bool, workers: int, retire_old: bool):
+    """Rotate the vault master key, resuming any interrupted rotation."""
+    from internal.store.rotation import KeyRotation
+    from internal.store.vault import Vault
+
+    config = load_config()
+    vault = Vault(Path(config.storage.vault_path))
+    if new_key:
+        print(f"New active vault key: {vault.keyring.generate()}", file=sys.stderr)
+
+    def report(done: int, total: int):
+        if done == total or done % 1000 == 0:
+            print(f"Rotated {done}/{total} blobs", file=sys.stderr)
+
+    rotation = KeyRotation(vault, workers=workers)
+    result = rotation.run(progress=report)
+    if retire_old and result["failed"] == 0:
+        # A second pass picks up blobs written under an old key while the first ran
+        second = rotation.run()
+        if second["failed"] == 0:
+            active_id = vault.keyring.active()[0]
+            retired = [key_id for key_id in vault.keyring.key_ids() if key_id != active_id]
+            for key_id in retired:
+                vault.keyring.retire(key_id)
+            result["retired_keyring_keys"] = retired
+            # Only blob wrapping moves to the keyring; .vault_key still encrypts the
+            # token index and keys the content hashes, so it must be kept
+            print(
+                f"Note: {vault.key_path} is still in use (token index, content hashes)",
+                file=sys.stderr,
+            )
+    print(json.dumps(result, indent=2))
+    if result["failed"]:
+        sys.exit(1)
+
+
+def scrub_storage(
+    max_items: int = None, max_seconds: float = None, mb_per_second: float = None, status=False
+):
+    """Run (or report on) the integrity scrubber."""
+    from internal.custody.logger import ChainOfCustodyLogger
+    from internal.store.case_store import CaseStore
+    from internal.store.scrubber import IntegrityScrubber
+    from internal.store.vault import Vault
+
+    config = load_config()
+    scrubber = IntegrityScrubber(
+        CaseStore(Path(config.storage.sqlite_path)),
+        Vault(Path(config.storage.vault_path)),
+        ChainOfCustodyLogger(Path(config.storage.base_path) / "chain_of_custody.log"),
+        mb_per_second=mb_per_second or config.scrub.mb_per_second,
+        batch_size=config.scrub.batch_size,
+    )
+    result = {} if status else scrubber.run(max_items=max_items, max_seconds=max_seconds)
+    result.update(scrubber.status())
+    result["failures"] = scrubber.failures()
+    print(json.dumps(result, indent=2))
+    if result["failures"]:
+        sys.exit(1)
+
+
+def read_passphrase(env_var: str = None) -> str:
+    """Read an export passphrase from the environment or the terminal."""
+    import getpass
+    import os
+
+    if env_var:
+        passphrase = os.environ.get(env_var, "")
+    else:
+        passphrase = getpass.getpass("Export passphrase: ")
+    if not passphrase:
+        print("Error: empty passphrase", file=sys.stderr)
+        sys.exit(1)
+    return passphrase
+
+
+def export_cases(case_ids: list, output: Path, passphrase: str):
+    """Export cases' vault originals into an encrypted archive."""
+    from internal.custody.logger import ChainOfCustodyLogger
+    from internal.store.export import VaultExporter
+    from internal.store.vault import Vault
+
+    config = load_config()
+    vault = Vault(Path(config.storage.vault_path))
+    custody_logger = ChainOfCustodyLogger(
+        Path(config.storage.base_path) / "chain_of_custody.log"
+    )
+    exporter = VaultExporter(vault, custody_logger)
+    with open(output, "wb") as f:
+        summary = exporter.write_archive(case_ids, passphrase, f, actor="admin-cli")
+    print(json.dumps(summary, indent=2))
+
+
+def decrypt_archive(archive: Path, output: Path, passphrase: str):
+    """Decrypt an export archive into a plain ZIP file."""
+    from internal.store.export import decrypt_export
+
+    try:
+        with open(output, "wb") as f:
+            size = decrypt_export(archive, passphrase, f)
+    except ValueError as e:
+        output.unlink(missing_ok=True)
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {size} bytes to {output}")
+
+
 if __name__ == "__main__":
     main()
 
@@ -1,8 +1,17 @@
 """LLM classification integration."""
 
+from .batcher import BatchingClassifier
+from .cache import CachingClassifier, ClassificationCache
+from .chunking import ChunkedClassifier
 from .classifier import Classifier
 
-__all__ = ["Classifier"]
+__all__ = [
+    "BatchingClassifier",
+    "CachingClassifier",
+    "ChunkedClassifier",
+    "ClassificationCache",
+    "Classifier",
+]
 
 
 
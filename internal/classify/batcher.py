@@ -0,0 +1,122 @@
+"""Micro-batching front end for the ML classifier endpoint."""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from internal.classify.classifier import Classifier, error_result, normalize_result
+
+# Status codes meaning "this service has no batch endpoint"
+_BATCH_UNSUPPORTED = {404, 405, 501}
+
+
+class BatchingClassifier:
+    """Coalesce concurrent classify calls into batch requests.
+
+    Calls are queued until either max_batch_size texts are waiting or
+    max_wait seconds have passed since the first one arrived, then sent as a
+    single POST of {"items": [{"text", "metadata"}, ...]} to batch_endpoint,
+    which must answer {"results": [...]} in the same order. If the endpoint
+    does not exist, the batcher falls back to one request per text.
+    """
+
+    def __init__(
+        self,
+        classifier: Classifier,
+        batch_endpoint: Optional[str] = None,
+        max_batch_size: int = 16,
+        max_wait: float = 0.02,
+    ):
+        """Initialize batching classifier."""
+        self.classifier = classifier
+        self.batch_endpoint = batch_endpoint or f"{classifier.ml_endpoint.rstrip('/')}/batch"
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batch_supported: Optional[bool] = None
+        self.stats = {"requests": 0, "batches": 0, "batched_items": 0, "single_requests": 0}
+
+        self._pending: List[Tuple[str, Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+
+    async def classify(self, text: str, metadata: Optional[Dict] = None) -> Dict:
+        """Queue text for classification and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, metadata or {}, future))
+        self.stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything queued so far as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, Dict, asyncio.Future]]) -> None:
+        """Classify a batch and resolve each caller's future."""
+        try:
+            results = None
+            if self.batch_supported is not False and len(batch) > 1:
+                results = await self._send_batch(batch)
+            if results is None:
+                results = await self._send_single(batch)
+        except Exception as e:
+            results = [error_result(e) for _ in batch]
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_batch(self, batch) -> Optional[List[Dict]]:
+        """POST a batch; return None if the endpoint has no batch support."""
+        try:
+            response = await self.classifier.client.post(
+                self.batch_endpoint,
+                json={"items": [{"text": text, "metadata": meta} for text, meta, _ in batch]},
+                headers={"Content-Type": "application/json"},
+            )
+            if response.status_code in _BATCH_UNSUPPORTED:
+                self.batch_supported = False
+                return None
+            response.raise_for_status()
+
+            results = response.json().get("results", [])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Batch response has {len(results)} results for {len(batch)} items"
+                )
+        except (httpx.RequestError, httpx.HTTPStatusError, ValueError) as e:
+            return [error_result(e) for _ in batch]
+
+        self.batch_supported = True
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(batch)
+        return [normalize_result(result) for result in results]
+
+    async def _send_single(self, batch) -> List[Dict]:
+        """Classify each text with its own request, concurrently."""
+        self.stats["single_requests"] += len(batch)
+        return await asyncio.gather(
+            *(self.classifier.classify(text, meta) for text, meta, _ in batch)
+        )
+
+    async def close(self):
+        """Flush queued texts, wait for in-flight batches and close the client."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.classifier.close()
@@ -0,0 +1,180 @@
+"""Persistent classification result cache."""
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from internal.crypto.hash import compute_sha256
+
+
+class ClassificationCache:
+    """SQLite-backed cache of classifier results with an in-memory LRU on top.
+
+    Results are keyed by SHA-256 of the input text plus the model version the
+    service reported. Only entries for the most recently seen model version
+    are served; when the service reports a new version, older entries are
+    purged. Entries older than ttl_seconds (if set) count as misses, which
+    bounds how long results from a silently upgraded model can be served.
+    """
+
+    def __init__(self, db_path: Path, memory_entries: int = 1024, ttl_seconds: int = 0):
+        """Initialize classification cache."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[Dict, float]]" = OrderedDict()
+        self._init_db()
+        self.model_version = self._load_model_version()
+
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classifications (
+                    text_hash TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (text_hash, model_version)
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """
+            )
+            conn.commit()
+
+    def _load_model_version(self) -> Optional[str]:
+        """Load the last model version reported by the service."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT value FROM cache_state WHERE key = 'model_version'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def _expired(self, created_at: float) -> bool:
+        """Check whether an entry is past its TTL."""
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def get(self, text: str) -> Optional[Dict]:
+        """Return the cached result for text under the current model version."""
+        if self.model_version is None:
+            self.misses += 1
+            return None
+
+        key = (compute_sha256(text.encode("utf-8")), self.model_version)
+        entry = self._memory.get(key)
+        if entry is None:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    """
+                    SELECT result, created_at FROM classifications
+                    WHERE text_hash = ? AND model_version = ?
+                """,
+                    key,
+                ).fetchone()
+            if row:
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+        else:
+            self._memory.move_to_end(key)
+
+        if entry is None or self._expired(entry[1]):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(entry[0])
+
+    def put(self, text: str, result: Dict) -> None:
+        """Cache a successful classification result."""
+        if result.get("classification") == "error" or "error" in result:
+            return
+
+        model_version = result.get("model_version", "unknown")
+        if model_version != self.model_version:
+            self._switch_model_version(model_version)
+
+        key = (compute_sha256(text.encode("utf-8")), model_version)
+        entry = (result, time.time())
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO classifications
+                (text_hash, model_version, result, created_at)
+                VALUES (?, ?, ?, ?)
+            """,
+                (*key, json.dumps(result, sort_keys=True), entry[1]),
+            )
+            conn.commit()
+        self._remember(key, entry)
+
+    def _switch_model_version(self, model_version: str) -> None:
+        """Record a new model version and drop results from other versions."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "DELETE FROM classifications WHERE model_version != ?", (model_version,)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_state (key, value) VALUES ('model_version', ?)",
+                (model_version,),
+            )
+            conn.commit()
+        if self.model_version is not None:
+            self.invalidations += 1
+        self.model_version = model_version
+        self._memory.clear()
+
+    def _remember(self, key: Tuple[str, str], entry: Tuple[Dict, float]) -> None:
+        """Add an entry to the in-memory LRU."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "model_version": self.model_version,
+        }
+
+
+class CachingClassifier:
+    """Serve repeated classifications from a ClassificationCache."""
+
+    def __init__(self, classifier, cache: ClassificationCache):
+        """Initialize caching classifier around any classifier client."""
+        self.classifier = classifier
+        self.cache = cache
+
+    async def classify(self, text: str, metadata: Optional[Dict] = None) -> Dict:
+        """Classify text, skipping the ML service when a cached result exists."""
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+
+        result = await self.classifier.classify(text, metadata)
+        self.cache.put(text, result)
+        return result
+
+    async def close(self):
+        """Close the wrapped classifier."""
+        await self.classifier.close()
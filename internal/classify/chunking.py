@@ -0,0 +1,143 @@
+"""Chunked map-reduce classification for long texts."""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+
+def split_windows(text: str, max_chars: int, overlap: int = 0) -> List[Tuple[int, int]]:
+    """Split text into (start, end) windows of at most max_chars characters.
+
+    Windows end at the last whitespace in their final fifth when possible so
+    words are not cut, and consecutive windows overlap by up to overlap
+    characters so content at a boundary is seen whole by at least one window.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [(0, len(text))]
+
+    overlap = min(max(overlap, 0), max_chars // 2)
+    windows = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            search_from = end - max_chars // 5
+            boundary = max(text.rfind(" ", search_from, end), text.rfind("\n", search_from, end))
+            if boundary > start:
+                end = boundary
+        windows.append((start, end))
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return windows
+
+
+def reduce_chunk_results(
+    windows: List[Tuple[int, int]],
+    results: List[Dict],
+    positive_label: str = "positive",
+    positive_threshold: float = 0.5,
+) -> Dict:
+    """Combine per-window results into one case-level classification.
+
+    A long text is positive if any window is: the most confident window
+    labelled positive_label decides the result as long as its confidence
+    reaches positive_threshold, however confidently other windows say
+    otherwise. Only without such a window does the most confident window win,
+    and only if every window was classified: a failed window may have been the
+    positive one, so the result is then an error carrying the chunk evidence.
+    """
+    chunks = []
+    for (start, end), result in zip(windows, results):
+        chunk = {
+            "start": start,
+            "end": end,
+            "classification": result.get("classification"),
+            "confidence": result.get("confidence", 0.0),
+            "categories": result.get("categories", []),
+        }
+        if "error" in result:
+            chunk["error"] = result["error"]
+        chunks.append(chunk)
+
+    valid = [r for r in results if r.get("classification") != "error" and "error" not in r]
+    if not valid:
+        return {**results[0], "chunks": chunks}
+
+    positive = [
+        r
+        for r in valid
+        if r.get("classification") == positive_label
+        and r.get("confidence", 0.0) >= positive_threshold
+    ]
+    best = max(positive or valid, key=lambda r: r.get("confidence", 0.0))
+    failed = [r for r in results if r not in valid]
+    if failed and not positive:
+        return {
+            "classification": "error",
+            "confidence": 0.0,
+            "categories": sorted({c for r in valid for c in r.get("categories", [])}),
+            "model_version": best.get("model_version", "unknown"),
+            "timestamp": best.get("timestamp"),
+            "error": f"{len(failed)} of {len(results)} windows failed: "
+            + failed[0].get("error", "classification error"),
+            "chunks": chunks,
+        }
+    return {
+        "classification": best.get("classification", "unknown"),
+        "confidence": best.get("confidence", 0.0),
+        "categories": sorted({c for r in valid for c in r.get("categories", [])}),
+        "model_version": best.get("model_version", "unknown"),
+        "timestamp": best.get("timestamp"),
+        "chunks": chunks,
+    }
+
+
+class ChunkedClassifier:
+    """Classify long texts as concurrent windows and reduce the results.
+
+    The case-level result is positive if any window is positive with at
+    least positive_threshold confidence (see reduce_chunk_results), takes the
+    union of categories over all windows, and keeps per-window evidence
+    (offsets into the classified text) under "chunks".
+    """
+
+    def __init__(
+        self,
+        classifier,
+        max_chars: int,
+        overlap: int = 200,
+        max_concurrency: int = 4,
+        positive_label: str = "positive",
+        positive_threshold: float = 0.5,
+    ):
+        """Initialize chunked classifier around any classifier client."""
+        self.classifier = classifier
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.max_concurrency = max(1, max_concurrency)
+        self.positive_label = positive_label
+        self.positive_threshold = positive_threshold
+
+    async def classify(self, text: str, metadata: Optional[Dict] = None) -> Dict:
+        """Classify text, splitting it into windows if it is too long."""
+        windows = split_windows(text, self.max_chars, self.overlap)
+        if len(windows) == 1:
+            return await self.classifier.classify(text, metadata)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def classify_window(index: int, start: int, end: int) -> Dict:
+            async with semaphore:
+                window_metadata = {**(metadata or {}), "chunk": index, "chunk_count": len(windows)}
+                return await self.classifier.classify(text[start:end], window_metadata)
+
+        results = await asyncio.gather(
+            *(classify_window(i, start, end) for i, (start, end) in enumerate(windows))
+        )
+        return reduce_chunk_results(
+            windows, results, self.positive_label, self.positive_threshold
+        )
+
+    async def close(self):
+        """Close the wrapped classifier."""
+        await self.classifier.close()
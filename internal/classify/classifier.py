@@ -6,14 +6,38 @@ from typing import Dict, Optional
 import httpx
 
 
+def normalize_result(result: Dict) -> Dict:
+    """Map an ML service result onto the classification schema."""
+    return {
+        "classification": result.get("classification", "unknown"),
+        "confidence": result.get("confidence", 0.0),
+        "categories": result.get("categories", []),
+        "model_version": result.get("model_version", "unknown"),
+        "timestamp": result.get("timestamp"),
+    }
+
+
+def error_result(error: Exception) -> Dict:
+    """Default classification returned when the ML service call fails."""
+    return {
+        "classification": "error",
+        "confidence": 0.0,
+        "categories": [],
+        "model_version": "unknown",
+        "error": str(error),
+    }
+
+
 class Classifier:
     """LLM-based classifier integration."""
 
-    def __init__(self, ml_endpoint: str, timeout: int = 30):
+    def __init__(
+        self, ml_endpoint: str, timeout: int = 30, client: Optional[httpx.AsyncClient] = None
+    ):
         """Initialize classifier."""
         self.ml_endpoint = ml_endpoint
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.client = client or httpx.AsyncClient(timeout=timeout)
 
     async def classify(self, text: str, metadata: Optional[Dict] = None) -> Dict:
         """Classify text using LLM service."""
@@ -30,35 +54,13 @@ class Classifier:
             )
             response.raise_for_status()
 
-            result = response.json()
-            return {
-                "classification": result.get("classification", "unknown"),
-                "confidence": result.get("confidence", 0.0),
-                "categories": result.get("categories", []),
-                "model_version": result.get("model_version", "unknown"),
-                "timestamp": result.get("timestamp"),
-            }
+            return normalize_result(response.json())
         except httpx.RequestError as e:
             # If ML service is unavailable, return default classification
-            return {
-                "classification": "error",
-                "confidence": 0.0,
-                "categories": [],
-                "model_version": "unknown",
-                "error": str(e),
-            }
+            return error_result(e)
         except Exception as e:
-            return {
-                "classification": "error",
-                "confidence": 0.0,
-                "categories": [],
-                "model_version": "unknown",
-                "error": str(e),
-            }
+            return error_result(e)
 
     async def close(self):
         """Close HTTP client."""
         await self.client.aclose()
-
-
-
@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import yaml
 from pydantic import BaseModel, Field
@@ -15,6 +15,13 @@ class StorageConfig(BaseModel):
     base_path: str = "./data"
     vault_path: str = "./vault"
     sqlite_path: str = "./data/shomer.db"
+    # Plaintext bytes per authenticated segment in vault blobs
+    vault_segment_size: int = 65536
+    # "files" (one blob + .meta file per reference) or "segments" (append-only segment files)
+    vault_layout: str = "files"
+    vault_segment_file_mb: int = 256
+    # Store identical vault content once, shared by reference count
+    vault_dedup: bool = False
 
 
 class CryptoConfig(BaseModel):
@@ -29,6 +36,15 @@ class PIIConfig(BaseModel):
 
     hmac_key: str = ""
     languages: List[str] = ["en"]
+    # Cascade mode: cheap prefilter decides which paragraphs reach the NLP analyzer
+    cascade: bool = False
+    name_dictionary: List[str] = Field(default_factory=list)
+    # Paragraph-level detection cache (SQLite path, empty disables caching)
+    cache_path: str = ""
+    # Per-language analyzers are loaded on first use; at most this many stay loaded
+    max_loaded_languages: int = 2
+    # spaCy model per language code for non-default languages (e.g. de: de_core_news_lg)
+    spacy_models: Dict[str, str] = Field(default_factory=dict)
 
 
 class ClassifyConfig(BaseModel):
@@ -36,6 +52,73 @@ class ClassifyConfig(BaseModel):
 
     ml_endpoint: str = "http://localhost:8001/classify"
     timeout: int = 30
+    # Micro-batching: coalesce concurrent requests (batch_size 1 disables)
+    batch_size: int = 1
+    batch_max_wait_ms: int = 20
+    batch_endpoint: str = ""  # defaults to <ml_endpoint>/batch
+    # Result cache keyed by text hash + model version (SQLite path, empty disables)
+    cache_path: str = ""
+    cache_memory_entries: int = 1024
+    cache_ttl_seconds: int = 0  # 0 = no expiry
+    # Long texts are classified as overlapping windows (0 disables chunking)
+    chunk_max_chars: int = 0
+    chunk_overlap_chars: int = 200
+    chunk_concurrency: int = 4
+    # A text is positive if any window has this label with at least this confidence
+    chunk_positive_label: str = "positive"
+    chunk_positive_threshold: float = 0.5
+    # Finalize and sign cases without waiting for the classifier; the result is
+    # applied later as a new signed manifest version linked to the previous one
+    deferred: bool = False
+    deferred_workers: int = 2
+    # Ingests wait while this many classifications are queued (0 = unbounded);
+    # cases still pending at startup are requeued from the case store
+    deferred_queue_size: int = 1000
+
+
+class DedupConfig(BaseModel):
+    """Near-duplicate detection configuration."""
+
+    enabled: bool = False
+    # SimHash bits that may differ for two pages to count as near-duplicates
+    max_hamming_distance: int = 3
+    # Reuse the canonical case's classification instead of calling the classifier
+    reuse_classification: bool = True
+    # Skip PII scanning for exact duplicates and reuse the canonical redaction
+    skip_pii: bool = False
+
+
+class PackConfig(BaseModel):
+    """Case pack configuration."""
+
+    # Don't store pack ZIPs; rebuild and stream them from the signed manifest on download
+    on_demand: bool = False
+    # Deflate level for compressible entries (0 stores everything)
+    compress_level: int = 6
+    # Entries whose sampled entropy (bits/byte) reaches this are stored uncompressed
+    store_entropy_threshold: float = 7.5
+    # Large entries are deflated in blocks of this size on a thread pool
+    compress_block_kb: int = 1024
+    compress_workers: int = 4
+    # Record per-chunk SHA-256 hashes and their Merkle root for artifacts larger than
+    # one chunk of this size (0 disables)
+    chunk_hash_kb: int = 0
+    # In-memory LRU of pack metadata (ETag, path or signed manifest) for downloads
+    metadata_cache_entries: int = 1024
+    metadata_cache_ttl_seconds: int = 60
+    # Most cases one bundle (POST /bundles, the bundle command) may contain
+    bundle_max_cases: int = 1000
+
+
+class ScrubConfig(BaseModel):
+    """Integrity scrubber configuration."""
+
+    # Re-hash artifacts and re-authenticate vault blobs in the background
+    enabled: bool = False
+    mb_per_second: float = 20
+    # Pause between full passes
+    interval_hours: float = 24
+    batch_size: int = 100
 
 
 class APIConfig(BaseModel):
@@ -63,6 +146,9 @@ class Config(BaseModel):
     crypto: CryptoConfig = Field(default_factory=CryptoConfig)
     pii: PIIConfig = Field(default_factory=PIIConfig)
     classify: ClassifyConfig = Field(default_factory=ClassifyConfig)
+    dedup: DedupConfig = Field(default_factory=DedupConfig)
+    pack: PackConfig = Field(default_factory=PackConfig)
+    scrub: ScrubConfig = Field(default_factory=ScrubConfig)
     api: APIConfig = Field(default_factory=APIConfig)
     retention: RetentionConfig = Field(default_factory=RetentionConfig)
 
@@ -1,20 +1,38 @@
 """Cryptographic utilities for hashing and signing."""
 
-from .hash import compute_sha256, hash_file
+from .hash import (
+    compute_sha256,
+    hash_file,
+    hash_file_chunks,
+    hash_many,
+    hash_many_chunks,
+    hash_stream,
+)
+from .merkle import MerkleTree, chunk_root, verify_proof
 from .sign import (
     generate_keypair,
     load_keypair,
     sign_data,
     verify_signature,
 )
+from .signing import SigningService, verify_batch_receipt
 
 __all__ = [
     "compute_sha256",
     "hash_file",
+    "hash_file_chunks",
+    "hash_many",
+    "hash_many_chunks",
+    "hash_stream",
     "generate_keypair",
     "load_keypair",
     "sign_data",
     "verify_signature",
+    "MerkleTree",
+    "chunk_root",
+    "verify_proof",
+    "SigningService",
+    "verify_batch_receipt",
 ]
 
 
@@ -1,8 +1,18 @@
 """SHA256 hashing utilities."""
 
 import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+MIN_BUFFER_SIZE = 64 * 1024
+MAX_BUFFER_SIZE = 4 * 1024 * 1024
+# Files at least this large are hashed through a read-only memory map
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+T = TypeVar("T")
 
 
 def compute_sha256(data: bytes) -> str:
@@ -10,21 +20,104 @@ def compute_sha256(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
-def hash_file(file_path: Path) -> str:
-    """Compute SHA256 hash of a file."""
+def buffer_size_for(size: int) -> int:
+    """Pick a read buffer for a file of size bytes.
+
+    Small files are read in one call; larger ones use buffers that grow with
+    the file (about 1/16th of it) up to MAX_BUFFER_SIZE, keeping syscalls
+    few without holding large files in memory.
+    """
+    if size < MIN_BUFFER_SIZE:
+        return MIN_BUFFER_SIZE
+    buffer_size = MIN_BUFFER_SIZE
+    while buffer_size < MAX_BUFFER_SIZE and buffer_size * 16 < size:
+        buffer_size *= 2
+    return buffer_size
+
+
+def hash_file(file_path: Path, use_mmap: Optional[bool] = None) -> str:
+    """Compute SHA256 hash of a file.
+
+    Large files (MMAP_THRESHOLD and up, unless use_mmap says otherwise) are
+    hashed from a memory map; others are read into a reused buffer sized by
+    buffer_size_for. hashlib releases the GIL for large updates, so several
+    files can be hashed in parallel threads (see hash_many).
+    """
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= MMAP_THRESHOLD
+        if use_mmap and size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, len(view), MAX_BUFFER_SIZE):
+                        sha256_hash.update(view[start : start + MAX_BUFFER_SIZE])
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(buffer_size_for(size))
+            view = memoryview(buffer)
+            while True:
+                count = f.readinto(buffer)
+                if not count:
+                    break
+                sha256_hash.update(view[:count])
     return sha256_hash.hexdigest()
 
 
-def hash_stream(stream: BinaryIO) -> str:
+def hash_stream(stream: BinaryIO, buffer_size: int = 1024 * 1024) -> str:
     """Compute SHA256 hash of a stream."""
     sha256_hash = hashlib.sha256()
-    for byte_block in iter(lambda: stream.read(4096), b""):
+    for byte_block in iter(lambda: stream.read(buffer_size), b""):
         sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
 
+def hash_file_chunks(file_path: Path, chunk_size: int) -> Tuple[str, List[str]]:
+    """Compute the SHA256 hash of a file and of each chunk_size chunk, in one pass."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    sha256_hash = hashlib.sha256()
+    chunk_hashes = []
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, "rb") as f:
+        while True:
+            count = f.readinto(buffer)
+            while count and count < chunk_size:
+                # Short reads can happen before EOF; chunk boundaries must be exact
+                more = f.readinto(view[count:])
+                if not more:
+                    break
+                count += more
+            if not count:
+                break
+            sha256_hash.update(view[:count])
+            chunk_hashes.append(hashlib.sha256(view[:count]).hexdigest())
+    return sha256_hash.hexdigest(), chunk_hashes
+
+
+def _map_files(
+    func: Callable[[Path], T], file_paths: Iterable[Path], workers: Optional[int]
+) -> List[T]:
+    """Apply func to files on a thread pool, keeping input order."""
+    file_paths = list(file_paths)
+    if len(file_paths) <= 1:
+        return [func(path) for path in file_paths]
+    workers = min(workers or os.cpu_count() or 4, len(file_paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, file_paths))
+
+
+def hash_many(file_paths: Iterable[Path], workers: Optional[int] = None) -> List[str]:
+    """Hash files on a thread pool; returns hashes in the order of file_paths."""
+    return _map_files(hash_file, file_paths, workers)
+
 
+def hash_many_chunks(
+    file_paths: Iterable[Path], chunk_size: int, workers: Optional[int] = None
+) -> List[Tuple[str, List[str]]]:
+    """Like hash_many, returning (hash, chunk hashes) per file (see hash_file_chunks)."""
+    return _map_files(lambda path: hash_file_chunks(path, chunk_size), file_paths, workers)
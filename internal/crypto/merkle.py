@@ -0,0 +1,84 @@
+"""SHA-256 Merkle trees with inclusion proofs."""
+
+import hashlib
+from typing import Dict, List
+
+# Domain separation (as in RFC 6962) so a leaf can never be passed off as a node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(data: bytes) -> bytes:
+    """Hash one leaf."""
+    return hashlib.sha256(_LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes."""
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Merkle tree over a list of leaf hashes.
+
+    Levels are built pairwise; a node without a sibling is carried up to the
+    next level unchanged, so no leaf is ever duplicated. All levels are kept,
+    which makes producing a proof for every leaf O(n log n) overall.
+    """
+
+    def __init__(self, leaf_hashes: List[bytes]):
+        """Build the tree."""
+        if not leaf_hashes:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [list(leaf_hashes)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        """Return the root hash."""
+        return self.levels[-1][0]
+
+    def __len__(self) -> int:
+        """Return the number of leaves."""
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """Return the inclusion proof of leaf index, from the leaf up.
+
+        Each step is {"side": "left"|"right", "hash": hex} giving the sibling
+        to combine with; carried-up nodes contribute no step.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Leaf index out of range: {index}")
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                side = "left" if sibling < index else "right"
+                steps.append({"side": side, "hash": level[sibling].hex()})
+            index //= 2
+        return steps
+
+
+def chunk_root(chunk_hashes: List[str]) -> str:
+    """Return the Merkle root (hex) over a list of chunk SHA-256 hashes (hex)."""
+    return MerkleTree([leaf_hash(bytes.fromhex(h)) for h in chunk_hashes]).root.hex()
+
+
+def verify_proof(leaf: bytes, proof: List[Dict[str, str]], root: bytes) -> bool:
+    """Check that leaf (a leaf hash) is included under root."""
+    current = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["side"] == "left":
+            current = node_hash(sibling, current)
+        elif step["side"] == "right":
+            current = node_hash(current, sibling)
+        else:
+            return False
+    return current == root
@@ -0,0 +1,163 @@
+"""Long-lived signing service for manifests."""
+
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+from internal.crypto.hash import compute_sha256
+from internal.crypto.merkle import MerkleTree, leaf_hash, verify_proof
+from internal.crypto.sign import get_or_create_keypair, sign_data, verify_signature
+
+# Batch signatures cover this context, the leaf count and the root, so they can
+# never be confused with a signature over a manifest
+BATCH_CONTEXT = b"shomer-manifest-batch-v1\x00"
+
+
+def batch_message(merkle_root: bytes, leaf_count: int) -> bytes:
+    """Build the message signed for a batch."""
+    return BATCH_CONTEXT + struct.pack(">Q", leaf_count) + merkle_root
+
+
+def verify_batch_receipt(public_key: Ed25519PublicKey, receipt: Dict) -> bool:
+    """Check a manifest's batch receipt: root signature and inclusion proof."""
+    try:
+        root = bytes.fromhex(receipt["merkle_root"])
+        leaf = leaf_hash(bytes.fromhex(receipt["manifest_hash"]))
+        signature = bytes.fromhex(receipt["signature"])
+        message = batch_message(root, receipt["leaf_count"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return verify_signature(public_key, signature, message) and verify_proof(
+        leaf, receipt["proof"], root
+    )
+
+
+class SigningService:
+    """Ed25519 signer that keeps the signing key in memory.
+
+    The keypair is loaded (or created) on first use instead of on every
+    signature. Besides signing single manifests, it can sign one Merkle root
+    over a batch of manifest hashes and hand out a per-manifest inclusion
+    receipt. Signing latencies are kept for a recent window and reported by
+    metrics().
+    """
+
+    def __init__(self, key_path: Path, key_name: str, latency_window: int = 1024):
+        """Initialize signing service."""
+        self.key_path = Path(key_path)
+        self.key_name = key_name
+        self._lock = threading.Lock()
+        self._private_key = None
+        self._public_key = None
+        self._public_key_pem: Optional[bytes] = None
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._signatures = 0
+        self._batches = 0
+        self._batched_manifests = 0
+
+    def _load(self) -> None:
+        """Load the keypair once."""
+        if self._private_key is None:
+            with self._lock:
+                if self._private_key is None:
+                    private_key, public_key = get_or_create_keypair(self.key_path, self.key_name)
+                    self._public_key_pem = public_key.public_bytes(
+                        encoding=serialization.Encoding.PEM,
+                        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+                    )
+                    self._public_key = public_key
+                    self._private_key = private_key
+
+    @property
+    def public_key(self) -> Ed25519PublicKey:
+        """Return the public key."""
+        self._load()
+        return self._public_key
+
+    @property
+    def public_key_pem(self) -> bytes:
+        """Return the public key as PEM."""
+        self._load()
+        return self._public_key_pem
+
+    @property
+    def key_id(self) -> str:
+        """Return a short id of the signing key (hash of its PEM)."""
+        return compute_sha256(self.public_key_pem)[:16]
+
+    def reload(self) -> None:
+        """Drop the cached keypair so it is read again on next use."""
+        with self._lock:
+            self._private_key = None
+            self._public_key = None
+            self._public_key_pem = None
+
+    def sign(self, data: bytes) -> bytes:
+        """Sign data."""
+        self._load()
+        started = time.perf_counter()
+        signature = sign_data(self._private_key, data)
+        self._record(time.perf_counter() - started)
+        return signature
+
+    def sign_batch(self, manifest_hashes: List[str]) -> List[Dict]:
+        """Sign one Merkle root over manifest hashes (hex) and return a receipt per hash.
+
+        Each receipt holds the root, its signature, the leaf index and count,
+        and the inclusion proof, so it can be verified on its own with
+        verify_batch_receipt.
+        """
+        tree = MerkleTree([leaf_hash(bytes.fromhex(h)) for h in manifest_hashes])
+        signature = self.sign(batch_message(tree.root, len(tree))).hex()
+        with self._lock:
+            self._batches += 1
+            self._batched_manifests += len(tree)
+
+        return [
+            {
+                "manifest_hash": manifest_hash,
+                "merkle_root": tree.root.hex(),
+                "leaf_index": index,
+                "leaf_count": len(tree),
+                "proof": tree.proof(index),
+                "signature": signature,
+                "key_id": self.key_id,
+            }
+            for index, manifest_hash in enumerate(manifest_hashes)
+        ]
+
+    def _record(self, seconds: float) -> None:
+        """Remember a signing latency."""
+        with self._lock:
+            self._signatures += 1
+            self._latencies.append(seconds)
+
+    def metrics(self) -> Dict:
+        """Return signature counts and latency statistics (milliseconds) for recent signatures."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            result = {
+                "signatures": self._signatures,
+                "batches": self._batches,
+                "batched_manifests": self._batched_manifests,
+            }
+
+        if latencies:
+
+            def percentile(fraction: float) -> float:
+                return round(latencies[int(fraction * (len(latencies) - 1))] * 1000, 4)
+
+            result["latency_ms"] = {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 4),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 4),
+            }
+        return result
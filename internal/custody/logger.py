@@ -41,6 +41,22 @@ class ChainOfCustodyLogger:
         with open(self.log_path, "a") as f:
             f.write(log_line + "\n")
 
+    def log_token_resolution(self, resolved: Dict[str, Any], actor: str = "admin") -> None:
+        """Log pseudonym re-identification per vault object (counts only, no values)."""
+        counts: Dict[tuple, int] = {}
+        for result in resolved.values():
+            for occurrence in (result or {}).get("occurrences", []):
+                key = (occurrence.get("case_id") or "unknown", occurrence["vault_ref"])
+                counts[key] = counts.get(key, 0) + 1
+
+        for (case_id, vault_ref), count in counts.items():
+            self.log(
+                case_id,
+                "pii-reidentified",
+                actor=actor,
+                metadata={"vault_ref": vault_ref, "token_count": count},
+            )
+
     def get_events(self, case_id: Optional[str] = None) -> list:
         """Get all events, optionally filtered by case_id."""
         events = []
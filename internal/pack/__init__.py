@@ -1,9 +1,24 @@
 """Pack generation - ZIP files with manifests and signatures."""
 
+from .bundle import BundleBuilder
+from .compression import CompressionPolicy
 from .manifest import Manifest, create_manifest
 from .packer import PackGenerator
+from .serving import PackMetadataCache
+from .verify import verify_chunk, verify_chunks, verify_directory, verify_pack
 
-__all__ = ["Manifest", "create_manifest", "PackGenerator"]
+__all__ = [
+    "BundleBuilder",
+    "CompressionPolicy",
+    "Manifest",
+    "create_manifest",
+    "PackGenerator",
+    "PackMetadataCache",
+    "verify_chunk",
+    "verify_chunks",
+    "verify_directory",
+    "verify_pack",
+]
 
 
 
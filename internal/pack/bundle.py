@@ -0,0 +1,174 @@
+"""Multi-case evidence bundles: many packs streamed as one archive."""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from internal.custody.logger import ChainOfCustodyLogger
+from internal.pack.packer import PackGenerator, _ChunkBuffer
+from internal.pack.serving import PackMetadataCache
+from internal.pack.zipstream import ZIP_DEFLATED, ZIP_STORED, ZipStreamWriter
+from internal.store.case_store import CaseStore
+
+_READ_SIZE = 1024 * 1024
+# Headroom for the size hint of a pack that is rebuilt while it is bundled
+_PACK_OVERHEAD = 1024 * 1024
+
+
+class BundleBuilder:
+    """Stream the packs of many cases into one ZIP with a signed index.
+
+    The bundle holds packs/<case_id>.zip for every case (the stored pack, or
+    one rebuilt from the signed manifest), then index.json listing each
+    case's manifest hash and the SHA-256 and size of its pack, index.sig
+    (Ed25519 over index.json) and pubkey.pem. Packs are copied through as
+    they are read or built and hashed on the way, so neither a pack nor the
+    bundle is ever held in memory or written to disk. Every bundled case is
+    logged to chain of custody.
+    """
+
+    def __init__(
+        self,
+        case_store: CaseStore,
+        pack_generator: PackGenerator,
+        custody_logger: ChainOfCustodyLogger,
+        pack_cache: Optional[PackMetadataCache] = None,
+    ):
+        """Initialize bundle builder."""
+        self.case_store = case_store
+        self.pack_generator = pack_generator
+        self.custody_logger = custody_logger
+        self.pack_cache = pack_cache or PackMetadataCache(max_entries=0)
+
+    def select(
+        self,
+        case_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        **filters,
+    ) -> List[str]:
+        """Return the given case ids (deduplicated), or up to limit cases matching filters.
+
+        filters are passed to CaseStore.list_cases. Raises ValueError if both
+        case ids and filters are given, or if a given case does not exist.
+        """
+        if case_ids and any(value is not None for value in filters.values()):
+            raise ValueError("Give either case ids or filters, not both")
+        if case_ids:
+            case_ids = list(dict.fromkeys(case_ids))
+            missing = [case_id for case_id in case_ids if not self.case_store.get_case(case_id)]
+            if missing:
+                raise ValueError(f"Cases not found: {', '.join(missing)}")
+            return case_ids
+        return [case["case_id"] for case in self.case_store.list_cases(limit=limit, **filters)]
+
+    def iter_bundle(
+        self,
+        case_ids: List[str],
+        actor: str = "admin",
+        bundle_id: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        summary: Optional[Dict] = None,
+    ) -> Iterator[bytes]:
+        """Yield the bundle ZIP in chunks.
+
+        progress, if given, is called with (cases done, total) after each
+        case. summary, if given, is filled with the signed index once the
+        bundle is complete. Cases without a pack yet are listed as skipped.
+        """
+        bundle_id = bundle_id or str(uuid4())
+        buffer = _ChunkBuffer()
+        zipf = ZipStreamWriter(buffer)
+        index = {
+            "bundle_id": bundle_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "actor": actor,
+            "cases": [],
+            "skipped": [],
+        }
+
+        for done, case_id in enumerate(case_ids, start=1):
+            metadata = self.pack_cache.get(self.case_store, case_id)
+            if metadata is None:
+                index["skipped"].append(case_id)
+            else:
+                name = f"packs/{case_id}.zip"
+                sha256_hash = hashlib.sha256()
+                zipf.begin_entry(name, ZIP_STORED, self._size_hint(metadata))
+                for chunk in self._iter_pack(case_id, metadata):
+                    # Packs are compressed entry by entry already
+                    zipf.write(chunk)
+                    sha256_hash.update(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+                zipf.end_entry()
+                entry = zipf.entries[-1]
+                record = {
+                    "case_id": case_id,
+                    "manifest_hash": metadata["manifest_hash"],
+                    "pack": name,
+                    "size": entry.size,
+                    "sha256": sha256_hash.hexdigest(),
+                }
+                index["cases"].append(record)
+                self.custody_logger.log(
+                    case_id,
+                    "bundled",
+                    actor=actor,
+                    metadata={
+                        "bundle_id": bundle_id,
+                        "manifest_hash": record["manifest_hash"],
+                        "pack_sha256": record["sha256"],
+                    },
+                )
+            if progress:
+                progress(done, len(case_ids))
+            data = buffer.drain()
+            if data:
+                yield data
+
+        signer = self.pack_generator.signer
+        index["key_id"] = signer.key_id
+        index_bytes = json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        zipf.write_entry("index.json", index_bytes, ZIP_DEFLATED)
+        zipf.write_entry("index.sig", signer.sign(index_bytes), ZIP_STORED)
+        zipf.write_entry("pubkey.pem", signer.public_key_pem, ZIP_STORED)
+        zipf.close()
+        yield buffer.drain()
+
+        if summary is not None:
+            summary.update(index)
+            summary["bundle_size"] = zipf.position
+
+    def write_bundle(
+        self,
+        case_ids: List[str],
+        destination: BinaryIO,
+        actor: str = "admin",
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict:
+        """Write the bundle for case_ids to destination; return its index."""
+        summary: Dict = {}
+        for chunk in self.iter_bundle(case_ids, actor, progress=progress, summary=summary):
+            destination.write(chunk)
+        return summary
+
+    def _size_hint(self, metadata: Dict) -> int:
+        """Upper estimate of a pack's size, which decides whether its entry needs ZIP64."""
+        if metadata["pack_path"]:
+            return Path(metadata["pack_path"]).stat().st_size
+        artifacts = json.loads(metadata["manifest_json"])["artifacts"]
+        paths = [self.pack_generator.base_path / artifact["path"] for artifact in artifacts]
+        return sum(path.stat().st_size for path in paths if path.exists()) + _PACK_OVERHEAD
+
+    def _iter_pack(self, case_id: str, metadata: Dict) -> Iterator[bytes]:
+        """Yield a case's stored pack, or rebuild it from its signed manifest."""
+        if metadata["pack_path"]:
+            with open(metadata["pack_path"], "rb") as f:
+                yield from iter(lambda: f.read(_READ_SIZE), b"")
+            return
+        custody_events = self.custody_logger.get_events(case_id)[: metadata["custody_count"]]
+        yield from self.pack_generator.iter_pack(metadata["manifest_json"], custody_events)
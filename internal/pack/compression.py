@@ -0,0 +1,115 @@
+"""Per-entry compression policy for case packs."""
+
+import math
+import zlib
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, Tuple
+
+from internal.pack.zipstream import ZIP_DEFLATED, ZIP_STORED
+
+# Leading bytes of formats that are compressed already
+_COMPRESSED_SIGNATURES = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+    b"PK\x03\x04",  # ZIP, DOCX, XLSX, ...
+    b"\x1f\x8b",  # gzip
+    b"BZh",
+    b"\xfd7zXZ\x00",
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"7z\xbc\xaf\x27\x1c",
+    b"wOF2",  # WOFF2
+)
+# Deflate back-references reach 32 KiB back; parallel blocks are primed with that much
+_WINDOW_SIZE = 32 * 1024
+
+
+def is_compressed_format(head: bytes) -> bool:
+    """Return True if head starts like an already-compressed file format."""
+    if head.startswith(_COMPRESSED_SIGNATURES):
+        return True
+    # RIFF containers (WebP) and ISO media files (MP4, HEIC, AVIF)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return True
+    return head[4:8] == b"ftyp"
+
+
+def sample_entropy(data: bytes) -> float:
+    """Return the Shannon entropy of data in bits per byte (0 to 8)."""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+class CompressionPolicy:
+    """Choose how each pack entry is stored and compress it.
+
+    Entries whose first bytes identify a compressed format, or whose sampled
+    entropy is close to random, are STORED; everything else is deflated at
+    the configured level. Large entries are deflated in blocks on a thread
+    pool (zlib releases the GIL); each block is primed with the previous
+    32 KiB and sync-flushed, so the blocks join into one deflate stream.
+    """
+
+    def __init__(
+        self,
+        level: int = 6,
+        entropy_threshold: float = 7.5,
+        sample_size: int = 16 * 1024,
+        block_size: int = 1024 * 1024,
+    ):
+        """Initialize compression policy."""
+        if not 0 <= level <= 9:
+            raise ValueError(f"Invalid deflate level: {level}")
+        if block_size < _WINDOW_SIZE:
+            raise ValueError(f"Compression blocks must be at least {_WINDOW_SIZE} bytes")
+        self.level = level
+        self.entropy_threshold = entropy_threshold
+        self.sample_size = sample_size
+        self.block_size = block_size
+
+    def choose(self, head: bytes) -> int:
+        """Return ZIP_STORED or ZIP_DEFLATED for an entry starting with head."""
+        if self.level == 0 or is_compressed_format(head):
+            return ZIP_STORED
+        if sample_entropy(head[: self.sample_size]) >= self.entropy_threshold:
+            return ZIP_STORED
+        return ZIP_DEFLATED
+
+    def _deflate_block(self, block: bytes, window: bytes, last: bool) -> bytes:
+        """Raw-deflate one block of a larger stream."""
+        if window:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=window)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(block) + compressor.flush(
+            zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+        )
+
+    def deflate_blocks(
+        self, blocks: Iterable[bytes], executor: Executor, window: int = 8
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        """Yield (plaintext, deflated) per block, compressing up to window blocks ahead.
+
+        blocks must be the entry's data cut into block_size pieces. Output
+        only depends on the data, the level and block_size, not on timing.
+        """
+        pending = []
+        previous = b""
+        source = iter(blocks)
+        block = next(source, None)
+        while block is not None:
+            following = next(source, None)
+            last = following is None
+            pending.append(
+                (block, executor.submit(self._deflate_block, block, previous[-_WINDOW_SIZE:], last))
+            )
+            previous, block = block, following
+            if len(pending) >= window:
+                data, future = pending.pop(0)
+                yield data, future.result()
+        for data, future in pending:
+            yield data, future.result()
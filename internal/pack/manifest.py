@@ -5,7 +5,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from internal.crypto.hash import hash_file
+from internal.crypto.hash import hash_many, hash_many_chunks
+from internal.crypto.merkle import chunk_root
 
 
 class Manifest:
@@ -19,6 +20,8 @@ class Manifest:
         artifacts: Optional[List[Dict[str, Any]]] = None,
         classification: Optional[Dict[str, Any]] = None,
         pii_detected: bool = False,
+        version: int = 1,
+        previous_manifest_hash: Optional[str] = None,
     ):
         """Initialize manifest."""
         self.case_id = case_id
@@ -27,6 +30,8 @@ class Manifest:
         self.artifacts = artifacts or []
         self.classification = classification
         self.pii_detected = pii_detected
+        self.version = version
+        self.previous_manifest_hash = previous_manifest_hash
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert manifest to dictionary."""
@@ -41,6 +46,12 @@ class Manifest:
         if self.classification:
             manifest["classification"] = self.classification
 
+        # Later versions (e.g. deferred classification) link to the manifest they replace
+        if self.version > 1:
+            manifest["version"] = self.version
+        if self.previous_manifest_hash:
+            manifest["previous_manifest_hash"] = self.previous_manifest_hash
+
         return manifest
 
     def to_json(self, canonical: bool = True) -> str:
@@ -59,6 +70,7 @@ class Manifest:
         path: str,
         hash_value: str,
         vault_ref: Optional[str] = None,
+        chunks: Optional[Dict[str, Any]] = None,
     ) -> None:
         """Add artifact to manifest."""
         artifact = {
@@ -69,10 +81,30 @@ class Manifest:
 
         if vault_ref:
             artifact["vault_ref"] = vault_ref
+        if chunks:
+            artifact["chunks"] = chunks
 
         self.artifacts.append(artifact)
 
 
+def chunk_hashes_field(chunk_size: int, chunk_hashes: List[str]) -> Optional[Dict[str, Any]]:
+    """Build an artifact's "chunks" field, or None if it fits in a single chunk.
+
+    The field records the chunk size, the SHA-256 of every chunk and the
+    Merkle root over them, so a chunk (e.g. from a range download or a
+    resumed verification) can be checked without hashing the whole
+    artifact. The artifact's flat "hash" is kept alongside it.
+    """
+    if len(chunk_hashes) <= 1:
+        return None
+    return {
+        "size": chunk_size,
+        "count": len(chunk_hashes),
+        "root": chunk_root(chunk_hashes),
+        "hashes": chunk_hashes,
+    }
+
+
 def create_manifest(
     case_id: str,
     url: str,
@@ -80,8 +112,9 @@ def create_manifest(
     artifacts: List[Dict],
     classification: Optional[Dict] = None,
     pii_detected: bool = False,
+    chunk_size: int = 0,
 ) -> Manifest:
-    """Create manifest from case data."""
+    """Create manifest from case data (with chunk hashes if chunk_size is set)."""
     manifest = Manifest(
         case_id=case_id,
         url=url,
@@ -90,16 +123,23 @@ def create_manifest(
         pii_detected=pii_detected,
     )
 
-    for artifact in artifacts:
-        artifact_path = base_path / artifact["path"]
-        if artifact_path.exists():
-            hash_value = hash_file(artifact_path)
-            manifest.add_artifact(
-                artifact_type=artifact["type"],
-                path=artifact["path"],
-                hash_value=hash_value,
-                vault_ref=artifact.get("vault_ref"),
-            )
+    stored = [artifact for artifact in artifacts if (base_path / artifact["path"]).exists()]
+    paths = [base_path / artifact["path"] for artifact in stored]
+    if chunk_size > 0:
+        results = [
+            (hash_value, chunk_hashes_field(chunk_size, chunk_hashes))
+            for hash_value, chunk_hashes in hash_many_chunks(paths, chunk_size)
+        ]
+    else:
+        results = [(hash_value, None) for hash_value in hash_many(paths)]
+    for artifact, (hash_value, chunks) in zip(stored, results):
+        manifest.add_artifact(
+            artifact_type=artifact["type"],
+            path=artifact["path"],
+            hash_value=hash_value,
+            vault_ref=artifact.get("vault_ref"),
+            chunks=chunks,
+        )
 
     return manifest
 
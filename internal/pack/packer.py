@@ -1,88 +1,187 @@
 """Pack generator - creates ZIP files with all artifacts."""
 
-import zipfile
+import itertools
+import json
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from internal.crypto.hash import compute_sha256
-from internal.crypto.sign import get_or_create_keypair, sign_data
+from internal.crypto.signing import SigningService
+from internal.pack.compression import CompressionPolicy
 from internal.pack.manifest import Manifest
+from internal.pack.zipstream import ZIP_STORED, ZipStreamWriter
+
+
+class _ChunkBuffer:
+    """Write-only ZIP sink whose output is drained as the pack is built."""
+
+    def __init__(self):
+        """Initialize chunk buffer."""
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        """Collect data."""
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and clear everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
 
 
 class PackGenerator:
     """Generate case packs (ZIP files)."""
 
-    def __init__(self, base_path: Path, key_path: Path, key_name: str):
+    def __init__(
+        self,
+        base_path: Path,
+        key_path: Path,
+        key_name: str,
+        compression: Optional[CompressionPolicy] = None,
+        workers: int = 4,
+        signer: Optional[SigningService] = None,
+    ):
         """Initialize pack generator."""
         self.base_path = Path(base_path)
         self.key_path = Path(key_path)
         self.key_name = key_name
+        self.signer = signer or SigningService(self.key_path, key_name)
+        self.compression = compression or CompressionPolicy()
+        self.workers = max(1, workers)
+
+    @property
+    def build_id(self) -> str:
+        """Short hash of everything besides the manifest that decides a pack's bytes.
+
+        That is the compression parameters and the signing key.
+        """
+        policy = self.compression
+        description = (
+            f"{policy.level}:{policy.entropy_threshold}:{policy.sample_size}:"
+            f"{policy.block_size}:{self.signer.key_id}"
+        )
+        return compute_sha256(description.encode("utf-8"))[:16]
+
+    def pack_path(self, case_id: str, version: int = 1) -> Path:
+        """Return where a stored pack version lives (pack.zip, then pack.v<N>.zip)."""
+        pack_name = "pack.zip" if version == 1 else f"pack.v{version}.zip"
+        return self.base_path / f"{case_id}" / pack_name
+
+    def signed_entries(self, manifest_json: str) -> List[Tuple[str, bytes]]:
+        """Return manifest.json, manifest.sig and pubkey.pem as in-memory entries."""
+        manifest_bytes = manifest_json.encode("utf-8")
+
+        # Ed25519 signatures are deterministic, so re-signing reproduces the same bytes
+        signature = self.signer.sign(manifest_bytes)
+        return [
+            ("manifest.json", manifest_bytes),
+            ("manifest.sig", signature),
+            ("pubkey.pem", self.signer.public_key_pem),
+        ]
+
+    def iter_pack(
+        self,
+        manifest_json: str,
+        custody_events: Optional[List[Dict]] = None,
+        stats: Optional[Dict] = None,
+    ) -> Iterator[bytes]:
+        """Yield a pack ZIP in chunks, built from memory and the artifact files.
+
+        Artifacts are those listed in the manifest, streamed from base_path.
+        Entries are written in a fixed order with fixed headers and compressed
+        according to the compression policy, so the same manifest, artifacts
+        and custody events always give the same bytes, whether the pack is
+        stored or streamed on demand. If stats is given it is filled with
+        entry counts, sizes, the compression ratio and the build time.
+        """
+        started = time.perf_counter()
+        buffer = _ChunkBuffer()
+        zipf = ZipStreamWriter(buffer)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for name, data in self.signed_entries(manifest_json):
+                self._write_bytes(zipf, name, data)
+            yield buffer.drain()
+
+            for artifact in json.loads(manifest_json)["artifacts"]:
+                artifact_path = self.base_path / artifact["path"]
+                if not artifact_path.exists():
+                    continue
+                for _ in self._write_file(zipf, artifact_path, pool):
+                    data = buffer.drain()
+                    if data:
+                        yield data
+
+            if custody_events is not None:
+                log = "".join(json.dumps(event, sort_keys=True) + "\n" for event in custody_events)
+                self._write_bytes(zipf, "chain_of_custody.log", log.encode("utf-8"))
+            zipf.close()
+        yield buffer.drain()
+
+        if stats is not None:
+            size = sum(entry.size for entry in zipf.entries)
+            compressed_size = sum(entry.compressed_size for entry in zipf.entries)
+            stats.update(
+                {
+                    "entries": len(zipf.entries),
+                    "stored_entries": sum(e.method == ZIP_STORED for e in zipf.entries),
+                    "size": size,
+                    "compressed_size": compressed_size,
+                    "compression_ratio": round(compressed_size / size, 4) if size else 1.0,
+                    "pack_size": zipf.position,
+                    "seconds": round(time.perf_counter() - started, 4),
+                }
+            )
+
+    def _write_bytes(self, zipf: ZipStreamWriter, name: str, data: bytes) -> None:
+        """Write an in-memory entry."""
+        zipf.write_entry(name, data, self.compression.choose(data), self.compression.level)
+
+    def _write_file(
+        self, zipf: ZipStreamWriter, path: Path, pool: Executor
+    ) -> Iterator[None]:
+        """Stream a file into the pack, yielding after each block written."""
+        block_size = self.compression.block_size
+        with open(path, "rb") as source:
+            head = source.read(block_size)
+            method = self.compression.choose(head)
+            zipf.begin_entry(path.name, method, path.stat().st_size)
+            blocks = itertools.chain([head], iter(lambda: source.read(block_size), b""))
+            if method == ZIP_STORED:
+                for block in blocks:
+                    zipf.write(block)
+                    yield
+            else:
+                for block, deflated in self.compression.deflate_blocks(
+                    blocks, pool, window=self.workers * 2
+                ):
+                    zipf.write(block, deflated)
+                    yield
+            zipf.end_entry()
+        yield
 
     def create_pack(
         self,
         case_id: str,
         manifest: Manifest,
-        artifacts: List[Path],
-        chain_of_custody_path: Optional[Path] = None,
+        custody_events: Optional[List[Dict]] = None,
+        version: int = 1,
+        stats: Optional[Dict] = None,
     ) -> Path:
-        """Create pack ZIP file."""
-        pack_path = self.base_path / f"{case_id}" / "pack.zip"
+        """Create pack ZIP file (pack.zip, or pack.v<N>.zip for later manifest versions)."""
+        pack_path = self.pack_path(case_id, version)
         pack_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Get or create signing keypair
-        private_key, public_key = get_or_create_keypair(self.key_path, self.key_name)
-
-        # Create canonical manifest JSON
-        manifest_json = manifest.to_json(canonical=True)
-        manifest_bytes = manifest_json.encode("utf-8")
-
-        # Sign manifest
-        signature = sign_data(private_key, manifest_bytes)
-
-        # Write manifest and signature
-        manifest_path = pack_path.parent / "manifest.json"
-        manifest_path.write_text(manifest_json, encoding="utf-8")
-
-        sig_path = pack_path.parent / "manifest.sig"
-        sig_path.write_bytes(signature)
-
-        # Write public key
-        from cryptography.hazmat.primitives import serialization
-        pubkey_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
-        pubkey_path = pack_path.parent / "pubkey.pem"
-        pubkey_path.write_bytes(pubkey_pem)
-
-        # Create ZIP file
-        with zipfile.ZipFile(pack_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add manifest
-            zipf.write(manifest_path, "manifest.json")
-
-            # Add signature
-            zipf.write(sig_path, "manifest.sig")
-
-            # Add public key
-            zipf.write(pubkey_path, "pubkey.pem")
-
-            # Add artifacts
-            for artifact_path in artifacts:
-                if artifact_path.exists():
-                    # Use relative path in ZIP
-                    arcname = artifact_path.name
-                    zipf.write(artifact_path, arcname)
-
-            # Add chain of custody if provided
-            if chain_of_custody_path and chain_of_custody_path.exists():
-                zipf.write(chain_of_custody_path, "chain_of_custody.log")
-
-        # Clean up temporary files
-        manifest_path.unlink()
-        sig_path.unlink()
-        pubkey_path.unlink()
+        partial = pack_path.with_name(pack_path.name + ".partial")
+        with open(partial, "wb") as f:
+            for chunk in self.iter_pack(
+                manifest.to_json(canonical=True), custody_events, stats
+            ):
+                f.write(chunk)
+        os.replace(partial, pack_path)
 
         return pack_path
-
-
-
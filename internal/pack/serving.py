@@ -0,0 +1,163 @@
+"""Helpers for serving packs over HTTP: metadata cache, ETags and byte ranges."""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from internal.store.case_store import CaseStore
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_READ_SIZE = 1024 * 1024
+
+
+class PackMetadataCache:
+    """Bounded in-memory LRU of what is needed to serve a case's pack.
+
+    An entry holds the manifest hash (the pack's ETag), the stored pack path
+    or, for packs rebuilt on demand, the signed manifest and custody count,
+    plus the pack size once known. Entries expire after ttl_seconds so that
+    packs rebuilt by another process are picked up; the pipeline invalidates
+    a case itself when it packs a new manifest version.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60):
+        """Initialize pack metadata cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+
+    def get(self, case_store: CaseStore, case_id: str) -> Optional[Dict]:
+        """Return a case's pack metadata, loading it from case_store on a miss.
+
+        Returns None if the case does not exist or has no pack yet (such
+        results are not cached).
+        """
+        with self._lock:
+            cached = self._entries.get(case_id)
+            fresh = cached and (
+                self.ttl_seconds <= 0 or time.monotonic() - cached[1] < self.ttl_seconds
+            )
+            if fresh:
+                self._entries.move_to_end(case_id)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        metadata = self._load(case_store, case_id)
+        if metadata is not None and self.max_entries > 0:
+            with self._lock:
+                self._entries[case_id] = (metadata, time.monotonic())
+                self._entries.move_to_end(case_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return metadata
+
+    @staticmethod
+    def _load(case_store: CaseStore, case_id: str) -> Optional[Dict]:
+        """Read a case's pack metadata from the case store."""
+        case = case_store.get_case(case_id)
+        if not case or not case.get("manifest_hash"):
+            return None
+        pack_path = case.get("pack_path")
+        if pack_path and Path(pack_path).exists():
+            return {"manifest_hash": case["manifest_hash"], "pack_path": pack_path, "size": None}
+
+        record = case_store.get_manifest_version(case_id)
+        if not record or not record.get("manifest_json"):
+            return None
+        return {
+            "manifest_hash": record["manifest_hash"],
+            "pack_path": None,
+            "manifest_json": record["manifest_json"],
+            "custody_count": record["custody_count"],
+            "size": None,
+        }
+
+    def invalidate(self, case_id: Optional[str] = None) -> None:
+        """Drop one case's entry, or all entries."""
+        with self._lock:
+            if case_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(case_id, None)
+
+    def stats(self) -> Dict:
+        """Return entry count, hits and misses."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def pack_etag(manifest_hash: str, build_id: str) -> str:
+    """Return the strong ETag of a pack.
+
+    Packs are deterministic, so every pack built from a signed manifest with
+    the same compression parameters and signing key (build_id, see
+    PackGenerator.build_id) has the same bytes.
+    """
+    return f'"{manifest_hash}-{build_id}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match header against etag (weak comparison, as RFC 9110 asks)."""
+    if header.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in header.split(",")
+    )
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a Range header into an inclusive (start, end) byte range.
+
+    Returns None when the header is to be ignored and the whole pack sent
+    (another unit, several ranges, or malformed). Raises ValueError if the
+    range cannot be satisfied for size bytes.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file."""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            block = f.read(min(_READ_SIZE, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+
+def slice_stream(chunks: Iterable[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a chunked stream, stopping once past end."""
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(start - position, 0) : end + 1 - position]
+        position = chunk_end
+        if position > end:
+            return
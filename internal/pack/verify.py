@@ -0,0 +1,258 @@
+"""Verification of case packs."""
+
+import hashlib
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+from internal.crypto.hash import compute_sha256
+from internal.crypto.merkle import chunk_root
+from internal.crypto.sign import verify_signature
+
+_SIGNED_ENTRIES = ("manifest.json", "manifest.sig", "pubkey.pem")
+_CUSTODY_ENTRY = "chain_of_custody.log"
+_READ_SIZE = 1024 * 1024
+
+
+def _hash_entry(
+    pack: zipfile.ZipFile, name: str, chunk_size: Optional[int] = None
+) -> Tuple[str, List[str]]:
+    """SHA-256 of a ZIP entry, and of each chunk_size chunk if given.
+
+    The entry is read in blocks (the ZIP CRC is checked as well).
+    """
+    sha256_hash = hashlib.sha256()
+    chunk_hashes = []
+    read_size = chunk_size or _READ_SIZE
+    with pack.open(name) as f:
+        while True:
+            block = f.read(read_size)
+            while chunk_size and block and len(block) < chunk_size:
+                more = f.read(chunk_size - len(block))
+                if not more:
+                    break
+                block += more
+            if not block:
+                break
+            sha256_hash.update(block)
+            if chunk_size:
+                chunk_hashes.append(hashlib.sha256(block).hexdigest())
+    return sha256_hash.hexdigest(), chunk_hashes
+
+
+def _check_chunks(chunks: Dict, actual_hashes: List[str]) -> Dict:
+    """Compare an artifact's recomputed chunk hashes with its manifest "chunks" field."""
+    expected = chunks.get("hashes", [])
+    root_ok = len(expected) == chunks.get("count") and chunk_root(expected) == chunks.get("root")
+    bad = [
+        index
+        for index in range(max(len(expected), len(actual_hashes)))
+        if index >= len(expected)
+        or index >= len(actual_hashes)
+        or expected[index] != actual_hashes[index]
+    ]
+    return {"count": len(actual_hashes), "root": "ok" if root_ok else "invalid", "bad": bad}
+
+
+def verify_chunk(data: bytes, index: int, chunks: Dict) -> bool:
+    """Check one chunk of an artifact against its manifest "chunks" field.
+
+    Meant for range-download clients: the chunk hash list is checked against
+    its Merkle root, then the chunk's SHA-256 against its entry in the list.
+    Callers checking many chunks can verify the root once with chunk_root.
+    """
+    hashes = chunks.get("hashes", [])
+    if not 0 <= index < len(hashes) or chunk_root(hashes) != chunks.get("root"):
+        return False
+    return compute_sha256(data) == hashes[index]
+
+
+def verify_chunks(
+    file_path: Union[Path, str],
+    chunks: Dict,
+    indices: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+) -> List[int]:
+    """Check chunks of an artifact file in parallel; return the indices that fail.
+
+    All chunks are checked unless indices is given, so a verification can
+    be split up or resumed. Raises ValueError if the chunk hash list does
+    not match its Merkle root.
+    """
+    hashes = chunks.get("hashes", [])
+    if not hashes or chunk_root(hashes) != chunks.get("root"):
+        raise ValueError("Chunk hash list does not match its Merkle root")
+    chunk_size = chunks["size"]
+    indices = list(range(len(hashes)) if indices is None else indices)
+
+    def check(index: int) -> bool:
+        with open(file_path, "rb") as f:
+            f.seek(index * chunk_size)
+            return compute_sha256(f.read(chunk_size)) == hashes[index]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4) as pool:
+        results = list(pool.map(check, indices))
+    return [index for index, ok in zip(indices, results) if not ok]
+
+
+def _check_custody(lines: List[str], case_id: str, manifest_hash: str) -> Dict:
+    """Check a pack's custody slice against its manifest.
+
+    Older packs carry the whole custody log; events of other cases are skipped.
+    """
+    problems = []
+    signed_hashes = []
+    previous = ""
+    events = 0
+    for number, line in enumerate(lines, start=1):
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            problems.append(f"line {number}: not JSON")
+            continue
+        if event.get("case_id") != case_id:
+            continue
+        events += 1
+        timestamp = event.get("timestamp", "")
+        if timestamp < previous:
+            problems.append(f"line {number}: out of order")
+        previous = max(previous, timestamp)
+        if event.get("action") == "signed":
+            signed_hashes.append(event.get("metadata", {}).get("manifest_hash"))
+
+    if manifest_hash not in signed_hashes:
+        problems.append("no signed event for this manifest")
+    return {"events": events, "status": "invalid" if problems else "ok", "problems": problems}
+
+
+def verify_pack(
+    pack: Union[Path, str], public_key: Optional[Ed25519PublicKey] = None
+) -> Dict:
+    """Verify one pack and return a report.
+
+    Checks the manifest signature (with public_key if given, otherwise with
+    the pubkey.pem shipped in the pack, which only proves integrity, not
+    origin), recomputes every artifact hash (and chunk hashes, where the
+    manifest records them) from the ZIP with streamed reads, and checks the
+    chain of custody slice. The report's "valid" is True only
+    if everything passed.
+    """
+    report: Dict = {
+        "path": str(pack),
+        "valid": False,
+        "signature": "missing",
+        "key_trusted": None,
+        "artifacts": [],
+        "custody": {"events": 0, "status": "missing", "problems": []},
+        "extra_entries": [],
+        "errors": [],
+    }
+    try:
+        with zipfile.ZipFile(pack) as archive:
+            names = set(archive.namelist())
+            missing = [name for name in _SIGNED_ENTRIES if name not in names]
+            if missing:
+                report["errors"].append(f"missing entries: {', '.join(missing)}")
+                return report
+
+            manifest_bytes = archive.read("manifest.json")
+            embedded_pem = archive.read("pubkey.pem")
+            embedded_key = serialization.load_pem_public_key(embedded_pem)
+            if not isinstance(embedded_key, Ed25519PublicKey):
+                report["errors"].append("pubkey.pem is not an Ed25519 key")
+                return report
+
+            if public_key is not None:
+                report["key_trusted"] = public_key.public_bytes(
+                    serialization.Encoding.Raw, serialization.PublicFormat.Raw
+                ) == embedded_key.public_bytes(
+                    serialization.Encoding.Raw, serialization.PublicFormat.Raw
+                )
+            signer_key = public_key or embedded_key
+            signature_ok = verify_signature(
+                signer_key, archive.read("manifest.sig"), manifest_bytes
+            )
+            report["signature"] = "valid" if signature_ok else "invalid"
+
+            manifest = json.loads(manifest_bytes)
+            manifest_hash = compute_sha256(manifest_bytes)
+            report.update(
+                {
+                    "case_id": manifest.get("case_id"),
+                    "version": manifest.get("version", 1),
+                    "manifest_hash": manifest_hash,
+                }
+            )
+
+            listed = set(_SIGNED_ENTRIES) | {_CUSTODY_ENTRY}
+            for artifact in manifest.get("artifacts", []):
+                name = PurePosixPath(artifact["path"]).name
+                listed.add(name)
+                result = {"name": name, "expected": artifact.get("hash")}
+                if name not in names:
+                    result["status"] = "missing"
+                else:
+                    chunks = artifact.get("chunks")
+                    result["actual"], chunk_hashes = _hash_entry(
+                        archive, name, chunks["size"] if chunks else None
+                    )
+                    matches = result["actual"] == result["expected"]
+                    if chunks:
+                        result["chunks"] = _check_chunks(chunks, chunk_hashes)
+                        matches = (
+                            matches
+                            and result["chunks"]["root"] == "ok"
+                            and not result["chunks"]["bad"]
+                        )
+                    result["status"] = "ok" if matches else "mismatch"
+                report["artifacts"].append(result)
+            report["extra_entries"] = sorted(names - listed)
+
+            if _CUSTODY_ENTRY in names:
+                lines = archive.read(_CUSTODY_ENTRY).decode("utf-8").splitlines()
+                lines = [line for line in lines if line.strip()]
+                report["custody"] = _check_custody(lines, manifest.get("case_id"), manifest_hash)
+    except (OSError, zipfile.BadZipFile, ValueError, KeyError) as e:
+        report["errors"].append(f"{type(e).__name__}: {e}")
+        return report
+
+    report["valid"] = (
+        signature_ok
+        and report["key_trusted"] is not False
+        and all(a["status"] == "ok" for a in report["artifacts"])
+        and report["custody"]["status"] == "ok"
+        and not report["errors"]
+    )
+    return report
+
+
+def verify_directory(
+    directory: Union[Path, str],
+    public_key: Optional[Ed25519PublicKey] = None,
+    workers: Optional[int] = None,
+) -> Dict:
+    """Verify every pack (*.zip) under directory in parallel and summarize."""
+    packs = sorted(Path(directory).rglob("*.zip"))
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4) as pool:
+        reports = list(pool.map(lambda pack: verify_pack(pack, public_key), packs))
+    valid = sum(report["valid"] for report in reports)
+    return {
+        "total": len(reports),
+        "valid": valid,
+        "invalid": len(reports) - valid,
+        "packs": reports,
+    }
+
+
+def load_public_key(path: Union[Path, str]) -> Ed25519PublicKey:
+    """Load a trusted Ed25519 public key from a PEM file."""
+    public_key = serialization.load_pem_public_key(Path(path).read_bytes())
+    if not isinstance(public_key, Ed25519PublicKey):
+        raise ValueError("Public key is not Ed25519")
+    return public_key
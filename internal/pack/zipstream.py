@@ -0,0 +1,225 @@
+"""Minimal streaming ZIP writer for already-encoded entry data.
+
+zipfile compresses entries itself, one at a time. This writer instead takes
+entry data that is already stored or raw-deflated (so it can be compressed
+elsewhere, e.g. in parallel) and writes it to a non-seekable destination:
+sizes and CRCs follow each entry in a data descriptor and are repeated in
+the central directory. Entries get fixed timestamps and permissions, so the
+output depends only on names and contents. ZIP64 records are used for
+entries, offsets or entry counts beyond the classic limits.
+"""
+
+import struct
+import zlib
+from typing import BinaryIO, List, Optional
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DESCRIPTOR = struct.Struct("<IIII")
+_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_END_RECORD64 = struct.Struct("<IQHHIIQQQQ")
+_END_LOCATOR64 = struct.Struct("<IIQI")
+
+_LIMIT = 0xFFFFFFFF
+_COUNT_LIMIT = 0xFFFF
+_FLAG_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+# 1980-01-01 00:00:00 in DOS format
+_DOS_TIME = 0
+_DOS_DATE = (1 << 5) | 1
+_EXTERNAL_ATTR = 0o100644 << 16
+_MADE_BY_UNIX = 3 << 8
+
+
+class _Entry:
+    """Bookkeeping for one written entry."""
+
+    def __init__(self, name: bytes, flags: int, method: int, offset: int, zip64: bool):
+        """Initialize entry."""
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.offset = offset
+        self.zip64 = zip64
+        self.crc = 0
+        self.size = 0
+        self.compressed_size = 0
+
+
+class ZipStreamWriter:
+    """Write a ZIP archive entry by entry to a write-only destination."""
+
+    def __init__(self, destination: BinaryIO):
+        """Initialize writer."""
+        self.destination = destination
+        self.position = 0
+        self.entries: List[_Entry] = []
+        self._current: Optional[_Entry] = None
+        self._closed = False
+
+    def _write(self, data: bytes) -> None:
+        """Write to the destination and track the offset."""
+        self.destination.write(data)
+        self.position += len(data)
+
+    def begin_entry(self, name: str, method: int = ZIP_DEFLATED, size_hint: int = 0) -> None:
+        """Start an entry; size_hint (uncompressed bytes) decides whether it needs ZIP64."""
+        if self._current is not None:
+            raise ValueError("Previous ZIP entry is not finished")
+        if method not in (ZIP_STORED, ZIP_DEFLATED):
+            raise ValueError(f"Unsupported ZIP compression method: {method}")
+
+        try:
+            encoded = name.encode("ascii")
+            flags = _FLAG_DESCRIPTOR
+        except UnicodeEncodeError:
+            encoded = name.encode("utf-8")
+            flags = _FLAG_DESCRIPTOR | _FLAG_UTF8
+        # Same margin as zipfile: deflate may grow incompressible data slightly
+        zip64 = size_hint * 1.05 > _LIMIT
+        entry = _Entry(encoded, flags, method, self.position, zip64)
+
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if zip64 else b""
+        self._write(
+            _LOCAL_HEADER.pack(
+                0x04034B50,
+                45 if zip64 else 20,
+                flags,
+                method,
+                _DOS_TIME,
+                _DOS_DATE,
+                0,
+                0,
+                0,
+                len(encoded),
+                len(extra),
+            )
+            + encoded
+            + extra
+        )
+        self._current = entry
+
+    def write(self, data: bytes, encoded: Optional[bytes] = None) -> None:
+        """Add plaintext data to the current entry.
+
+        encoded is data as stored in the archive (raw deflate for deflated
+        entries); it defaults to data itself, which suits stored entries.
+        Deflated data may also be passed with an empty plaintext, as long as
+        every plaintext byte is passed exactly once.
+        """
+        entry = self._current
+        if entry is None:
+            raise ValueError("No ZIP entry in progress")
+        encoded = data if encoded is None else encoded
+        entry.crc = zlib.crc32(data, entry.crc)
+        entry.size += len(data)
+        entry.compressed_size += len(encoded)
+        if encoded:
+            self._write(encoded)
+
+    def end_entry(self) -> None:
+        """Finish the current entry with its data descriptor."""
+        entry = self._current
+        if entry is None:
+            raise ValueError("No ZIP entry in progress")
+        if not entry.zip64 and max(entry.size, entry.compressed_size) >= _LIMIT:
+            raise ValueError(f"ZIP entry too large for its size hint: {entry.name!r}")
+        descriptor = _DESCRIPTOR64 if entry.zip64 else _DESCRIPTOR
+        self._write(descriptor.pack(0x08074B50, entry.crc, entry.compressed_size, entry.size))
+        self.entries.append(entry)
+        self._current = None
+
+    def write_entry(self, name: str, data: bytes, method: int = ZIP_DEFLATED, level: int = 6):
+        """Write a whole in-memory entry, compressing it if method is ZIP_DEFLATED."""
+        self.begin_entry(name, method, len(data))
+        if method == ZIP_DEFLATED:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            self.write(data, compressor.compress(data) + compressor.flush())
+        else:
+            self.write(data)
+        self.end_entry()
+
+    def close(self) -> None:
+        """Write the central directory; does not close destination."""
+        if self._closed:
+            return
+        if self._current is not None:
+            raise ValueError("Last ZIP entry is not finished")
+
+        start = self.position
+        for entry in self.entries:
+            fields = []
+            size, compressed_size, offset = entry.size, entry.compressed_size, entry.offset
+            if entry.zip64 or size >= _LIMIT:
+                fields.append(size)
+                size = _LIMIT
+            if entry.zip64 or compressed_size >= _LIMIT:
+                fields.append(compressed_size)
+                compressed_size = _LIMIT
+            if offset >= _LIMIT:
+                fields.append(offset)
+                offset = _LIMIT
+            extra = b""
+            if fields:
+                extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields)
+            version = 45 if fields else 20
+            self._write(
+                _CENTRAL_HEADER.pack(
+                    0x02014B50,
+                    _MADE_BY_UNIX | version,
+                    version,
+                    entry.flags,
+                    entry.method,
+                    _DOS_TIME,
+                    _DOS_DATE,
+                    entry.crc,
+                    compressed_size,
+                    size,
+                    len(entry.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    _EXTERNAL_ATTR,
+                    offset,
+                )
+                + entry.name
+                + extra
+            )
+
+        count = len(self.entries)
+        directory_size = self.position - start
+        if count >= _COUNT_LIMIT or start >= _LIMIT or directory_size >= _LIMIT:
+            end64 = self.position
+            self._write(
+                _END_RECORD64.pack(
+                    0x06064B50,
+                    44,
+                    _MADE_BY_UNIX | 45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    directory_size,
+                    start,
+                )
+            )
+            self._write(_END_LOCATOR64.pack(0x07064B50, 0, end64, 1))
+        self._write(
+            _END_RECORD.pack(
+                0x06054B50,
+                0,
+                0,
+                min(count, _COUNT_LIMIT),
+                min(count, _COUNT_LIMIT),
+                min(directory_size, _LIMIT),
+                min(start, _LIMIT),
+                0,
+            )
+        )
+        self._closed = True
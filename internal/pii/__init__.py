@@ -1,9 +1,10 @@
 """PII detection and pseudonymization."""
 
+from .cache import DetectionCache
 from .detector import PIIDetector
 from .pseudonymizer import Pseudonymizer
 
-__all__ = ["PIIDetector", "Pseudonymizer"]
+__all__ = ["DetectionCache", "PIIDetector", "Pseudonymizer"]
 
 
 
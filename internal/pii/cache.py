@@ -0,0 +1,147 @@
+"""Persistent paragraph-level PII detection cache."""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from internal.crypto.hash import compute_sha256
+
+
+class DetectionCache:
+    """SQLite cache of PII detections keyed by paragraph hash and detector version.
+
+    The language a paragraph was analyzed as is part of its key, not of the
+    stored detector version, so invalidate() only drops other versions.
+
+    Spans are stored relative to the start of the paragraph so a cached result
+    can be re-offset into any document that contains the same paragraph.
+
+    Writes track an upper estimate of the entry count instead of counting
+    rows each time; once it passes max_entries the table is counted and the
+    oldest entries are evicted down to max_entries - evict_batch, so a full
+    cache is trimmed once per batch of writes rather than on every write.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = 1_000_000, evict_batch: int = 0):
+        """Initialize detection cache (evict_batch defaults to 1% of max_entries)."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.evict_batch = evict_batch or max(1, max_entries // 100)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[int] = None
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pii_detections (
+                    key TEXT PRIMARY KEY,
+                    detector_version TEXT NOT NULL,
+                    detections TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """
+            )
+            conn.commit()
+
+    @staticmethod
+    def _key(version: str, paragraph: str, language: str = "") -> str:
+        """Cache key for a paragraph analyzed by a given detector version and language."""
+        return compute_sha256(f"{version}\0{language}\0{paragraph}".encode("utf-8"))
+
+    def get_many(
+        self, version: str, paragraphs: List[str], language: str = ""
+    ) -> Dict[str, List[Dict]]:
+        """Return cached detections for the given paragraphs, keyed by paragraph."""
+        keys = {self._key(version, p, language): p for p in set(paragraphs)}
+        found = {}
+        with sqlite3.connect(self.db_path) as conn:
+            key_list = list(keys)
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(key_list), 500):
+                batch = key_list[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    f"SELECT key, detections FROM pii_detections WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, detections in cursor.fetchall():
+                    found[keys[key]] = json.loads(detections)
+
+        self.hits += sum(1 for p in paragraphs if p in found)
+        self.misses += sum(1 for p in paragraphs if p not in found)
+        return found
+
+    def put_many(
+        self, version: str, detections: Dict[str, List[Dict]], language: str = ""
+    ) -> None:
+        """Store detections for analyzed paragraphs."""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (
+                self._key(version, paragraph, language),
+                version,
+                json.dumps(found, sort_keys=True),
+                now,
+            )
+            for paragraph, found in detections.items()
+        ]
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO pii_detections
+                (key, detector_version, detections, created_at)
+                VALUES (?, ?, ?, ?)
+            """,
+                rows,
+            )
+            # Replaced rows are counted too, so this only ever overestimates
+            if self._entries is None:
+                self._entries = conn.execute("SELECT COUNT(*) FROM pii_detections").fetchone()[0]
+            else:
+                self._entries += len(rows)
+            if self._entries > self.max_entries:
+                self._entries = self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Drop the oldest entries past the bound, plus a batch; return the entries left."""
+        count = conn.execute("SELECT COUNT(*) FROM pii_detections").fetchone()[0]
+        if count <= self.max_entries:
+            return count
+        excess = count - self.max_entries + self.evict_batch
+        cursor = conn.execute(
+            """
+            DELETE FROM pii_detections WHERE rowid IN (
+                SELECT rowid FROM pii_detections ORDER BY rowid LIMIT ?
+            )
+        """,
+            (excess,),
+        )
+        return count - cursor.rowcount
+
+    def invalidate(self, keep_version: str) -> int:
+        """Drop entries produced by any other detector version."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM pii_detections WHERE detector_version != ?", (keep_version,)
+            )
+            conn.commit()
+            if self._entries is not None:
+                self._entries -= cursor.rowcount
+            return cursor.rowcount
+
+    def hit_rate(self) -> float:
+        """Fraction of paragraph lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate()}
@@ -1,6 +1,8 @@
 """PII detection using Presidio."""
 
-from typing import Dict, List
+import hashlib
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     from presidio_analyzer import AnalyzerEngine
@@ -10,13 +12,66 @@ try:
 except ImportError:
     PRESIDIO_AVAILABLE = False
 
+from internal.pii.cache import DetectionCache
+from internal.pii.language import (
+    AnalyzerPool,
+    detect_language,
+    is_common_word,
+    is_stopword,
+)
+
+# Bump when detection logic changes in a way that invalidates cached results
+DETECTOR_VERSION = 1
+
+# Paragraph boundaries: one or more blank lines. Detection patterns never span
+# a blank line, so analyzing paragraphs independently preserves recall.
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+
+# Cheap candidate signals for the cascade prefilter; capitalized words are
+# checked separately (see PIIDetector.is_candidate)
+_CANDIDATE_SIGNAL = re.compile(
+    r"\d"  # numbers, dates, phone/card/ID fragments
+    r"|@"  # email addresses, handles
+    r"|://|www\.|\w\.[a-z]{2,}\b"  # URLs and domains
+)
+_WORD = re.compile(r"[^\W\d_]+")
+_SENTENCE_BREAK = re.compile(r"[.!?:;\n]")
+
+
+def split_paragraphs(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) spans of the whitespace-trimmed paragraphs in text."""
+    position = 0
+    boundaries = [(m.start(), m.end()) for m in _PARAGRAPH_BREAK.finditer(text)]
+    boundaries.append((len(text), len(text)))
+    for break_start, break_end in boundaries:
+        segment = text[position:break_start]
+        stripped = segment.strip()
+        if stripped:
+            start = position + (len(segment) - len(segment.lstrip()))
+            yield start, start + len(stripped)
+        position = break_end
+
 
 class PIIDetector:
     """PII detector using Presidio."""
 
-    def __init__(self, languages: List[str] = None):
+    def __init__(
+        self,
+        languages: List[str] = None,
+        cascade: bool = False,
+        name_dictionary: Optional[Iterable[str]] = None,
+        cache: Optional[DetectionCache] = None,
+        max_loaded_languages: int = 2,
+        spacy_models: Optional[Dict[str, str]] = None,
+    ):
         """Initialize PII detector."""
         self.languages = languages or ["en"]
+        self.spacy_models = spacy_models or {}
+        self.cascade = cascade
+        self.name_dictionary = {name.lower() for name in (name_dictionary or [])}
+        self.cascade_stats = {"segments": 0, "escalated": 0}
+        self._fallback_languages = set()
+        primary = None
 
         if not PRESIDIO_AVAILABLE:
             # Fallback: simple regex-based detection
@@ -24,15 +79,65 @@ class PIIDetector:
             self._init_regex_patterns()
         else:
             self._use_presidio = True
+            # Analyzers are loaded lazily per language; the primary language is
+            # loaded up front so a broken Presidio setup still falls back to regex
+            self.analyzer_pool = AnalyzerPool(self._create_analyzer, max_loaded_languages)
             try:
-                # Initialize Presidio analyzer
-                # Use default configuration which doesn't require model downloads
-                self.analyzer = AnalyzerEngine(supported_languages=self.languages)
+                primary = self.analyzer_pool.get(self._analyzer_language(self.languages[0]))
             except Exception as e:
                 # Fallback to regex if Presidio fails (e.g., model download issues)
                 self._use_presidio = False
                 self._init_regex_patterns()
 
+        self.version = self._compute_version(primary)
+        self.cache = cache
+        if self.cache is not None:
+            self.cache.invalidate(keep_version=self.version)
+
+    def _analyzer_language(self, language: str) -> str:
+        """Language whose analyzer handles text in language.
+
+        Presidio's default NLP configuration only covers English, so other
+        languages need a spaCy model in spacy_models; without one their text
+        goes to the English analyzer, whose pattern recognizers still apply.
+        """
+        if language == "en" or language in self.spacy_models:
+            return language
+        if language not in self._fallback_languages:
+            self._fallback_languages.add(language)
+            print(
+                f"Warning: no spaCy model configured for '{language}', "
+                "analyzing it with the English analyzer"
+            )
+        return "en"
+
+    def _create_analyzer(self, language: str):
+        """Create a Presidio analyzer for a single language."""
+        if language not in self.spacy_models:
+            return AnalyzerEngine(supported_languages=[language])
+
+        provider = NlpEngineProvider(
+            nlp_configuration={
+                "nlp_engine_name": "spacy",
+                "models": [{"lang_code": language, "model_name": self.spacy_models[language]}],
+            }
+        )
+        return AnalyzerEngine(nlp_engine=provider.create_engine(), supported_languages=[language])
+
+    def _compute_version(self, analyzer=None) -> str:
+        """Fingerprint the active recognizers so cached detections can be invalidated."""
+        if analyzer is not None:
+            recognizers = sorted(
+                f"{r.name}:{','.join(sorted(r.supported_entities))}"
+                for r in analyzer.registry.recognizers
+            ) + sorted(f"model:{lang}:{model}" for lang, model in self.spacy_models.items())
+        else:
+            recognizers = sorted(f"{name}:{p.pattern}" for name, p in self.patterns.items())
+        description = "\n".join(
+            [f"v{DETECTOR_VERSION}", ",".join(self.languages), *recognizers]
+        )
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()[:16]
+
     def _init_regex_patterns(self):
         """Initialize regex patterns for basic PII detection."""
         import re
@@ -45,10 +150,99 @@ class PIIDetector:
             "CREDIT_CARD": re.compile(r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'),
         }
 
+    def identify_language(self, text: str) -> str:
+        """Pick the configured language that best matches text."""
+        if len(self.languages) == 1:
+            return self.languages[0]
+        return detect_language(text, self.languages)
+
     def detect(self, text: str) -> List[Dict]:
         """Detect PII in text."""
+        language = self.identify_language(text)
+        if not self.cascade and self.cache is None:
+            return self._analyze(text, language)
+
+        # Analyze paragraph by paragraph so the cascade prefilter and the
+        # detection cache can skip unchanged or signal-free segments
+        segments = [(start, text[start:end]) for start, end in split_paragraphs(text)]
+        cached = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(
+                self.version, [segment for _, segment in segments], language
+            )
+
+        detections = []
+        analyzed = {}
+        for start, segment in segments:
+            if segment in cached:
+                segment_detections = cached[segment]
+            elif segment in analyzed:
+                segment_detections = analyzed[segment]
+            else:
+                segment_detections = self._analyze_segment(segment, language)
+                if segment_detections is not None:
+                    analyzed[segment] = segment_detections
+            for detection in segment_detections or []:
+                detections.append(
+                    {
+                        **detection,
+                        "start": detection["start"] + start,
+                        "end": detection["end"] + start,
+                    }
+                )
+
+        if self.cache is not None and analyzed:
+            self.cache.put_many(self.version, analyzed, language)
+        return detections
+
+    def _analyze_segment(self, segment: str, language: str) -> Optional[List[Dict]]:
+        """Analyze one paragraph, or return None if the cascade prefilter skips it."""
+        if self.cascade:
+            self.cascade_stats["segments"] += 1
+            if not self.is_candidate(segment, language):
+                return None
+            self.cascade_stats["escalated"] += 1
+        return self._analyze(segment, language)
+
+    def is_candidate(self, segment: str, language: Optional[str] = None) -> bool:
+        """Check whether a segment has any cheap signal worth full analysis.
+
+        Name signals are a capitalized word inside a sentence (other than a
+        function word), a capitalized word starting a sentence unless it is a
+        common word of the language ("John went home." but not "The report
+        was filed."), and any name dictionary hit.
+        """
+        if _CANDIDATE_SIGNAL.search(segment):
+            return True
+        language = language or self.languages[0]
+        previous_end = None
+        for match in _WORD.finditer(segment):
+            word = match.group()
+            if word.lower() in self.name_dictionary:
+                return True
+            if word[0].isupper():
+                sentence_start = previous_end is None or _SENTENCE_BREAK.search(
+                    segment, previous_end, match.start()
+                )
+                if sentence_start:
+                    if not is_common_word(word, language):
+                        return True
+                elif not is_stopword(word, language):
+                    return True
+            previous_end = match.end()
+        return False
+
+    def escalation_rate(self) -> float:
+        """Fraction of cascade segments escalated to the full analyzer."""
+        segments = self.cascade_stats["segments"]
+        return self.cascade_stats["escalated"] / segments if segments else 0.0
+
+    def _analyze(self, text: str, language: Optional[str] = None) -> List[Dict]:
+        """Run the full analyzer (Presidio or regex fallback) over text."""
         if self._use_presidio:
-            results = self.analyzer.analyze(text=text, language="en")
+            language = self._analyzer_language(language or self.languages[0])
+            analyzer = self.analyzer_pool.get(language)
+            results = analyzer.analyze(text=text, language=language)
             return [
                 {
                     "entity_type": result.entity_type,
@@ -73,8 +267,10 @@ class PIIDetector:
                     )
             return detections
 
+    def language_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-language analyzer load time, memory use and usage counts."""
+        return self.analyzer_pool.stats if self._use_presidio else {}
+
     def has_pii(self, text: str) -> bool:
         """Check if text contains PII."""
         return len(self.detect(text)) > 0
-
-
@@ -0,0 +1,143 @@
+"""Lightweight language identification and a bounded pool of per-language analyzers."""
+
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Most frequent function words per language; enough to separate the languages
+# Presidio/spaCy ship models for without pulling in a language-id dependency
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "in", "that", "it", "for", "with", "was", "on"},
+    "de": {"der", "die", "und", "das", "ist", "nicht", "mit", "den", "von", "ein", "zu", "sich"},
+    "fr": {"le", "la", "les", "et", "des", "est", "une", "dans", "que", "pour", "pas", "du"},
+    "es": {"el", "la", "los", "y", "que", "es", "en", "por", "una", "del", "las", "para"},
+    "it": {"il", "di", "che", "e", "la", "per", "non", "una", "sono", "della", "gli", "con"},
+    "nl": {"de", "het", "en", "een", "van", "is", "niet", "dat", "op", "zijn", "voor", "met"},
+    "pt": {"o", "de", "que", "e", "do", "da", "em", "um", "para", "com", "não", "os"},
+}
+
+# Frequent English words that often start a sentence, including plural nouns
+# common in reported content. A capitalized word at the start of a sentence is
+# only a name signal if it is not one of these; words that double as given
+# names or surnames (will, may, mark, rose, page, ...) are deliberately left out
+_COMMON_WORDS = {
+    "en": set(
+        """
+        a about after again against all almost also although always an another any anyone
+        anything are as at back be because been before being below between both but by call can
+        check come could did do does during each early either even ever every everyone
+        everything few find first following for from further get give go good great had has
+        have he her here him his how however i if in instead into is it its just last later let
+        like many maybe meanwhile more most much my never new next no nobody none nor not
+        nothing now of often on once one only or other others our out over people perhaps
+        please plus questions rather read really recently say see send several she should since
+        so some someone something sometimes soon still such take than thanks that the their
+        them then there therefore these they this those though through thus to today together
+        tomorrow too two under unless until up us use very was we well were what when where
+        whether which while who why with within without would yes yesterday yet you your
+        accounts articles authorities comments critics experts groups images links members
+        messages moderators officials police posts readers replies reports researchers
+        screenshots sources threads users videos
+        """.split()
+    ),
+}
+
+_SCRIPTS = {
+    "he": re.compile(r"[\u0590-\u05ff]"),
+    "ar": re.compile(r"[\u0600-\u06ff]"),
+    "ru": re.compile(r"[\u0400-\u04ff]"),
+}
+_WORD = re.compile(r"[^\W\d_]+")
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def detect_language(text: str, candidates: List[str], sample_chars: int = 4000) -> str:
+    """Return the most likely language of text among the candidate languages.
+
+    Uses script detection for non-Latin alphabets (a script wins when it
+    makes up most of the letters) and stopword frequency for Latin-script
+    languages, looking only at a prefix of the text. Falls back to the first
+    candidate when nothing matches.
+    """
+    sample = text[:sample_chars]
+    letters = len(_LETTER.findall(sample))
+
+    for language, script in _SCRIPTS.items():
+        if language in candidates and 2 * len(script.findall(sample)) > letters:
+            return language
+
+    scores = {language: 0 for language in candidates if language in _STOPWORDS}
+    if scores:
+        for word in _WORD.findall(sample.lower()):
+            for language in scores:
+                if word in _STOPWORDS[language]:
+                    scores[language] += 1
+        best = max(scores, key=lambda language: scores[language])
+        if scores[best] > 0:
+            return best
+
+    return candidates[0]
+
+
+def is_stopword(word: str, language: str) -> bool:
+    """Check whether word (any case) is a common function word of language."""
+    return word.lower() in _STOPWORDS.get(language, ())
+
+
+def is_common_word(word: str, language: str) -> bool:
+    """Check whether word (any case) is a function word or frequent word of language."""
+    return is_stopword(word, language) or word.lower() in _COMMON_WORDS.get(language, ())
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 where unsupported)."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    import resource
+
+    return pages * resource.getpagesize()
+
+
+class AnalyzerPool:
+    """Bounded LRU pool of analyzers, loaded lazily per language."""
+
+    def __init__(self, factory: Callable[[str], Any], max_size: int = 2):
+        """Initialize analyzer pool."""
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self._analyzers: "OrderedDict[str, Any]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.evictions = 0
+
+    def get(self, language: str) -> Any:
+        """Return the analyzer for a language, loading it (and evicting) if needed."""
+        stats = self.stats.setdefault(
+            language, {"loads": 0, "uses": 0, "load_seconds": 0.0, "memory_bytes": 0}
+        )
+        stats["uses"] += 1
+
+        if language in self._analyzers:
+            self._analyzers.move_to_end(language)
+            return self._analyzers[language]
+
+        while len(self._analyzers) >= self.max_size:
+            self._analyzers.popitem(last=False)
+            self.evictions += 1
+
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        analyzer = self.factory(language)
+        stats["load_seconds"] = time.perf_counter() - started
+        stats["memory_bytes"] = max(_rss_bytes() - rss_before, 0)
+        stats["loads"] += 1
+
+        self._analyzers[language] = analyzer
+        return analyzer
+
+    def loaded(self) -> List[str]:
+        """Languages currently held in the pool, least recently used first."""
+        return list(self._analyzers)
@@ -2,20 +2,27 @@
 
 import hashlib
 import hmac
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
 
 
 class Pseudonymizer:
     """Deterministic pseudonymizer using HMAC."""
 
-    def __init__(self, hmac_key: str):
+    def __init__(self, hmac_key: str, memo_size: int = 65536):
         """Initialize pseudonymizer with HMAC key."""
         if not hmac_key:
             raise ValueError("HMAC key is required for deterministic pseudonymization")
         self.hmac_key = hmac_key.encode() if isinstance(hmac_key, str) else hmac_key
+        # Repeated values (same person, same email) are common within and across pages
+        self._memo = lru_cache(maxsize=memo_size)(self._compute_pseudonym)
 
     def pseudonymize(self, text: str, entity_type: Optional[str] = None) -> str:
         """Pseudonymize a value deterministically."""
+        return self._memo(text, entity_type)
+
+    def _compute_pseudonym(self, text: str, entity_type: Optional[str]) -> str:
+        """Compute the HMAC-based pseudonym for a value."""
         # Create HMAC hash
         key = f"{entity_type}:{text}" if entity_type else text
         hmac_hash = hmac.new(
@@ -28,21 +35,51 @@ class Pseudonymizer:
         prefix = entity_type[:3].upper() if entity_type else "VAL"
         return f"[{prefix}_{hmac_hash[:8]}]"
 
-    def pseudonymize_text(self, text: str, detections: list) -> str:
-        """Pseudonymize PII in text based on detections."""
-        # Sort detections by start position (reverse to avoid index shifting)
-        sorted_detections = sorted(detections, key=lambda x: x["start"], reverse=True)
+    def content_fingerprint(self, text: str) -> str:
+        """Keyed fingerprint of content, safe to store next to redacted data."""
+        return hmac.new(self.hmac_key, text.encode("utf-8"), hashlib.sha256).hexdigest()
 
-        result = text
-        for detection in sorted_detections:
-            start = detection["start"]
-            end = detection["end"]
-            original = text[start:end]
-            entity_type = detection.get("entity_type", "UNKNOWN")
-            pseudonym = self.pseudonymize(original, entity_type)
-            result = result[:start] + pseudonym + result[end:]
+    def iter_pseudonymized(
+        self, text: str, detections: list, token_log: Optional[List[Dict]] = None
+    ) -> Iterator[str]:
+        """Yield the pseudonymized text as chunks in a single forward pass.
 
-        return result
+        Overlapping detections are merged into one span covering all of them,
+        so no part of any detection is left in the clear; the span takes the
+        entity type of the detection that starts first (the longest one when
+        several start at the same offset). If token_log is given, every
+        emitted token is appended to it together with its entity type and
+        offsets in the original text.
+        """
+        spans: List[List] = []
+        for detection in sorted(detections, key=lambda x: (x["start"], -x["end"])):
+            if spans and detection["start"] < spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], detection["end"])
+            else:
+                entity_type = detection.get("entity_type", "UNKNOWN")
+                spans.append([detection["start"], detection["end"], entity_type])
 
+        position = 0
+        for start, end, entity_type in spans:
+            if start > position:
+                yield text[position:start]
+            token = self.pseudonymize(text[start:end], entity_type)
+            if token_log is not None:
+                token_log.append(
+                    {"token": token, "entity_type": entity_type, "start": start, "end": end}
+                )
+            yield token
+            position = end
 
+        if position < len(text):
+            yield text[position:]
+
+    def pseudonymize_text(
+        self, text: str, detections: list, token_log: Optional[List[Dict]] = None
+    ) -> str:
+        """Pseudonymize PII in text based on detections."""
+        return "".join(self.iter_pseudonymized(text, detections, token_log))
 
+    def memo_info(self):
+        """Return hit/miss statistics of the pseudonym memo."""
+        return self._memo.cache_info()
@@ -1,20 +1,30 @@
 """Main ingestion pipeline."""
 
 import asyncio
+import json
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
+from internal.classify.batcher import BatchingClassifier
+from internal.classify.cache import CachingClassifier, ClassificationCache
+from internal.classify.chunking import ChunkedClassifier
 from internal.classify.classifier import Classifier
 from internal.config import Config
 from internal.custody.logger import ChainOfCustodyLogger
 from internal.ingest.fetcher import ContentFetcher
-from internal.pack.manifest import Manifest
+from internal.pack.manifest import Manifest, chunk_hashes_field
+from internal.pack.compression import CompressionPolicy
 from internal.pack.packer import PackGenerator
+from internal.pack.serving import PackMetadataCache
+from internal.pii.cache import DetectionCache
 from internal.pii.detector import PIIDetector
 from internal.pii.pseudonymizer import Pseudonymizer
 from internal.store.case_store import CaseStore
+from internal.store.scrubber import IntegrityScrubber
+from internal.store.near_duplicates import NearDuplicateIndex, simhash
 from internal.store.vault import Vault
-from internal.crypto.hash import compute_sha256, hash_file
+from internal.crypto.hash import compute_sha256, hash_many, hash_many_chunks
+from internal.crypto.signing import SigningService
 
 
 class IngestionPipeline:
@@ -24,22 +34,95 @@ class IngestionPipeline:
         """Initialize pipeline."""
         self.config = config
         self.case_store = CaseStore(Path(config.storage.sqlite_path))
-        self.vault = Vault(Path(config.storage.vault_path))
+        self.vault = Vault(
+            Path(config.storage.vault_path),
+            segment_size=config.storage.vault_segment_size,
+            layout=config.storage.vault_layout,
+            max_segment_file_size=config.storage.vault_segment_file_mb * 1024 * 1024,
+            dedup=config.storage.vault_dedup,
+        )
         self.custody_logger = ChainOfCustodyLogger(
             Path(config.storage.base_path) / "chain_of_custody.log"
         )
         self.fetcher = ContentFetcher(timeout=30)
-        self.pii_detector = PIIDetector(languages=config.pii.languages)
-        self.pseudonymizer = Pseudonymizer(config.pii.hmac_key)
-        self.classifier = Classifier(
-            config.classify.ml_endpoint, timeout=config.classify.timeout
+        self.pii_detector = PIIDetector(
+            languages=config.pii.languages,
+            cascade=config.pii.cascade,
+            name_dictionary=config.pii.name_dictionary,
+            cache=DetectionCache(Path(config.pii.cache_path)) if config.pii.cache_path else None,
+            max_loaded_languages=config.pii.max_loaded_languages,
+            spacy_models=config.pii.spacy_models,
         )
+        self.pseudonymizer = Pseudonymizer(config.pii.hmac_key)
+        self.classifier = self._build_classifier()
+        self.signer = SigningService(Path(config.crypto.key_path), config.crypto.key_name)
         self.pack_generator = PackGenerator(
             Path(config.storage.base_path),
             Path(config.crypto.key_path),
             config.crypto.key_name,
+            compression=CompressionPolicy(
+                level=config.pack.compress_level,
+                entropy_threshold=config.pack.store_entropy_threshold,
+                block_size=config.pack.compress_block_kb * 1024,
+            ),
+            workers=config.pack.compress_workers,
+            signer=self.signer,
+        )
+        self.pack_cache = PackMetadataCache(
+            max_entries=config.pack.metadata_cache_entries,
+            ttl_seconds=config.pack.metadata_cache_ttl_seconds,
         )
         self.base_path = Path(config.storage.base_path)
+        self.near_duplicates = (
+            NearDuplicateIndex(
+                self.base_path / "near_duplicates.db",
+                max_distance=config.dedup.max_hamming_distance,
+            )
+            if config.dedup.enabled
+            else None
+        )
+        self.scrubber = (
+            IntegrityScrubber(
+                self.case_store,
+                self.vault,
+                self.custody_logger,
+                mb_per_second=config.scrub.mb_per_second,
+                batch_size=config.scrub.batch_size,
+            )
+            if config.scrub.enabled
+            else None
+        )
+        self._classification_queue: Optional[asyncio.Queue] = None
+        self._classification_workers: List[asyncio.Task] = []
+
+    def _build_classifier(self):
+        """Create the classifier client, with batching, caching and chunking if configured."""
+        classify_config = self.config.classify
+        classifier = Classifier(classify_config.ml_endpoint, timeout=classify_config.timeout)
+        if classify_config.batch_size > 1:
+            classifier = BatchingClassifier(
+                classifier,
+                batch_endpoint=classify_config.batch_endpoint or None,
+                max_batch_size=classify_config.batch_size,
+                max_wait=classify_config.batch_max_wait_ms / 1000,
+            )
+        if classify_config.cache_path:
+            cache = ClassificationCache(
+                Path(classify_config.cache_path),
+                memory_entries=classify_config.cache_memory_entries,
+                ttl_seconds=classify_config.cache_ttl_seconds,
+            )
+            classifier = CachingClassifier(classifier, cache)
+        if classify_config.chunk_max_chars > 0:
+            classifier = ChunkedClassifier(
+                classifier,
+                max_chars=classify_config.chunk_max_chars,
+                overlap=classify_config.chunk_overlap_chars,
+                max_concurrency=classify_config.chunk_concurrency,
+                positive_label=classify_config.chunk_positive_label,
+                positive_threshold=classify_config.chunk_positive_threshold,
+            )
+        return classifier
 
     async def ingest(self, url: str) -> str:
         """Ingest URL and return case_id."""
@@ -62,16 +145,22 @@ class IngestionPipeline:
 
             # Process text
             text_content = content.get("text", "")
-            text_detections = self.pii_detector.detect(text_content)
+            duplicate = self._find_exact_duplicate(case_id, text_content)
+            canonical_redacted = self._reusable_redaction(case_id, duplicate)
+            if canonical_redacted is None:
+                text_detections = self.pii_detector.detect(text_content)
+            else:
+                text_detections = []
             redacted_text = None
 
-            if text_detections:
+            if text_detections or canonical_redacted:
                 pii_detected = True
-                self.custody_logger.log(
-                    case_id,
-                    "pii-detected",
-                    metadata={"count": len(text_detections)},
-                )
+                if text_detections:
+                    self.custody_logger.log(
+                        case_id,
+                        "pii-detected",
+                        metadata={"count": len(text_detections)},
+                    )
 
                 # Store original text in vault
                 original_text_bytes = text_content.encode("utf-8")
@@ -85,10 +174,17 @@ class IngestionPipeline:
                     metadata={"vault_ref": vault_ref, "type": "text"},
                 )
 
-                # Pseudonymize text
-                redacted_text = self.pseudonymizer.pseudonymize_text(
-                    text_content, text_detections
-                )
+                if canonical_redacted:
+                    # Pseudonymization is deterministic, so an exact duplicate's
+                    # redacted text is identical to the canonical case's
+                    redacted_text = canonical_redacted
+                else:
+                    # Pseudonymize text and index tokens for admin re-identification
+                    token_log = []
+                    redacted_text = self.pseudonymizer.pseudonymize_text(
+                        text_content, text_detections, token_log
+                    )
+                    self.vault.index_tokens(vault_ref, token_log, text_content)
                 self.custody_logger.log(case_id, "pseudonymized", metadata={"type": "text"})
 
                 # Save redacted text
@@ -113,6 +209,11 @@ class IngestionPipeline:
                 )
                 self.case_store.add_artifact(case_id, "text", text_path)
 
+            if duplicate is None:
+                # Near duplicates are compared on the text as indexed (redacted), so copies
+                # of a page differ by pseudonym tokens rather than by raw PII values
+                duplicate = self._find_near_duplicate(case_id, redacted_text or text_content)
+
             # Process HTML (always save, may contain PII)
             html_content = content.get("html", "")
             html_detections = self.pii_detector.detect(html_content)
@@ -132,9 +233,11 @@ class IngestionPipeline:
                 )
 
                 # Pseudonymize HTML
+                token_log = []
                 redacted_html = self.pseudonymizer.pseudonymize_text(
-                    html_content, html_detections
+                    html_content, html_detections, token_log
                 )
+                self.vault.index_tokens(vault_ref, token_log, html_content)
                 redacted_html_path = case_dir / "html_redacted.html"
                 redacted_html_path.write_text(redacted_html, encoding="utf-8")
                 artifacts.append(
@@ -184,73 +287,426 @@ class IngestionPipeline:
 
             # Hash artifacts
             self.custody_logger.log(case_id, "hashed", status="in_progress")
-            for artifact in artifacts:
-                artifact_path = self.base_path / artifact["path"]
-                if artifact_path.exists():
-                    hash_value = hash_file(artifact_path)
+            stored = [a for a in artifacts if (self.base_path / a["path"]).exists()]
+            paths = [self.base_path / artifact["path"] for artifact in stored]
+            chunk_size = self.config.pack.chunk_hash_kb * 1024
+            if chunk_size > 0:
+                for artifact, (hash_value, chunk_hashes) in zip(
+                    stored, hash_many_chunks(paths, chunk_size)
+                ):
+                    artifact["hash"] = hash_value
+                    chunks = chunk_hashes_field(chunk_size, chunk_hashes)
+                    if chunks:
+                        artifact["chunks"] = chunks
+            else:
+                for artifact, hash_value in zip(stored, hash_many(paths)):
                     artifact["hash"] = hash_value
             self.custody_logger.log(case_id, "hashed", status="success")
 
             # Classify text
             text_to_classify = redacted_text if redacted_text else text_content
-            self.custody_logger.log(case_id, "classified", status="in_progress")
-            classification = await self.classifier.classify(
-                text_to_classify, metadata={"url": url, "case_id": case_id}
-            )
+            dedup_record = None
+            if duplicate is None:
+                # Index canonical (non-duplicate) cases once their classification is final
+                dedup_record = self._dedup_record(
+                    case_id, text_content, text_to_classify, bool(redacted_text)
+                )
+
+            if (
+                duplicate is not None
+                and self.config.dedup.reuse_classification
+                and duplicate["classification"]
+            ):
+                classification = {
+                    **duplicate["classification"],
+                    "duplicate_of": duplicate["case_id"],
+                }
+                self.custody_logger.log(
+                    case_id,
+                    "classification-reused",
+                    metadata={"duplicate_of": duplicate["case_id"]},
+                )
+                self._finalize(case_id, url, artifacts, pii_detected, classification)
+                return case_id
+
+            if self.config.classify.deferred:
+                # Sign and pack now; classification arrives as a new manifest version
+                manifest_hash = self._finalize(
+                    case_id,
+                    url,
+                    artifacts,
+                    pii_detected,
+                    classification={"classification": "pending"},
+                    status="classification_pending",
+                )
+                self.custody_logger.log(case_id, "classification-deferred")
+                await self._enqueue_classification(
+                    case_id,
+                    url,
+                    artifacts,
+                    pii_detected,
+                    text_to_classify,
+                    manifest_hash,
+                    dedup_record,
+                )
+                return case_id
+
+            classification = await self._classify(case_id, url, text_to_classify)
+            self._finalize(case_id, url, artifacts, pii_detected, classification)
+            self._index_near_duplicate(case_id, dedup_record, classification)
+
+            return case_id
+
+        except Exception as e:
             self.custody_logger.log(
                 case_id,
-                "classified",
-                status="success",
-                metadata={"classification": classification.get("classification")},
+                "ingest-failed",
+                status="error",
+                error=str(e),
             )
+            self.case_store.update_case_status(case_id, "failed")
+            raise
 
-            # Create manifest
-            manifest = Manifest(
-                case_id=case_id,
-                url=url,
-                artifacts=artifacts,
-                classification=classification,
-                pii_detected=pii_detected,
-            )
+    async def ingest_batch(self, urls: List[str], concurrency: int = 4) -> Dict:
+        """Ingest URLs concurrently, then sign one Merkle root over their manifests.
 
-            # Sign manifest
-            manifest_json = manifest.to_json(canonical=True)
-            manifest_hash = compute_sha256(manifest_json.encode("utf-8"))
-            self.custody_logger.log(case_id, "signed", metadata={"manifest_hash": manifest_hash})
+        Every case gets a receipt (root, signature and inclusion proof for its
+        manifest hash); the batch's receipts are written to
+        <base_path>/batches/<merkle_root>.json.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
 
-            # Generate pack
-            artifact_paths = [
-                self.base_path / artifact["path"] for artifact in artifacts
-            ]
-            chain_of_custody_path = Path(self.config.storage.base_path) / "chain_of_custody.log"
-            pack_path = self.pack_generator.create_pack(
-                case_id, manifest, artifact_paths, chain_of_custody_path
-            )
+        async def ingest_one(url: str) -> str:
+            async with semaphore:
+                return await self.ingest(url)
+
+        results = await asyncio.gather(*(ingest_one(url) for url in urls), return_exceptions=True)
+        case_ids = [result for result in results if isinstance(result, str)]
+        summary = {
+            "cases": case_ids,
+            "failed": {
+                url: str(result)
+                for url, result in zip(urls, results)
+                if isinstance(result, Exception)
+            },
+        }
+        if not case_ids:
+            return summary
+
+        manifest_hashes = [self.case_store.get_case(c)["manifest_hash"] for c in case_ids]
+        receipts = self.signer.sign_batch(manifest_hashes)
+        for case_id, receipt in zip(case_ids, receipts):
+            receipt["case_id"] = case_id
             self.custody_logger.log(
                 case_id,
-                "packaged",
-                metadata={"pack_path": str(pack_path)},
+                "batch-signed",
+                metadata={
+                    "merkle_root": receipt["merkle_root"],
+                    "leaf_index": receipt["leaf_index"],
+                    "leaf_count": receipt["leaf_count"],
+                },
+            )
+
+        merkle_root = receipts[0]["merkle_root"]
+        receipts_path = self.base_path / "batches" / f"{merkle_root}.json"
+        receipts_path.parent.mkdir(parents=True, exist_ok=True)
+        receipts_path.write_text(json.dumps(receipts, indent=2), encoding="utf-8")
+        summary.update({"merkle_root": merkle_root, "receipts_path": str(receipts_path)})
+        return summary
+
+    def _find_exact_duplicate(self, case_id: str, text: str) -> Optional[Dict]:
+        """Look up an earlier case with identical text and link to it."""
+        if self.near_duplicates is None or not text:
+            return None
+
+        duplicate = self.near_duplicates.find_exact(self.pseudonymizer.content_fingerprint(text))
+        if duplicate is not None:
+            self._link_duplicate(case_id, duplicate)
+        return duplicate
+
+    def _find_near_duplicate(self, case_id: str, redacted_text: str) -> Optional[Dict]:
+        """Look up an earlier case with near-identical (redacted) text and link to it."""
+        if self.near_duplicates is None or not redacted_text:
+            return None
+
+        duplicate = self.near_duplicates.find(simhash(redacted_text))
+        if duplicate is not None:
+            self._link_duplicate(case_id, duplicate)
+        return duplicate
+
+    def _link_duplicate(self, case_id: str, duplicate: Dict) -> None:
+        """Record that case_id duplicates an earlier case."""
+        self.case_store.set_duplicate_of(case_id, duplicate["case_id"])
+        self.custody_logger.log(
+            case_id,
+            "near-duplicate",
+            metadata={
+                "duplicate_of": duplicate["case_id"],
+                "distance": duplicate["distance"],
+                "exact": duplicate["exact"],
+            },
+        )
+
+    def _reusable_redaction(self, case_id: str, duplicate: Optional[Dict]) -> Optional[str]:
+        """Return the text to reuse instead of scanning an exact duplicate for PII.
+
+        Returns the canonical case's redacted text, an empty string if the
+        canonical text had no PII, or None if the text must be scanned.
+        """
+        if duplicate is None or not duplicate["exact"] or not self.config.dedup.skip_pii:
+            return None
+
+        if duplicate["redacted_path"]:
+            redacted_path = self.base_path / duplicate["redacted_path"]
+            if not redacted_path.exists():
+                return None
+            redacted = redacted_path.read_text(encoding="utf-8")
+        else:
+            redacted = ""
+
+        self.custody_logger.log(
+            case_id, "pii-scan-skipped", metadata={"duplicate_of": duplicate["case_id"]}
+        )
+        return redacted
+
+    def _dedup_record(
+        self, case_id: str, text_content: str, text_to_classify: str, redacted: bool
+    ) -> Optional[Dict]:
+        """Fingerprints under which a canonical case is indexed for near-duplicate lookup."""
+        if self.near_duplicates is None:
+            return None
+        return {
+            "simhash": simhash(text_to_classify),
+            "content_fingerprint": self.pseudonymizer.content_fingerprint(text_content),
+            "redacted_path": f"{case_id}/text_redacted.txt" if redacted else None,
+        }
+
+    def _index_near_duplicate(
+        self, case_id: str, dedup_record: Optional[Dict], classification: Dict
+    ) -> None:
+        """Add a canonical case to the near-duplicate index."""
+        if self.near_duplicates is None or dedup_record is None:
+            return
+        if classification.get("classification") in ("error", "pending") or (
+            "error" in classification
+        ):
+            classification = None
+        self.near_duplicates.add(
+            case_id,
+            dedup_record["simhash"],
+            content_fingerprint=dedup_record["content_fingerprint"],
+            classification=classification,
+            redacted_path=dedup_record["redacted_path"],
+        )
+
+    async def _classify(self, case_id: str, url: str, text: str) -> Dict:
+        """Classify text with custody logging."""
+        self.custody_logger.log(case_id, "classified", status="in_progress")
+        classification = await self.classifier.classify(
+            text, metadata={"url": url, "case_id": case_id}
+        )
+        self.custody_logger.log(
+            case_id,
+            "classified",
+            status="success",
+            metadata={"classification": classification.get("classification")},
+        )
+        return classification
+
+    def _finalize(
+        self,
+        case_id: str,
+        url: str,
+        artifacts: List[Dict],
+        pii_detected: bool,
+        classification: Dict,
+        status: str = "completed",
+        version: int = 1,
+        previous_manifest_hash: Optional[str] = None,
+    ) -> str:
+        """Create, sign and pack a manifest version and update the case."""
+        # Create manifest
+        manifest = Manifest(
+            case_id=case_id,
+            url=url,
+            artifacts=artifacts,
+            classification=classification,
+            pii_detected=pii_detected,
+            version=version,
+            previous_manifest_hash=previous_manifest_hash,
+        )
+
+        # Sign manifest
+        manifest_json = manifest.to_json(canonical=True)
+        manifest_hash = compute_sha256(manifest_json.encode("utf-8"))
+        self.custody_logger.log(
+            case_id, "signed", metadata={"manifest_hash": manifest_hash, "version": version}
+        )
+
+        # Generate pack with the case's custody events so far; their count pins the
+        # slice so the pack can be rebuilt byte for byte
+        custody_events = self.custody_logger.get_events(case_id)
+        pack_path = None
+        pack_stats: Dict = {}
+        if not self.config.pack.on_demand:
+            pack_path = str(
+                self.pack_generator.create_pack(
+                    case_id, manifest, custody_events, version=version, stats=pack_stats
+                )
             )
+        self.custody_logger.log(
+            case_id,
+            "packaged",
+            metadata={"pack_path": pack_path, **pack_stats} if pack_path else {"on_demand": True},
+        )
 
-            # Update case status
-            self.case_store.update_case_status(
-                case_id, "completed", manifest_hash=manifest_hash, pack_path=str(pack_path)
+        # Update case status
+        self.case_store.add_manifest_version(
+            case_id,
+            version,
+            manifest_hash,
+            pack_path,
+            previous_manifest_hash,
+            manifest_json=manifest_json,
+            custody_count=len(custody_events),
+        )
+        # A version packed on demand must not keep serving the previous version's pack
+        self.case_store.update_case_status(
+            case_id, status, manifest_hash=manifest_hash, pack_path=pack_path, clear_pack_path=True
+        )
+        self.pack_cache.invalidate(case_id)
+        return manifest_hash
+
+    def _ensure_classification_workers(self) -> asyncio.Queue:
+        """Create the deferred classification queue and its workers on first use."""
+        if self._classification_queue is None:
+            # Bounded, so ingests wait (backpressure) when the classifier falls behind
+            self._classification_queue = asyncio.Queue(
+                maxsize=max(0, self.config.classify.deferred_queue_size)
             )
+            self._classification_workers = [
+                asyncio.create_task(self._classification_worker())
+                for _ in range(max(1, self.config.classify.deferred_workers))
+            ]
+        return self._classification_queue
 
-            return case_id
+    async def _enqueue_classification(
+        self,
+        case_id: str,
+        url: str,
+        artifacts: List[Dict],
+        pii_detected: bool,
+        text: str,
+        manifest_hash: str,
+        dedup_record: Optional[Dict] = None,
+        version: int = 1,
+    ) -> None:
+        """Queue deferred classification for a case that is already packed.
+
+        Waits while the queue is full.
+        """
+        queue = self._ensure_classification_workers()
+        await queue.put(
+            {
+                "case_id": case_id,
+                "url": url,
+                "artifacts": artifacts,
+                "pii_detected": pii_detected,
+                "text": text,
+                "version": version,
+                "manifest_hash": manifest_hash,
+                "dedup_record": dedup_record,
+            }
+        )
+
+    async def resume_deferred(self) -> int:
+        """Requeue cases left in classification_pending, e.g. by a restart.
+
+        The queue lives in memory only, so pending jobs are rebuilt from each
+        case's latest signed manifest and its stored text. Returns the number
+        of cases requeued.
+        """
+        resumed = 0
+        for case in self.case_store.list_cases(status="classification_pending"):
+            case_id = case["case_id"]
+            record = self.case_store.get_manifest_version(case_id)
+            if not record or not record.get("manifest_json"):
+                continue
+            manifest = json.loads(record["manifest_json"])
+            text_artifact = next(
+                (a for a in manifest["artifacts"] if a["type"] in ("text_redacted", "text")),
+                None,
+            )
+            if text_artifact is None:
+                continue
+            text = (self.base_path / text_artifact["path"]).read_text(encoding="utf-8")
+
+            dedup_record = None
+            if self.near_duplicates is not None and not case.get("duplicate_of"):
+                redacted = text_artifact["type"] == "text_redacted"
+                original = (
+                    self.vault.retrieve(text_artifact["vault_ref"]).decode("utf-8")
+                    if redacted
+                    else text
+                )
+                dedup_record = self._dedup_record(case_id, original, text, redacted)
 
-        except Exception as e:
             self.custody_logger.log(
+                case_id, "classification-resumed", metadata={"version": record["version"]}
+            )
+            await self._enqueue_classification(
                 case_id,
-                "ingest-failed",
-                status="error",
-                error=str(e),
+                manifest["url"],
+                manifest["artifacts"],
+                manifest["pii_detected"],
+                text,
+                record["manifest_hash"],
+                dedup_record,
+                version=record["version"],
             )
-            self.case_store.update_case_status(case_id, "failed")
-            raise
+            resumed += 1
+        return resumed
+
+    async def _classification_worker(self) -> None:
+        """Classify queued cases and re-sign their manifests."""
+        while True:
+            job = await self._classification_queue.get()
+            case_id = job["case_id"]
+            try:
+                classification = await self._classify(case_id, job["url"], job["text"])
+                self._finalize(
+                    case_id,
+                    job["url"],
+                    job["artifacts"],
+                    job["pii_detected"],
+                    classification,
+                    version=job["version"] + 1,
+                    previous_manifest_hash=job["manifest_hash"],
+                )
+                self._index_near_duplicate(case_id, job["dedup_record"], classification)
+            except Exception as e:
+                self.custody_logger.log(
+                    case_id,
+                    "classification-failed",
+                    status="error",
+                    error=str(e),
+                )
+                self.case_store.update_case_status(case_id, "classification_failed")
+            finally:
+                self._classification_queue.task_done()
+
+    async def drain(self) -> None:
+        """Wait until all deferred classifications have been applied."""
+        if self._classification_queue is not None:
+            await self._classification_queue.join()
 
     async def close(self):
         """Close resources."""
+        await self.drain()
+        if self.scrubber is not None:
+            self.scrubber.stop()
+        for worker in self._classification_workers:
+            worker.cancel()
         await self.fetcher.close()
         await self.classifier.close()
 
@@ -0,0 +1,291 @@
+"""Segmented streaming AEAD format for vault blobs.
+
+A blob is a fixed header followed by independently authenticated segments::
+
+    header   = MAGIC | segment_size (u32) | nonce_prefix (7) | key slot
+    key slot = key_id (16) | wrap_nonce (12) | AES-GCM(master, data_key) (48)
+    segment  = AES-256-GCM(data_key, plaintext[i*segment_size : ...]) || tag
+
+Every blob is encrypted under its own random data key, which is stored
+wrapped by a master key from the vault keyring (envelope encryption).
+Segment nonces are nonce_prefix | counter (u32) | last flag (1 byte), and
+the fixed part of the header is bound as associated data, so segments
+cannot be reordered, dropped, truncated or moved between blobs undetected.
+The key slot is authenticated by the wrapping itself and has a fixed size,
+so rotating master keys only rewrites the slot (see rewrap_copy).
+Because every segment has the same size on disk, any plaintext range can be
+decrypted by reading only the segments that cover it.
+
+Blobs written before envelope encryption (MAGIC_V1) derive their key from
+the legacy master key with HKDF and a per-blob salt; they stay readable.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+MAGIC = b"SHMVLT02"
+MAGIC_V1 = b"SHMVLT01"
+NONCE_PREFIX_SIZE = 7
+KEY_ID_SIZE = 16
+WRAP_NONCE_SIZE = 12
+DATA_KEY_SIZE = 32
+TAG_SIZE = 16
+FIXED_HEADER_SIZE = len(MAGIC) + 4 + NONCE_PREFIX_SIZE
+KEY_SLOT_SIZE = KEY_ID_SIZE + WRAP_NONCE_SIZE + DATA_KEY_SIZE + TAG_SIZE
+HEADER_SIZE = FIXED_HEADER_SIZE + KEY_SLOT_SIZE
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+_COPY_SIZE = 1024 * 1024
+
+SALT_SIZE_V1 = 16
+HEADER_SIZE_V1 = len(MAGIC_V1) + 4 + SALT_SIZE_V1 + NONCE_PREFIX_SIZE
+_HKDF_INFO_V1 = b"shomer-vault-aead-v1"
+
+# Looks up a master key by key id; None asks for the legacy (pre-keyring) key
+KeyLookup = Callable[[Optional[str]], bytes]
+
+
+def _nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    """Build the nonce for segment index."""
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+def _wrap_key(key_id: str, master_key: bytes, data_key: bytes, fixed_header: bytes) -> bytes:
+    """Build a key slot holding data_key wrapped by master_key."""
+    encoded_id = key_id.encode("ascii")
+    if len(encoded_id) != KEY_ID_SIZE:
+        raise ValueError(f"Key ids must be {KEY_ID_SIZE} characters: {key_id}")
+    wrap_nonce = os.urandom(WRAP_NONCE_SIZE)
+    wrapped = AESGCM(master_key).encrypt(wrap_nonce, data_key, fixed_header + encoded_id)
+    return encoded_id + wrap_nonce + wrapped
+
+
+def _unwrap_key(keys: KeyLookup, fixed_header: bytes, key_slot: bytes) -> Tuple[str, bytes]:
+    """Recover (key_id, data_key) from a key slot."""
+    encoded_id = key_slot[:KEY_ID_SIZE]
+    wrap_nonce = key_slot[KEY_ID_SIZE : KEY_ID_SIZE + WRAP_NONCE_SIZE]
+    wrapped = key_slot[KEY_ID_SIZE + WRAP_NONCE_SIZE :]
+    key_id = encoded_id.decode("ascii")
+    data_key = AESGCM(keys(key_id)).decrypt(wrap_nonce, wrapped, fixed_header + encoded_id)
+    return key_id, data_key
+
+
+class SegmentedWriter:
+    """Push-style encryption into the segmented format.
+
+    Data passed to write() is buffered until a full segment is known not to
+    be the last one, so at most about two segments are held in memory.
+    close() writes the final segment; it does not close destination.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        master_key: bytes,
+        destination: BinaryIO,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+    ):
+        """Write the header and prepare to encrypt."""
+        if not 0 < segment_size < 2**32:
+            raise ValueError(f"Invalid segment size: {segment_size}")
+
+        self.destination = destination
+        self.segment_size = segment_size
+        self.size = 0
+        self._header = MAGIC + struct.pack(">I", segment_size) + os.urandom(NONCE_PREFIX_SIZE)
+        self._prefix = self._header[-NONCE_PREFIX_SIZE:]
+        data_key = AESGCM.generate_key(bit_length=DATA_KEY_SIZE * 8)
+        self._cipher = AESGCM(data_key)
+        self._buffer = bytearray()
+        self._index = 0
+        self._closed = False
+        destination.write(self._header + _wrap_key(key_id, master_key, data_key, self._header))
+
+    def _emit(self, data: bytes, last: bool) -> None:
+        """Encrypt and write one segment."""
+        nonce = _nonce(self._prefix, self._index, last)
+        self.destination.write(self._cipher.encrypt(nonce, data, self._header))
+        self._index += 1
+
+    def write(self, data: bytes) -> int:
+        """Encrypt data (buffered until segments are complete)."""
+        if self._closed:
+            raise ValueError("write to closed SegmentedWriter")
+        self._buffer += data
+        self.size += len(data)
+        # Keep at least one byte back: the segment holding the end must be flagged last
+        while len(self._buffer) > self.segment_size:
+            self._emit(bytes(self._buffer[: self.segment_size]), last=False)
+            del self._buffer[: self.segment_size]
+        return len(data)
+
+    def flush(self) -> None:
+        """Flush the destination; buffered plaintext stays until segments complete."""
+        if hasattr(self.destination, "flush"):
+            self.destination.flush()
+
+    def close(self) -> None:
+        """Write the final segment."""
+        if not self._closed:
+            self._emit(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+            self._closed = True
+
+
+def encrypt_stream(
+    key_id: str,
+    master_key: bytes,
+    source: BinaryIO,
+    destination: BinaryIO,
+    segment_size: int = DEFAULT_SEGMENT_SIZE,
+) -> int:
+    """Encrypt everything readable from source into destination.
+
+    Memory use is bounded by two segments regardless of the input size.
+    Returns the number of plaintext bytes written.
+    """
+    writer = SegmentedWriter(key_id, master_key, destination, segment_size)
+    while True:
+        chunk = source.read(segment_size)
+        if not chunk:
+            break
+        writer.write(chunk)
+    writer.close()
+    return writer.size
+
+
+def header_key_id(path: Path, offset: int = 0) -> Optional[str]:
+    """Return the master key id in a blob's key slot, or None for legacy blobs."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        header = f.read(HEADER_SIZE)
+    if not header.startswith(MAGIC) or len(header) < HEADER_SIZE:
+        return None
+    return header[FIXED_HEADER_SIZE : FIXED_HEADER_SIZE + KEY_ID_SIZE].decode("ascii")
+
+
+def rewrap_copy(
+    keys: KeyLookup,
+    source: BinaryIO,
+    destination: BinaryIO,
+    key_id: str,
+    master_key: bytes,
+    length: Optional[int] = None,
+) -> None:
+    """Copy a blob with its data key rewrapped under another master key.
+
+    The blob is read from the current position of source (length bytes, or
+    up to the end). Only the key slot changes; the segments are copied as
+    they are, so the copy is written without decrypting them. Legacy blobs
+    have no key slot and must be re-encrypted instead (ValueError).
+    """
+    header = source.read(HEADER_SIZE)
+    if not header.startswith(MAGIC) or len(header) < HEADER_SIZE:
+        raise ValueError("Only envelope-encrypted blobs can be rewrapped")
+    fixed_header = header[:FIXED_HEADER_SIZE]
+    _, data_key = _unwrap_key(keys, fixed_header, header[FIXED_HEADER_SIZE:])
+    destination.write(fixed_header + _wrap_key(key_id, master_key, data_key, fixed_header))
+
+    remaining = None if length is None else length - HEADER_SIZE
+    while remaining is None or remaining > 0:
+        chunk = source.read(_COPY_SIZE if remaining is None else min(remaining, _COPY_SIZE))
+        if not chunk:
+            if remaining:
+                raise IOError("Blob ended before its recorded length")
+            break
+        destination.write(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+class SegmentedReader:
+    """Random-access decryption of a segmented blob.
+
+    The blob may occupy a whole file or a region of a larger one; blobs are
+    position independent, so they can be copied between files as raw bytes.
+    """
+
+    def __init__(self, keys: KeyLookup, path: Path, offset: int = 0, length: int = None):
+        """Open a segmented blob stored at [offset, offset + length) of path."""
+        self.path = Path(path)
+        self.offset = offset
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            header = f.read(HEADER_SIZE)
+
+        if header.startswith(MAGIC) and len(header) == HEADER_SIZE:
+            self.header = header[:FIXED_HEADER_SIZE]
+            self.header_size = HEADER_SIZE
+            self.key_id, data_key = _unwrap_key(keys, self.header, header[FIXED_HEADER_SIZE:])
+        elif header.startswith(MAGIC_V1) and len(header) >= HEADER_SIZE_V1:
+            self.header = header[:HEADER_SIZE_V1]
+            self.header_size = HEADER_SIZE_V1
+            self.key_id = None
+            salt = self.header[len(MAGIC_V1) + 4 : len(MAGIC_V1) + 4 + SALT_SIZE_V1]
+            data_key = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=salt, info=_HKDF_INFO_V1
+            ).derive(keys(None))
+        else:
+            raise ValueError(f"Not a segmented vault blob: {self.path}")
+
+        (self.segment_size,) = struct.unpack(">I", self.header[len(MAGIC) : len(MAGIC) + 4])
+        self._prefix = self.header[-NONCE_PREFIX_SIZE:]
+        self._cipher = AESGCM(data_key)
+
+        stored = self.segment_size + TAG_SIZE
+        if length is None:
+            length = self.path.stat().st_size - offset
+        body = length - self.header_size
+        if body < TAG_SIZE:
+            raise ValueError(f"Truncated vault blob: {self.path}")
+        self.segment_count = -(-body // stored)
+        self.size = body - self.segment_count * TAG_SIZE
+
+    def _segment_bounds(self, index: int) -> Tuple[int, int]:
+        """Return (file offset, stored length) of segment index."""
+        stored = self.segment_size + TAG_SIZE
+        offset = self.offset + self.header_size + index * stored
+        if index == self.segment_count - 1:
+            return offset, self.size - index * self.segment_size + TAG_SIZE
+        return offset, stored
+
+    def decrypt_segment(self, index: int) -> bytes:
+        """Read and authenticate one segment; safe to call from several threads."""
+        with open(self.path, "rb") as f:
+            return self._decrypt_segment(f, index)
+
+    def _decrypt_segment(self, f: BinaryIO, index: int) -> bytes:
+        """Read and authenticate one segment."""
+        offset, length = self._segment_bounds(index)
+        f.seek(offset)
+        data = f.read(length)
+        last = index == self.segment_count - 1
+        return self._cipher.decrypt(_nonce(self._prefix, index, last), data, self.header)
+
+    def iter_segments(self, start: int = 0, end: int = None) -> Iterator[bytes]:
+        """Yield decrypted plaintext covering [start, end) segment by segment."""
+        end = self.size if end is None else min(end, self.size)
+        start = max(start, 0)
+        if start >= end:
+            # Still authenticate the final segment so empty reads detect truncation
+            if self.size == 0:
+                with open(self.path, "rb") as f:
+                    self._decrypt_segment(f, 0)
+            return
+
+        first = start // self.segment_size
+        last = (end - 1) // self.segment_size
+        with open(self.path, "rb") as f:
+            for index in range(first, last + 1):
+                plaintext = self._decrypt_segment(f, index)
+                base = index * self.segment_size
+                yield plaintext[max(start - base, 0) : end - base]
+
+    def read_range(self, start: int = 0, end: int = None) -> bytes:
+        """Decrypt and return plaintext bytes [start, end)."""
+        return b"".join(self.iter_segments(start, end))
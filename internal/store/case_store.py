@@ -7,7 +7,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from uuid import uuid4
 
-from internal.crypto.hash import compute_sha256
+from internal.crypto.hash import compute_sha256, hash_file
 
 
 class CaseStore:
@@ -54,6 +54,28 @@ class CaseStore:
                 ON artifacts(case_id)
             """
             )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cases)")}
+            if "duplicate_of" not in columns:
+                conn.execute("ALTER TABLE cases ADD COLUMN duplicate_of TEXT")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS manifests (
+                    case_id TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    manifest_hash TEXT NOT NULL,
+                    previous_manifest_hash TEXT,
+                    pack_path TEXT,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (case_id, version),
+                    FOREIGN KEY (case_id) REFERENCES cases(case_id)
+                )
+            """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(manifests)")}
+            if "manifest_json" not in columns:
+                conn.execute("ALTER TABLE manifests ADD COLUMN manifest_json TEXT")
+            if "custody_count" not in columns:
+                conn.execute("ALTER TABLE manifests ADD COLUMN custody_count INTEGER")
             conn.commit()
 
     def create_case(self, url: str) -> str:
@@ -85,10 +107,59 @@ class CaseStore:
                 return dict(row)
         return None
 
+    def list_cases(
+        self,
+        status: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        url_contains: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """List cases matching all given filters, oldest first.
+
+        created_after and created_before are ISO 8601 timestamps (inclusive
+        and exclusive bounds).
+        """
+        conditions = []
+        params: List = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if created_after:
+            conditions.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            conditions.append("created_at < ?")
+            params.append(created_before)
+        if url_contains:
+            conditions.append("instr(url, ?) > 0")
+            params.append(url_contains)
+
+        query = "SELECT * FROM cases"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at, case_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
     def update_case_status(
-        self, case_id: str, status: str, manifest_hash: Optional[str] = None, pack_path: Optional[str] = None
+        self,
+        case_id: str,
+        status: str,
+        manifest_hash: Optional[str] = None,
+        pack_path: Optional[str] = None,
+        clear_pack_path: bool = False,
     ) -> None:
-        """Update case status."""
+        """Update case status.
+
+        With clear_pack_path, a missing pack_path clears the stored one (the
+        new manifest version is packed on demand).
+        """
         updates = ["status = ?"]
         params = [status]
 
@@ -96,7 +167,7 @@ class CaseStore:
             updates.append("manifest_hash = ?")
             params.append(manifest_hash)
 
-        if pack_path:
+        if pack_path or clear_pack_path:
             updates.append("pack_path = ?")
             params.append(pack_path)
 
@@ -109,6 +180,15 @@ class CaseStore:
             )
             conn.commit()
 
+    def set_duplicate_of(self, case_id: str, canonical_case_id: str) -> None:
+        """Link a case to the canonical case it near-duplicates."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE cases SET duplicate_of = ? WHERE case_id = ?",
+                (canonical_case_id, case_id),
+            )
+            conn.commit()
+
     def add_artifact(
         self,
         case_id: str,
@@ -122,9 +202,9 @@ class CaseStore:
         now = datetime.now(timezone.utc).isoformat()
 
         if content is None:
-            content = path.read_bytes()
-
-        artifact_hash = compute_sha256(content)
+            artifact_hash = hash_file(path)
+        else:
+            artifact_hash = compute_sha256(content)
 
         with sqlite3.connect(self.db_path) as conn:
             conn.execute(
@@ -157,3 +237,68 @@ class CaseStore:
             )
             return [dict(row) for row in cursor.fetchall()]
 
+
+    def add_manifest_version(
+        self,
+        case_id: str,
+        version: int,
+        manifest_hash: str,
+        pack_path: Optional[str] = None,
+        previous_manifest_hash: Optional[str] = None,
+        manifest_json: Optional[str] = None,
+        custody_count: Optional[int] = None,
+    ) -> None:
+        """Record a signed manifest version for a case.
+
+        manifest_json and custody_count (the number of the case's custody
+        events packed with it) are enough to rebuild the pack byte for byte.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO manifests
+                (case_id, version, manifest_hash, previous_manifest_hash, pack_path, created_at,
+                 manifest_json, custody_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    case_id,
+                    version,
+                    manifest_hash,
+                    previous_manifest_hash,
+                    pack_path,
+                    now,
+                    manifest_json,
+                    custody_count,
+                ),
+            )
+            conn.commit()
+
+    def get_manifest_versions(self, case_id: str) -> List[Dict]:
+        """Get all manifest versions for a case, oldest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                "SELECT * FROM manifests WHERE case_id = ? ORDER BY version",
+                (case_id,),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_manifest_version(self, case_id: str, version: Optional[int] = None) -> Optional[Dict]:
+        """Get one manifest version of a case (the latest by default)."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            if version is None:
+                cursor = conn.execute(
+                    "SELECT * FROM manifests WHERE case_id = ? ORDER BY version DESC LIMIT 1",
+                    (case_id,),
+                )
+            else:
+                cursor = conn.execute(
+                    "SELECT * FROM manifests WHERE case_id = ? AND version = ?",
+                    (case_id, version),
+                )
+            row = cursor.fetchone()
+            return dict(row) if row else None
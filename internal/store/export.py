@@ -0,0 +1,222 @@
+"""Passphrase-encrypted bulk export of vault originals."""
+
+import json
+import os
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from internal.custody.logger import ChainOfCustodyLogger
+from internal.store.aead import SegmentedReader, SegmentedWriter
+from internal.store.vault import Vault
+
+# Export file = EXPORT_MAGIC | scrypt salt | log2(n), r, p | segmented blob of a ZIP
+EXPORT_MAGIC = b"SHMEXP01"
+EXPORT_KEY_ID = "export-scrypt-v1"
+SCRYPT_SALT_SIZE = 16
+SCRYPT_LOG2_N = 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+EXPORT_HEADER_SIZE = len(EXPORT_MAGIC) + SCRYPT_SALT_SIZE + 3
+
+_EXTENSIONS = {"text": ".txt", "html": ".html", "image": ".img"}
+
+
+def derive_export_key(passphrase: str, salt: bytes, log2_n: int, r: int, p: int) -> bytes:
+    """Derive the archive key from a passphrase with scrypt."""
+    return Scrypt(salt=salt, length=32, n=2**log2_n, r=r, p=p).derive(passphrase.encode("utf-8"))
+
+
+def decrypt_export(path: Path, passphrase: str, destination: BinaryIO) -> int:
+    """Decrypt an export file, writing the inner ZIP to destination.
+
+    Returns the number of bytes written. Raises ValueError if the passphrase
+    is wrong or the file is not an intact export.
+    """
+    with open(path, "rb") as f:
+        header = f.read(EXPORT_HEADER_SIZE)
+    if len(header) != EXPORT_HEADER_SIZE or not header.startswith(EXPORT_MAGIC):
+        raise ValueError(f"Not a vault export: {path}")
+
+    salt = header[len(EXPORT_MAGIC) : len(EXPORT_MAGIC) + SCRYPT_SALT_SIZE]
+    log2_n, r, p = header[-3:]
+    key = derive_export_key(passphrase, salt, log2_n, r, p)
+
+    def keys(key_id: Optional[str]) -> bytes:
+        if key_id != EXPORT_KEY_ID:
+            raise ValueError(f"Unexpected export key id: {key_id}")
+        return key
+
+    written = 0
+    try:
+        reader = SegmentedReader(keys, path, offset=EXPORT_HEADER_SIZE)
+        for chunk in reader.iter_segments():
+            destination.write(chunk)
+            written += len(chunk)
+    except InvalidTag:
+        raise ValueError("Wrong passphrase or corrupted export") from None
+    return written
+
+
+class _QueueWriter:
+    """File-like writer handing chunks to a consumer thread through a queue."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        """Initialize queue writer."""
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def write(self, data: bytes) -> int:
+        """Queue data, blocking while the consumer is behind."""
+        while True:
+            if self.cancelled.is_set():
+                raise IOError("Export cancelled by the consumer")
+            try:
+                self.chunks.put(bytes(data), timeout=0.5)
+                return len(data)
+            except queue.Full:
+                continue
+
+    def flush(self) -> None:
+        """Nothing to flush."""
+
+
+class VaultExporter:
+    """Stream decrypted vault originals of cases into an encrypted archive.
+
+    The archive is a ZIP with one folder per case (originals plus a
+    vault_objects.json listing their metadata) and a top-level export.json,
+    encrypted as it is written under a key derived from a passphrase with
+    scrypt. Blobs are never held in memory whole: their segments are
+    decrypted a few at a time on a thread pool and written straight into the
+    archive. Every exported object is logged to chain of custody.
+    """
+
+    def __init__(
+        self,
+        vault: Vault,
+        custody_logger: ChainOfCustodyLogger,
+        workers: Optional[int] = None,
+        window: int = 8,
+    ):
+        """Initialize vault exporter."""
+        self.vault = vault
+        self.custody_logger = custody_logger
+        self.workers = workers or os.cpu_count() or 4
+        self.window = window
+
+    def write_archive(
+        self,
+        case_ids: List[str],
+        passphrase: str,
+        destination: BinaryIO,
+        actor: str = "admin",
+    ) -> Dict:
+        """Write the encrypted archive for case_ids to destination; return a summary."""
+        if not passphrase:
+            raise ValueError("An export passphrase is required")
+
+        salt = os.urandom(SCRYPT_SALT_SIZE)
+        key = derive_export_key(passphrase, salt, SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P)
+        destination.write(EXPORT_MAGIC + salt + bytes([SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P]))
+        writer = SegmentedWriter(EXPORT_KEY_ID, key, destination)
+
+        summary = {
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "actor": actor,
+            "cases": {},
+        }
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, zipfile.ZipFile(
+            writer, "w"
+        ) as archive:
+            for case_id in dict.fromkeys(case_ids):
+                entries = self.vault.find(case_id=case_id)
+                for entry in entries:
+                    self._write_object(archive, pool, case_id, entry, actor)
+                archive.writestr(
+                    f"{case_id}/vault_objects.json",
+                    json.dumps(entries, indent=2, sort_keys=True),
+                )
+                summary["cases"][case_id] = len(entries)
+            archive.writestr("export.json", json.dumps(summary, indent=2, sort_keys=True))
+        writer.close()
+        return summary
+
+    def _write_object(
+        self,
+        archive: zipfile.ZipFile,
+        pool: ThreadPoolExecutor,
+        case_id: str,
+        entry: Dict,
+        actor: str,
+    ) -> None:
+        """Stream one decrypted vault object into the archive."""
+        vault_ref = entry["vault_ref"]
+        info = zipfile.ZipInfo(
+            f"{case_id}/{vault_ref}{_EXTENSIONS.get(entry['type'], '.bin')}",
+            date_time=datetime.now(timezone.utc).timetuple()[:6],
+        )
+        # Images are already compressed; text and HTML shrink well
+        info.compress_type = (
+            zipfile.ZIP_STORED if entry["type"] == "image" else zipfile.ZIP_DEFLATED
+        )
+
+        with archive.open(info, "w", force_zip64=True) as f:
+            for chunk in self.vault.iter_parallel(vault_ref, pool, self.window):
+                f.write(chunk)
+
+        self.custody_logger.log(
+            case_id,
+            "vault-exported",
+            actor=actor,
+            metadata={"vault_ref": vault_ref, "type": entry["type"], "size": entry["size"]},
+        )
+
+    def iter_archive(
+        self,
+        case_ids: List[str],
+        passphrase: str,
+        actor: str = "admin",
+        queue_size: int = 16,
+    ) -> Iterator[bytes]:
+        """Yield the encrypted archive in chunks, producing it on a background thread.
+
+        Closing the iterator early (e.g. a dropped HTTP client) stops the
+        producer at its next write.
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=queue_size)
+        cancelled = threading.Event()
+        done = object()
+
+        def produce() -> None:
+            try:
+                self.write_archive(case_ids, passphrase, _QueueWriter(chunks, cancelled), actor)
+                item = done
+            except BaseException as e:
+                item = e
+            while not cancelled.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        producer = threading.Thread(target=produce, name="vault-export", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
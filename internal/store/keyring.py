@@ -0,0 +1,110 @@
+"""Master key ring for vault envelope encryption."""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+
+def key_id_for(key: bytes) -> str:
+    """Derive the 16-character id of a master key."""
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+class Keyring:
+    """Master keys by key id, one of which is active for new blobs.
+
+    The ring is a JSON file next to the legacy vault key. It is seeded with
+    the legacy key, which remains the key for blobs written before envelope
+    encryption until they are re-encrypted by a rotation. The file is
+    re-read when it changes, so a rotation started from the CLI is picked up
+    by a running server.
+    """
+
+    def __init__(self, path: Path, legacy_key: bytes):
+        """Load the keyring, creating it from the legacy key if missing."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime = None
+        if self.path.exists():
+            self._load()
+        else:
+            self.legacy_id = key_id_for(legacy_key)
+            self.keys = {self.legacy_id: legacy_key}
+            self.active_id = self.legacy_id
+            self._save()
+
+    def _load(self) -> None:
+        """Read the keyring file."""
+        self._mtime = self.path.stat().st_mtime_ns
+        data = json.loads(self.path.read_text())
+        self.keys: Dict[str, bytes] = {
+            key_id: base64.b64decode(key) for key_id, key in data["keys"].items()
+        }
+        self.active_id: str = data["active"]
+        self.legacy_id: Optional[str] = data.get("legacy")
+
+    def _refresh(self) -> None:
+        """Reload the keyring if another process changed it."""
+        if self.path.stat().st_mtime_ns != self._mtime:
+            with self._lock:
+                self._load()
+
+    def _save(self) -> None:
+        """Atomically write the keyring with owner-only permissions."""
+        data = {
+            "active": self.active_id,
+            "legacy": self.legacy_id,
+            "keys": {key_id: base64.b64encode(key).decode() for key_id, key in self.keys.items()},
+        }
+        partial = self.path.with_name(self.path.name + ".partial")
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(partial, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def active(self) -> Tuple[str, bytes]:
+        """Return (key_id, key) of the master key new blobs are wrapped with."""
+        self._refresh()
+        key_id = self.active_id
+        return key_id, self.keys[key_id]
+
+    def get(self, key_id: Optional[str]) -> bytes:
+        """Return a master key by id; None returns the legacy key."""
+        self._refresh()
+        key_id = self.legacy_id if key_id is None else key_id
+        if key_id not in self.keys:
+            raise KeyError(f"Vault master key not in keyring: {key_id}")
+        return self.keys[key_id]
+
+    def generate(self) -> str:
+        """Add a new random master key, make it active and return its id."""
+        self._refresh()
+        with self._lock:
+            key = AESGCM.generate_key(bit_length=256)
+            key_id = key_id_for(key)
+            self.keys[key_id] = key
+            self.active_id = key_id
+            self._save()
+        return key_id
+
+    def retire(self, key_id: str) -> None:
+        """Remove a master key that no blob is wrapped with any more."""
+        self._refresh()
+        with self._lock:
+            if key_id == self.active_id:
+                raise ValueError("Cannot retire the active vault master key")
+            self.keys.pop(key_id, None)
+            if key_id == self.legacy_id:
+                self.legacy_id = None
+            self._save()
+
+    def key_ids(self) -> List[str]:
+        """Return all key ids in the ring."""
+        return list(self.keys)
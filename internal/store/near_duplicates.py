@@ -0,0 +1,208 @@
+"""Near-duplicate detection index (SimHash + LSH banding in SQLite)."""
+
+import hashlib
+import json
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_TOKEN = re.compile(r"\w+")
+_BITS = 64
+_BANDS = 4
+_BAND_BITS = _BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """Compute a 64-bit SimHash over word shingles of text."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < shingle_size:
+        shingles = Counter([" ".join(tokens)])
+    else:
+        shingles = Counter(
+            " ".join(tokens[i : i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)
+        )
+
+    weights = [0] * _BITS
+    for shingle, count in shingles.items():
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit value onto SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    """Inverse of _to_signed."""
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """Index of case text fingerprints used to find near-duplicate pages.
+
+    Fingerprints are split into four 16-bit bands; any two fingerprints within
+    three bits of each other share at least one band, so candidate lookup is
+    an indexed query per band rather than a scan.
+    """
+
+    def __init__(self, db_path: Path, max_distance: int = 3):
+        """Initialize near-duplicate index."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    case_id TEXT PRIMARY KEY,
+                    simhash INTEGER NOT NULL,
+                    content_fingerprint TEXT,
+                    classification TEXT,
+                    redacted_path TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprint_bands (
+                    band INTEGER NOT NULL,
+                    value INTEGER NOT NULL,
+                    case_id TEXT NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_content
+                ON fingerprints(content_fingerprint)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_fingerprint_bands
+                ON fingerprint_bands(band, value)
+            """
+            )
+            conn.commit()
+
+    def add(
+        self,
+        case_id: str,
+        fingerprint: int,
+        content_fingerprint: Optional[str] = None,
+        classification: Optional[Dict] = None,
+        redacted_path: Optional[str] = None,
+    ) -> None:
+        """Add a case to the index."""
+        now = datetime.now(timezone.utc).isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO fingerprints
+                (case_id, simhash, content_fingerprint, classification, redacted_path, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    case_id,
+                    _to_signed(fingerprint),
+                    content_fingerprint,
+                    json.dumps(classification, sort_keys=True) if classification else None,
+                    redacted_path,
+                    now,
+                ),
+            )
+            conn.execute("DELETE FROM fingerprint_bands WHERE case_id = ?", (case_id,))
+            conn.executemany(
+                "INSERT INTO fingerprint_bands (band, value, case_id) VALUES (?, ?, ?)",
+                [
+                    (band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK, case_id)
+                    for band in range(_BANDS)
+                ],
+            )
+            conn.commit()
+
+    def find_exact(self, content_fingerprint: str) -> Optional[Dict]:
+        """Return the oldest indexed case with the same content_fingerprint, if any."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                """
+                SELECT * FROM fingerprints WHERE content_fingerprint = ?
+                ORDER BY created_at LIMIT 1
+            """,
+                (content_fingerprint,),
+            ).fetchone()
+        if row is None:
+            return None
+        match = dict(row)
+        match["simhash"] = _to_unsigned(match["simhash"])
+        match["distance"] = 0
+        match["exact"] = True
+        if match["classification"]:
+            match["classification"] = json.loads(match["classification"])
+        return match
+
+    def find(self, fingerprint: int, content_fingerprint: Optional[str] = None) -> Optional[Dict]:
+        """Return the closest indexed case within max_distance, if any.
+
+        A case with the same content_fingerprint (an exact duplicate) always
+        wins. The result carries "exact" and "distance" alongside the stored
+        fields; the oldest case is preferred among equally close ones.
+        """
+        if content_fingerprint:
+            exact = self.find_exact(content_fingerprint)
+            if exact is not None:
+                exact["distance"] = hamming_distance(fingerprint, exact["simhash"])
+                return exact
+
+        conditions = " OR ".join("(b.band = ? AND b.value = ?)" for _ in range(_BANDS))
+        params: List = []
+        for band in range(_BANDS):
+            params.extend([band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK])
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"""
+                SELECT DISTINCT f.* FROM fingerprint_bands b
+                JOIN fingerprints f ON f.case_id = b.case_id
+                WHERE {conditions}
+            """,
+                params,
+            ).fetchall()
+
+        best = None
+        for row in rows:
+            candidate = dict(row)
+            candidate["simhash"] = _to_unsigned(candidate["simhash"])
+            candidate["distance"] = hamming_distance(fingerprint, candidate["simhash"])
+            candidate["exact"] = False
+            if candidate["distance"] > self.max_distance:
+                continue
+            rank = (candidate["distance"], candidate["created_at"])
+            if best is None or rank < (best["distance"], best["created_at"]):
+                best = candidate
+
+        if best and best["classification"]:
+            best["classification"] = json.loads(best["classification"])
+        return best
@@ -0,0 +1,124 @@
+"""Resumable vault master key rotation."""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional
+
+from internal.store.vault import Vault
+
+# Progress rows are committed in batches so an interrupted run loses little
+_COMMIT_EVERY = 100
+
+
+class KeyRotation:
+    """Move every vault blob onto the active master key.
+
+    Blobs are processed by a thread pool and each finished blob is recorded
+    in the rotation_progress table of the vault index, keyed by target key
+    id, so an interrupted run resumes where it stopped. The vault stays
+    usable throughout: rewrapped copies are swapped in atomically and new
+    blobs are already written under the active key.
+    """
+
+    def __init__(self, vault: Vault, workers: int = 4):
+        """Initialize rotation job."""
+        self.vault = vault
+        self.workers = max(1, workers)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize the progress table."""
+        with sqlite3.connect(self.vault.index_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rotation_progress (
+                    key_id TEXT NOT NULL,
+                    blob_ref TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    PRIMARY KEY (key_id, blob_ref)
+                )
+            """
+            )
+            conn.commit()
+
+    def run(
+        self,
+        key_id: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict:
+        """Rotate all blobs not yet done for key_id (the active key by default).
+
+        progress(done, total) is called after each blob. Blobs that fail are
+        counted and left unrecorded, so the next run retries them.
+        """
+        key_id = key_id or self.vault.keyring.active()[0]
+        with sqlite3.connect(self.vault.index_path) as conn:
+            done = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT blob_ref FROM rotation_progress WHERE key_id = ?", (key_id,)
+                )
+            }
+        pending = [ref for ref in dict.fromkeys(self.vault.blob_refs()) if ref not in done]
+
+        result = {
+            "key_id": key_id,
+            "total": len(done) + len(pending),
+            "skipped": len(done),
+            "rewrapped": 0,
+            "reencrypted": 0,
+            "current": 0,
+            "missing": 0,
+            "failed": 0,
+        }
+        completed = len(done)
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, sqlite3.connect(
+            self.vault.index_path
+        ) as conn:
+            futures = {pool.submit(self.vault.rotate_blob, ref, key_id): ref for ref in pending}
+            for future in as_completed(futures):
+                try:
+                    status = future.result()
+                except FileNotFoundError:
+                    # Deleted while the rotation was running
+                    status = "missing"
+                except Exception:
+                    result["failed"] += 1
+                    status = None
+
+                if status is not None:
+                    result[status] += 1
+                    rows.append((key_id, futures[future], status))
+                completed += 1
+                if len(rows) >= _COMMIT_EVERY:
+                    self._record(conn, rows)
+                    rows = []
+                if progress:
+                    progress(completed, result["total"])
+            self._record(conn, rows)
+        return result
+
+    @staticmethod
+    def _record(conn: sqlite3.Connection, rows) -> None:
+        """Persist finished blobs."""
+        conn.executemany(
+            "INSERT OR REPLACE INTO rotation_progress (key_id, blob_ref, status) VALUES (?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+    def status(self, key_id: Optional[str] = None) -> Dict:
+        """Return per-status counts of finished blobs for key_id."""
+        key_id = key_id or self.vault.keyring.active()[0]
+        with sqlite3.connect(self.vault.index_path) as conn:
+            counts = dict(
+                conn.execute(
+                    """
+                    SELECT status, COUNT(*) FROM rotation_progress
+                    WHERE key_id = ? GROUP BY status
+                """,
+                    (key_id,),
+                ).fetchall()
+            )
+        return {"key_id": key_id, **counts}
@@ -0,0 +1,319 @@
+"""Background integrity scrubbing of stored artifacts and vault blobs."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
+
+from internal.custody.logger import ChainOfCustodyLogger
+from internal.store.case_store import CaseStore
+from internal.store.vault import Vault
+
+SCRUB_KINDS = ("artifact", "vault")
+_READ_SIZE = 1024 * 1024
+
+
+class _Throttle:
+    """Keep the average read rate under a byte budget by sleeping."""
+
+    def __init__(self, bytes_per_second: float, stop: Optional[threading.Event] = None):
+        """Initialize throttle (0 disables it)."""
+        self.bytes_per_second = bytes_per_second
+        self.stop = stop
+        self._started = time.monotonic()
+        self._consumed = 0
+
+    def consume(self, size: int) -> None:
+        """Account for size bytes read, sleeping if ahead of the budget."""
+        self._consumed += size
+        if self.bytes_per_second <= 0:
+            return
+        delay = self._consumed / self.bytes_per_second - (time.monotonic() - self._started)
+        if delay > 0:
+            if self.stop is not None:
+                self.stop.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+class IntegrityScrubber:
+    """Re-hash stored artifacts and re-authenticate vault blobs.
+
+    Artifacts are checked against the hash recorded in the artifacts table;
+    vault blobs are decrypted in full (checking every AEAD tag) and their
+    keyed content hash is compared with the vault metadata index. Reads are
+    throttled to an I/O budget. A cursor per kind is kept in the case
+    database, so a scrub pass stops and resumes anywhere; when a pass
+    reaches the end it starts over. The latest result per item is recorded,
+    and a custody event is logged whenever an item turns bad.
+    """
+
+    def __init__(
+        self,
+        case_store: CaseStore,
+        vault: Vault,
+        custody_logger: ChainOfCustodyLogger,
+        mb_per_second: float = 20,
+        batch_size: int = 100,
+    ):
+        """Initialize integrity scrubber."""
+        self.case_store = case_store
+        self.vault = vault
+        self.custody_logger = custody_logger
+        self.db_path = case_store.db_path
+        self.bytes_per_second = mb_per_second * 1024 * 1024
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize cursor and result tables."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrub_state (
+                    kind TEXT PRIMARY KEY,
+                    cursor TEXT NOT NULL,
+                    passes INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrub_results (
+                    kind TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    case_id TEXT,
+                    status TEXT NOT NULL,
+                    detail TEXT,
+                    checked_at TEXT NOT NULL,
+                    PRIMARY KEY (kind, item)
+                )
+            """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scrub_results_status ON scrub_results(status)"
+            )
+            conn.commit()
+
+    def _cursor(self, conn: sqlite3.Connection, kind: str) -> Tuple[str, int]:
+        """Return (cursor, completed passes) for kind."""
+        row = conn.execute(
+            "SELECT cursor, passes FROM scrub_state WHERE kind = ?", (kind,)
+        ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def _items(self, kind: str, cursor: str) -> List[Dict]:
+        """Return the next batch of items after cursor."""
+        if kind == "vault":
+            return [
+                {
+                    "item": entry["vault_ref"],
+                    "case_id": entry["case_id"],
+                    "expected": entry["content_hash"],
+                }
+                for entry in self.vault.metadata_index.after(cursor, self.batch_size)
+            ]
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT artifact_id, case_id, path, hash FROM artifacts
+                WHERE artifact_id > ? ORDER BY artifact_id LIMIT ?
+            """,
+                (cursor, self.batch_size),
+            ).fetchall()
+        return [
+            {"item": artifact_id, "case_id": case_id, "path": path, "expected": expected}
+            for artifact_id, case_id, path, expected in rows
+        ]
+
+    def _check(self, kind: str, item: Dict, throttle: _Throttle) -> Tuple[str, Optional[str]]:
+        """Return (status, detail) for one item: ok, mismatch, corrupt or missing."""
+        try:
+            if kind == "vault":
+                actual = self.vault.rehash(item["item"], on_read=throttle.consume)
+                if item["expected"] and actual != item["expected"]:
+                    return "mismatch", "keyed content hash differs from the metadata index"
+                return "ok", None
+
+            sha256_hash = hashlib.sha256()
+            with open(Path(item["path"]), "rb") as f:
+                for block in iter(lambda: f.read(_READ_SIZE), b""):
+                    sha256_hash.update(block)
+                    throttle.consume(len(block))
+            actual = sha256_hash.hexdigest()
+            if actual != item["expected"]:
+                return "mismatch", f"sha256 {actual}, expected {item['expected']}"
+            return "ok", None
+        except FileNotFoundError:
+            return "missing", None
+        except (InvalidTag, InvalidToken, ValueError) as e:
+            return "corrupt", f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+    def _iter_kind(self, kind: str) -> Iterator[Dict]:
+        """Iterate over items from the stored cursor to the end of the pass."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor, _ = self._cursor(conn, kind)
+        while True:
+            items = self._items(kind, cursor)
+            if not items:
+                return
+            for item in items:
+                yield item
+            cursor = items[-1]["item"]
+
+    def run(
+        self,
+        kinds: Tuple[str, ...] = SCRUB_KINDS,
+        max_items: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        stop: Optional[threading.Event] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Dict:
+        """Scrub from the stored cursors until the pass ends or a limit is hit.
+
+        Returns per-status counts. Cursors are saved after every item, so the
+        next run continues where this one stopped.
+        """
+        started = time.monotonic()
+        throttle = _Throttle(self.bytes_per_second, stop)
+        result = {"checked": 0, "ok": 0, "mismatch": 0, "corrupt": 0, "missing": 0, "passes": 0}
+
+        def exhausted() -> bool:
+            return (
+                (max_items is not None and result["checked"] >= max_items)
+                or (max_seconds is not None and time.monotonic() - started >= max_seconds)
+                or (stop is not None and stop.is_set())
+            )
+
+        with sqlite3.connect(self.db_path) as conn:
+            for kind in kinds:
+                if kind not in SCRUB_KINDS:
+                    raise ValueError(f"Unknown scrub kind: {kind}")
+                finished = True
+                for item in self._iter_kind(kind):
+                    if exhausted():
+                        finished = False
+                        break
+                    status, detail = self._check(kind, item, throttle)
+                    self._record(conn, kind, item, status, detail)
+                    result["checked"] += 1
+                    result[status] += 1
+                    if progress:
+                        progress(kind, result["checked"])
+                if finished and not exhausted():
+                    # Reached the end: the next run starts a new pass
+                    _, passes = self._cursor(conn, kind)
+                    self._save_cursor(conn, kind, "", passes + 1)
+                    result["passes"] += 1
+                if exhausted():
+                    break
+        return result
+
+    def _save_cursor(self, conn: sqlite3.Connection, kind: str, cursor: str, passes: int) -> None:
+        """Persist a kind's cursor."""
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO scrub_state (kind, cursor, passes, updated_at)
+            VALUES (?, ?, ?, ?)
+        """,
+            (kind, cursor, passes, datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+
+    def _record(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        item: Dict,
+        status: str,
+        detail: Optional[str],
+    ) -> None:
+        """Store an item's result, advance the cursor and log newly found damage."""
+        previous = conn.execute(
+            "SELECT status FROM scrub_results WHERE kind = ? AND item = ?", (kind, item["item"])
+        ).fetchone()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO scrub_results
+            (kind, item, case_id, status, detail, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            (
+                kind,
+                item["item"],
+                item["case_id"],
+                status,
+                detail,
+                datetime.now(timezone.utc).isoformat(),
+            ),
+        )
+        _, passes = self._cursor(conn, kind)
+        self._save_cursor(conn, kind, item["item"], passes)
+
+        if status != "ok" and (previous is None or previous[0] != status):
+            metadata = {"kind": kind, "result": status}
+            metadata["vault_ref" if kind == "vault" else "artifact_id"] = item["item"]
+            self.custody_logger.log(
+                item["case_id"] or "vault",
+                "integrity-check",
+                status="error",
+                actor="scrubber",
+                metadata=metadata,
+                error=detail,
+            )
+
+    def start(self, interval_seconds: float = 86400) -> None:
+        """Scrub continuously on a daemon thread, pausing between passes."""
+
+        def loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.run(stop=self._stop)
+                except Exception as e:
+                    print(f"Warning: integrity scrub failed: {e}")
+                self._stop.wait(interval_seconds)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="integrity-scrubber", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5) -> None:
+        """Stop the background thread at its next item."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def failures(self) -> List[Dict]:
+        """Return the items whose latest check did not pass."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM scrub_results WHERE status != 'ok' ORDER BY kind, item"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def status(self) -> Dict:
+        """Return cursors, completed passes and per-status result counts."""
+        with sqlite3.connect(self.db_path) as conn:
+            state = {
+                kind: {"cursor": cursor, "passes": passes, "updated_at": updated_at}
+                for kind, cursor, passes, updated_at in conn.execute(
+                    "SELECT kind, cursor, passes, updated_at FROM scrub_state"
+                )
+            }
+            counts: Dict[str, Dict[str, int]] = {}
+            for kind, status, count in conn.execute(
+                "SELECT kind, status, COUNT(*) FROM scrub_results GROUP BY kind, status"
+            ):
+                counts.setdefault(kind, {})[status] = count
+        return {"state": state, "results": counts}
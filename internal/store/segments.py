@@ -0,0 +1,288 @@
+"""Log-structured segment files for the vault."""
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+_SEGMENT_NAME = re.compile(r"^(\d{6})\.seg$")
+_COPY_BUFFER = 1024 * 1024
+# Records up to this size are staged in memory before being appended
+_SPOOL_MEMORY = 8 * 1024 * 1024
+_LOCK_NAME = ".lock"
+
+
+class SegmentLog:
+    """Append-only segment files with a SQLite index of the records inside.
+
+    Each record is written once to the end of the active segment file and
+    indexed as (segment_id, offset, length); the active file is rolled over
+    once it reaches max_file_size. Deleting a record only removes its index
+    row, and compaction later rewrites sealed segments that are mostly
+    garbage, copying their live records into the active segment.
+
+    Several processes (API workers, the CLI) may share a vault: appends,
+    rollover, deletes, rewrites and compaction hold an exclusive
+    flock on the segment directory's lock file as well as a thread lock.
+    New records are produced (encrypted) before the lock is taken, so the
+    lock only covers copying their bytes and updating the index.
+    """
+
+    def __init__(self, directory: Path, index_path: Path, max_file_size: int = 256 * 1024 * 1024):
+        """Initialize segment log."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = Path(index_path)
+        self.max_file_size = max_file_size
+        self._lock = threading.Lock()
+        self._init_index()
+
+        segment_ids = [
+            int(match.group(1))
+            for match in map(_SEGMENT_NAME.match, os.listdir(self.directory))
+            if match
+        ]
+        self.active_id = max(segment_ids, default=1)
+
+    def _init_index(self) -> None:
+        """Initialize the record index table."""
+        with sqlite3.connect(self.index_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS segment_records (
+                    vault_ref TEXT PRIMARY KEY,
+                    segment_id INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_segment_records_segment
+                ON segment_records(segment_id)
+            """
+            )
+            conn.commit()
+
+    def segment_path(self, segment_id: int) -> Path:
+        """Path of a segment file."""
+        return self.directory / f"{segment_id:06d}.seg"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the thread lock and an exclusive lock shared with other processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.directory / _LOCK_NAME, "ab") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _refresh_active(self) -> None:
+        """Catch up with segments rolled over by other processes."""
+        while self.segment_path(self.active_id + 1).exists():
+            self.active_id += 1
+
+    def _append(self, write: Callable[[BinaryIO], None]) -> Tuple[int, int, int]:
+        """Append one record via write(file); return (segment_id, offset, length).
+
+        Must be called with the lock held (see _locked), so that no other
+        process appends between reading the offset and writing. A failed
+        write is truncated away so the segment never keeps a partial record.
+        """
+        self._refresh_active()
+        path = self.segment_path(self.active_id)
+        if path.exists() and path.stat().st_size >= self.max_file_size:
+            self.active_id += 1
+            path = self.segment_path(self.active_id)
+
+        with open(path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            try:
+                write(f)
+                f.flush()
+            except BaseException:
+                f.truncate(offset)
+                raise
+            return self.active_id, offset, f.tell() - offset
+
+    def append(self, vault_ref: str, write: Callable[[BinaryIO], None]) -> None:
+        """Append a record written by write(file) and index it under vault_ref.
+
+        write runs without the lock held, into a spooled temporary buffer
+        (spilling to the segment directory for large records). An existing
+        record for vault_ref is superseded and becomes garbage.
+        """
+        with tempfile.SpooledTemporaryFile(_SPOOL_MEMORY, dir=self.directory) as spool:
+            write(spool)
+            size = spool.seek(0, os.SEEK_END)
+            spool.seek(0)
+            with self._locked():
+                segment_id, offset, length = self._append(lambda f: _copy(spool, f, size))
+                with sqlite3.connect(self.index_path) as conn:
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO segment_records
+                        (vault_ref, segment_id, offset, length)
+                        VALUES (?, ?, ?, ?)
+                    """,
+                        (vault_ref, segment_id, offset, length),
+                    )
+                    conn.commit()
+
+    def locate(self, vault_ref: str) -> Optional[Tuple[Path, int, int]]:
+        """Return (segment path, offset, length) of a record, or None."""
+        with sqlite3.connect(self.index_path) as conn:
+            row = conn.execute(
+                "SELECT segment_id, offset, length FROM segment_records WHERE vault_ref = ?",
+                (vault_ref,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self.segment_path(row[0]), row[1], row[2]
+
+    def rewrite(
+        self, vault_ref: str, write: Callable[[BinaryIO, int, BinaryIO], None]
+    ) -> None:
+        """Append a new version of a record derived from its current bytes.
+
+        write(source, length, destination) gets the record's file positioned
+        at its start. The index is then repointed to the copy in one update;
+        the old bytes are left untouched for readers that located them
+        already, and become garbage.
+        """
+        with self._locked():
+            location = self.locate(vault_ref)
+            if location is None:
+                raise FileNotFoundError(f"Vault reference not found: {vault_ref}")
+            path, offset, length = location
+            with open(path, "rb") as source:
+                source.seek(offset)
+                segment_id, new_offset, new_length = self._append(
+                    lambda f: write(source, length, f)
+                )
+            with sqlite3.connect(self.index_path) as conn:
+                conn.execute(
+                    """
+                    UPDATE segment_records SET segment_id = ?, offset = ?, length = ?
+                    WHERE vault_ref = ?
+                """,
+                    (segment_id, new_offset, new_length, vault_ref),
+                )
+                conn.commit()
+
+    def refs(self) -> Iterator[str]:
+        """Iterate over all indexed record references."""
+        with sqlite3.connect(self.index_path) as conn:
+            rows = conn.execute("SELECT vault_ref FROM segment_records").fetchall()
+        for (vault_ref,) in rows:
+            yield vault_ref
+
+    def delete(self, vault_ref: str) -> bool:
+        """Drop a record from the index; its bytes are reclaimed by compaction."""
+        with self._locked(), sqlite3.connect(self.index_path) as conn:
+            cursor = conn.execute("DELETE FROM segment_records WHERE vault_ref = ?", (vault_ref,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def garbage_stats(self) -> List[Dict]:
+        """Return size, live bytes and garbage ratio for each segment file."""
+        with sqlite3.connect(self.index_path) as conn:
+            live = dict(
+                conn.execute(
+                    "SELECT segment_id, SUM(length) FROM segment_records GROUP BY segment_id"
+                ).fetchall()
+            )
+
+        stats = []
+        for name in sorted(os.listdir(self.directory)):
+            match = _SEGMENT_NAME.match(name)
+            if not match:
+                continue
+            segment_id = int(match.group(1))
+            size = (self.directory / name).stat().st_size
+            live_bytes = live.get(segment_id, 0)
+            stats.append(
+                {
+                    "segment_id": segment_id,
+                    "size": size,
+                    "live_bytes": live_bytes,
+                    "garbage_ratio": 1 - live_bytes / size if size else 0.0,
+                }
+            )
+        return stats
+
+    def compact(self, min_garbage_ratio: float = 0.5) -> Dict:
+        """Rewrite sealed segments whose garbage ratio is at least min_garbage_ratio.
+
+        Live records are copied byte for byte into the active segment, the
+        index is repointed in one transaction, and only then is the old file
+        removed, so a crash at any point leaves every record readable.
+        """
+        result = {"segments_compacted": 0, "records_moved": 0, "bytes_reclaimed": 0}
+        with self._locked():
+            self._refresh_active()
+            candidates = [
+                s
+                for s in self.garbage_stats()
+                if s["segment_id"] != self.active_id and s["garbage_ratio"] >= min_garbage_ratio
+            ]
+            for segment in candidates:
+                segment_id = segment["segment_id"]
+                source_path = self.segment_path(segment_id)
+                with sqlite3.connect(self.index_path) as conn:
+                    records = conn.execute(
+                        """
+                        SELECT vault_ref, offset, length FROM segment_records
+                        WHERE segment_id = ? ORDER BY offset
+                    """,
+                        (segment_id,),
+                    ).fetchall()
+
+                moves = []
+                with open(source_path, "rb") as source:
+                    for vault_ref, offset, length in records:
+                        source.seek(offset)
+                        location = self._append(lambda f: _copy(source, f, length))
+                        moves.append((*location, vault_ref))
+
+                with sqlite3.connect(self.index_path) as conn:
+                    conn.executemany(
+                        """
+                        UPDATE segment_records SET segment_id = ?, offset = ?, length = ?
+                        WHERE vault_ref = ?
+                    """,
+                        moves,
+                    )
+                    conn.commit()
+                source_path.unlink()
+
+                result["segments_compacted"] += 1
+                result["records_moved"] += len(moves)
+                result["bytes_reclaimed"] += segment["size"] - segment["live_bytes"]
+        return result
+
+
+def _copy(source: BinaryIO, destination: BinaryIO, length: int) -> None:
+    """Copy length bytes from the current position of source."""
+    remaining = length
+    while remaining:
+        chunk = source.read(min(remaining, _COPY_BUFFER))
+        if not chunk:
+            raise IOError("Segment file ended inside a record")
+        destination.write(chunk)
+        remaining -= len(chunk)
@@ -1,21 +1,116 @@
 """Encrypted vault for PII and images."""
 
+import base64
+import hashlib
+import hmac
+import io
 import json
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import Executor, Future
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
-from cryptography.fernet import Fernet
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from internal.store.aead import (
+    DEFAULT_SEGMENT_SIZE,
+    SegmentedReader,
+    encrypt_stream,
+    header_key_id,
+    rewrap_copy,
+)
+from internal.store.keyring import Keyring
+from internal.store.segments import SegmentLog
+from internal.store.vault_dedup import VaultDedupIndex
+from internal.store.vault_metadata import VaultMetadataIndex
+
+VAULT_LAYOUTS = ("files", "segments")
+
+
+class _HashingReader:
+    """Binary stream wrapper that hashes and counts everything read through it."""
+
+    def __init__(self, source: BinaryIO, digest):
+        """Wrap source, feeding read bytes into digest."""
+        self.source = source
+        self.digest = digest
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Read from the wrapped stream."""
+        data = self.source.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+
+class _ChunkStream:
+    """Readable binary stream over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        """Wrap a chunk iterator."""
+        self._chunks = chunks
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes (everything if size is negative)."""
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
 
 
 class Vault:
-    """Encrypted vault for storing sensitive content."""
+    """Encrypted vault for storing sensitive content.
+
+    New blobs are written as raw binary in the segmented AEAD format
+    (``<ref>.aead``, see internal.store.aead), which encrypts from a stream
+    and supports range reads. Each blob has its own data key wrapped by the
+    active master key of the vault keyring, so rotate_blob only rewrites a
+    small header. Legacy Fernet blobs (``<ref>.enc``) remain readable.
+
+    With the "segments" layout, blobs are appended to large segment files
+    indexed in index.db instead of one file per reference. Reads work for
+    every layout regardless of the one in use. Object metadata (case, type,
+    source URL, size, keyed content hash) lives in the vault_objects table of
+    index.db, see VaultMetadataIndex.
 
-    def __init__(self, vault_path: Path, key_path: Optional[Path] = None):
+    With dedup enabled, identical plaintexts are stored once and every
+    reference is an alias counted in VaultDedupIndex; the ciphertext is
+    removed when the last reference is deleted.
+    """
+
+    def __init__(
+        self,
+        vault_path: Path,
+        key_path: Optional[Path] = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        layout: str = "files",
+        max_segment_file_size: int = 256 * 1024 * 1024,
+        dedup: bool = False,
+    ):
         """Initialize vault."""
+        if layout not in VAULT_LAYOUTS:
+            raise ValueError(f"Unknown vault layout: {layout}")
         self.vault_path = Path(vault_path)
         self.vault_path.mkdir(parents=True, exist_ok=True)
         self.key_path = key_path or self.vault_path / ".vault_key"
+        self.segment_size = segment_size
+        self.layout = layout
+        self.dedup = dedup
 
         # Use Fernet encryption for prototype
         # In production, this would use LUKS or proper age encryption
@@ -26,39 +121,541 @@ class Vault:
             key = self.key_path.read_bytes()
 
         self._cipher = Fernet(key)
+        self._master_key = base64.urlsafe_b64decode(key)
+        self.keyring = Keyring(self.key_path.parent / ".vault_keyring", self._master_key)
+        # Content hashes stay tied to the original key so they survive rotation
+        self._hash_key = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=b"shomer-vault-content-hash-v1"
+        ).derive(self._master_key)
+        self.index_path = self.vault_path / "index.db"
+        self._init_index()
+        self.segments = SegmentLog(
+            self.vault_path / "segments", self.index_path, max_segment_file_size
+        )
+        self.metadata_index = VaultMetadataIndex(self.index_path)
+        self.dedup_index = VaultDedupIndex(self.index_path)
+        self._migrate_meta_files()
+        self._migrate_segment_metadata()
+
+    def _init_index(self) -> None:
+        """Initialize the vault index database."""
+        with sqlite3.connect(self.index_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS token_index (
+                    token TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    ref_hash TEXT
+                )
+            """
+            )
+
+            # Older indexes kept the vault_ref only inside the encrypted payload
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(token_index)")}
+            if "ref_hash" not in columns:
+                conn.execute("ALTER TABLE token_index ADD COLUMN ref_hash TEXT")
+                rows = conn.execute("SELECT rowid, payload FROM token_index").fetchall()
+                conn.executemany(
+                    "UPDATE token_index SET ref_hash = ? WHERE rowid = ?",
+                    [
+                        (self._ref_hash(json.loads(self._cipher.decrypt(payload))["vault_ref"]), r)
+                        for r, payload in rows
+                    ],
+                )
+
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_token_index_token
+                ON token_index(token)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_token_index_ref_hash
+                ON token_index(ref_hash)
+            """
+            )
+            conn.commit()
+
+    def _ref_hash(self, vault_ref: str) -> str:
+        """Keyed hash of a vault reference, stored in the clear next to its tokens."""
+        message = f"ref\0{vault_ref}".encode("utf-8")
+        return hmac.new(self._hash_key, message, hashlib.sha256).hexdigest()
 
     def store(self, content: bytes, metadata: Optional[dict] = None) -> str:
         """Store content in vault and return vault reference."""
-        vault_ref = str(uuid4())
-        vault_file = self.vault_path / f"{vault_ref}.enc"
+        if self.dedup:
+            vault_ref = str(uuid4())
+            content_hash = self.content_hash(content)
+            blob_ref = self.dedup_index.acquire(content_hash, vault_ref)
+            if blob_ref:
+                # Identical content is already stored; skip encrypting it again
+                path, offset, length = self._locate_blob(blob_ref)
+                self.metadata_index.add(
+                    vault_ref,
+                    metadata,
+                    size=len(content),
+                    content_hash=content_hash,
+                    key_id=self._key_id_of(path, offset, length),
+                )
+                return vault_ref
+        return self.store_stream(io.BytesIO(content), metadata)
 
-        # Encrypt content
-        encrypted = self._cipher.encrypt(content)
-        vault_file.write_bytes(encrypted)
+    def store_stream(self, source: BinaryIO, metadata: Optional[dict] = None) -> str:
+        """Encrypt a readable binary stream into the vault and return its reference.
 
-        # Store metadata if provided
-        if metadata:
-            meta_file = self.vault_path / f"{vault_ref}.meta"
-            meta_file.write_text(json.dumps(metadata, indent=2))
+        With dedup, a stream's fingerprint is only known once it has been
+        encrypted, so duplicates save disk space but not encryption work.
+        """
+        vault_ref = str(uuid4())
+        blob_ref = str(uuid4()) if self.dedup else vault_ref
+        size, content_hash, key_id = self._write_blob(blob_ref, source)
+        if self.dedup:
+            stored_ref = self.dedup_index.register(content_hash, blob_ref, size, vault_ref)
+            if stored_ref != blob_ref:
+                self._remove_blob(blob_ref)
 
+        self.metadata_index.add(
+            vault_ref,
+            metadata,
+            size=size,
+            content_hash=content_hash,
+            key_id=key_id,
+        )
         return vault_ref
 
+    def _write_blob(
+        self, blob_ref: str, source: BinaryIO, layout: Optional[str] = None
+    ) -> Tuple[int, str, str]:
+        """Encrypt source under blob_ref, replacing any existing copy.
+
+        Returns (plaintext size, keyed content hash, master key id).
+        """
+        key_id, master_key = self.keyring.active()
+        reader = _HashingReader(source, hmac.new(self._hash_key, digestmod=hashlib.sha256))
+        if (layout or self.layout) == "segments":
+            self.segments.append(
+                blob_ref,
+                lambda f: encrypt_stream(key_id, master_key, reader, f, self.segment_size),
+            )
+        else:
+            vault_file = self.vault_path / f"{blob_ref}.aead"
+            partial_file = self.vault_path / f"{blob_ref}.aead.partial"
+
+            # Encrypt segment by segment; only complete blobs get their final name
+            try:
+                with open(partial_file, "wb") as f:
+                    encrypt_stream(key_id, master_key, reader, f, self.segment_size)
+                os.replace(partial_file, vault_file)
+            finally:
+                partial_file.unlink(missing_ok=True)
+        return reader.size, reader.digest.hexdigest(), key_id
+
+    def _remove_blob(self, blob_ref: str) -> bool:
+        """Remove stored ciphertext; segment records are reclaimed by compact()."""
+        if self.segments.delete(blob_ref):
+            return True
+
+        removed = False
+        for suffix in (".aead", ".enc"):
+            vault_file = self.vault_path / f"{blob_ref}{suffix}"
+            if vault_file.exists():
+                vault_file.unlink()
+                removed = True
+        return removed
+
+    def content_hash(self, content: bytes) -> str:
+        """Keyed hash of plaintext, as recorded in the metadata index."""
+        return hmac.new(self._hash_key, content, hashlib.sha256).hexdigest()
+
+    def _locate(self, vault_ref: str) -> Tuple[Path, int, Optional[int]]:
+        """Locate a reference's blob as (file, offset, length) in any vault layout."""
+        return self._locate_blob(self.dedup_index.resolve(vault_ref))
+
+    def _locate_blob(self, blob_ref: str) -> Tuple[Path, int, Optional[int]]:
+        """Locate stored ciphertext by the name it is stored under."""
+        location = self.segments.locate(blob_ref)
+        if location is not None:
+            return location
+        for suffix in (".aead", ".enc"):
+            vault_file = self.vault_path / f"{blob_ref}{suffix}"
+            if vault_file.exists():
+                return vault_file, 0, None
+        raise FileNotFoundError(f"Vault reference not found: {blob_ref}")
+
+    def _key_id_of(self, path: Path, offset: int, length: Optional[int]) -> Optional[str]:
+        """Return the master key id a stored blob is wrapped with."""
+        if path.suffix == ".enc":
+            return self.keyring.legacy_id
+        return SegmentedReader(self.keyring.get, path, offset, length).key_id or (
+            self.keyring.legacy_id
+        )
+
     def retrieve(self, vault_ref: str) -> bytes:
         """Retrieve content from vault."""
-        vault_file = self.vault_path / f"{vault_ref}.enc"
+        return self.retrieve_range(vault_ref)
+
+    def retrieve_range(self, vault_ref: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Retrieve bytes [start, end) of a vaulted blob.
+
+        For segmented blobs only the segments covering the range are read and
+        decrypted; legacy blobs are decrypted in full.
+        """
+        return b"".join(self.open_stream(vault_ref, start, end))
+
+    def open_stream(
+        self, vault_ref: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Iterate over decrypted chunks of bytes [start, end) of a vaulted blob."""
+        return self._open_located(*self._locate(vault_ref), start, end)
+
+    def _open_located(
+        self,
+        path: Path,
+        offset: int,
+        length: Optional[int],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Iterate over decrypted chunks of a located blob."""
+        if path.suffix == ".enc":
+            content = self._cipher.decrypt(path.read_bytes())
+            return iter([content[start:end]])
+        return SegmentedReader(self.keyring.get, path, offset, length).iter_segments(start, end)
 
-        if not vault_file.exists():
-            raise FileNotFoundError(f"Vault reference not found: {vault_ref}")
+    def iter_parallel(
+        self, vault_ref: str, executor: Executor, window: int = 8
+    ) -> Iterator[bytes]:
+        """Iterate over a blob's plaintext, decrypting segments on executor.
 
-        encrypted = vault_file.read_bytes()
-        content = self._cipher.decrypt(encrypted)
+        Up to window segments are decrypted ahead of the consumer, which
+        bounds memory while keeping several workers busy on large blobs.
+        """
+        path, offset, length = self._locate(vault_ref)
+        if path.suffix == ".enc":
+            yield from self._open_located(path, offset, length)
+            return
 
-        return content
+        reader = SegmentedReader(self.keyring.get, path, offset, length)
+        pending: Deque[Future] = deque()
+        for index in range(reader.segment_count):
+            pending.append(executor.submit(reader.decrypt_segment, index))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def size(self, vault_ref: str) -> int:
+        """Return the plaintext size of a vaulted blob."""
+        path, offset, length = self._locate(vault_ref)
+        if path.suffix == ".enc":
+            return len(self._cipher.decrypt(path.read_bytes()))
+        return SegmentedReader(self.keyring.get, path, offset, length).size
 
     def get_metadata(self, vault_ref: str) -> Optional[dict]:
         """Get metadata for vault reference."""
-        meta_file = self.vault_path / f"{vault_ref}.meta"
-        if meta_file.exists():
-            return json.loads(meta_file.read_text())
-        return None
+        entry = self.metadata_index.get(vault_ref)
+        return VaultMetadataIndex.to_metadata(entry) if entry else None
+
+    def describe(self, vault_ref: str) -> Optional[Dict]:
+        """Get the full metadata index entry for vault reference."""
+        return self.metadata_index.get(vault_ref)
+
+    def find(
+        self,
+        case_id: Optional[str] = None,
+        object_type: Optional[str] = None,
+        host: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Find vault objects by case, type ("text", "html", "image") and/or source host."""
+        return self.metadata_index.find(case_id, object_type, host, limit)
+
+    def delete(self, vault_ref: str) -> bool:
+        """Delete a reference, its metadata and token entries; False if it did not exist.
+
+        Shared content is only removed with its last reference. Blobs in
+        segment files are only unindexed; run compact() to reclaim their space.
+        """
+        known = self.metadata_index.delete(vault_ref)
+        with sqlite3.connect(self.index_path) as conn:
+            conn.execute(
+                "DELETE FROM token_index WHERE ref_hash = ?", (self._ref_hash(vault_ref),)
+            )
+            conn.commit()
+        was_alias, blob_ref = self.dedup_index.release(vault_ref)
+        if not was_alias:
+            return self._remove_blob(vault_ref) or known
+        if blob_ref is not None:
+            self._remove_blob(blob_ref)
+        return True
+
+    def blob_refs(self) -> Iterator[str]:
+        """Iterate over the names of all stored blobs, in every layout."""
+        yield from self.segments.refs()
+        for vault_file in self.vault_path.iterdir():
+            if vault_file.suffix in (".aead", ".enc"):
+                yield vault_file.stem
+
+    def rotate_blob(self, blob_ref: str, key_id: Optional[str] = None) -> str:
+        """Move a stored blob onto a master key (the active one by default).
+
+        Envelope-encrypted blobs are copied with their data key rewrapped and
+        the copy swapped in (a new segment record, or a file renamed over the
+        old one), so concurrent readers never see a half-written key slot.
+        Blobs from before envelope encryption are re-encrypted. Returns
+        "rewrapped", "reencrypted" or "current".
+        """
+        key_id = key_id or self.keyring.active()[0]
+        master_key = self.keyring.get(key_id)
+
+        def rewrapped(source: BinaryIO, length: Optional[int], destination: BinaryIO) -> None:
+            rewrap_copy(self.keyring.get, source, destination, key_id, master_key, length)
+
+        path, offset, _ = self._locate_blob(blob_ref)
+        previous = None if path.suffix == ".enc" else header_key_id(path, offset)
+        in_segments = self.segments.locate(blob_ref) is not None
+        if previous is None:
+            legacy_file = self.vault_path / f"{blob_ref}.enc"
+            layout = "segments" if in_segments else "files"
+            self._write_blob(blob_ref, self.open_stream_blob(blob_ref), layout)
+            legacy_file.unlink(missing_ok=True)
+            status = "reencrypted"
+        elif previous == key_id:
+            status = "current"
+        elif in_segments:
+            self.segments.rewrite(blob_ref, rewrapped)
+            status = "rewrapped"
+        else:
+            partial_file = path.with_name(path.name + ".partial")
+            try:
+                with open(path, "rb") as source, open(partial_file, "wb") as destination:
+                    rewrapped(source, None, destination)
+                os.replace(partial_file, path)
+            finally:
+                partial_file.unlink(missing_ok=True)
+            status = "rewrapped"
+
+        if status != "current":
+            self.metadata_index.set_key_id(blob_ref, key_id)
+        return status
+
+    def rehash(self, vault_ref: str, on_read: Optional[Callable[[int], None]] = None) -> str:
+        """Decrypt a blob in full and return its keyed content hash.
+
+        Every segment is authenticated on the way, so altered ciphertext
+        raises InvalidTag (InvalidToken for legacy blobs). on_read(n) is
+        called with the size of each decrypted chunk, e.g. to throttle I/O.
+        """
+        digest = hmac.new(self._hash_key, digestmod=hashlib.sha256)
+        for chunk in self.open_stream(vault_ref):
+            digest.update(chunk)
+            if on_read:
+                on_read(len(chunk))
+        return digest.hexdigest()
+
+    def open_stream_blob(self, blob_ref: str) -> BinaryIO:
+        """Open a stored blob's plaintext as a readable binary stream."""
+        return _ChunkStream(self._open_located(*self._locate_blob(blob_ref)))
+
+    def dedup_stats(self) -> Dict:
+        """Return deduplication counters."""
+        return self.dedup_index.stats()
+
+    def _migrate_meta_files(self) -> None:
+        """Move legacy per-reference .meta files into the metadata index (runs once)."""
+        if self.metadata_index.get_state("meta_files_migrated"):
+            return
+
+        for meta_file in self.vault_path.glob("*.meta"):
+            created_at = datetime.fromtimestamp(meta_file.stat().st_mtime, timezone.utc)
+            self._backfill_metadata(
+                meta_file.stem, json.loads(meta_file.read_text()), created_at.isoformat()
+            )
+            meta_file.unlink()
+
+        self.metadata_index.set_state("meta_files_migrated", "1")
+
+    def _migrate_segment_metadata(self) -> None:
+        """Move metadata kept in segment_records by older vaults into the index (runs once).
+
+        The segment layout used to store each record's metadata JSON in a
+        metadata column of segment_records; the column is emptied afterwards.
+        """
+        if self.metadata_index.get_state("segment_metadata_migrated"):
+            return
+
+        with sqlite3.connect(self.index_path) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(segment_records)")}
+            rows = []
+            if "metadata" in columns:
+                rows = conn.execute(
+                    """
+                    SELECT vault_ref, segment_id, metadata FROM segment_records
+                    WHERE metadata IS NOT NULL
+                """
+                ).fetchall()
+
+        for vault_ref, segment_id, metadata in rows:
+            if self.metadata_index.get(vault_ref) is not None:
+                continue
+            segment_path = self.segments.segment_path(segment_id)
+            created_at = datetime.fromtimestamp(
+                segment_path.stat().st_mtime if segment_path.exists() else 0, timezone.utc
+            )
+            self._backfill_metadata(vault_ref, json.loads(metadata), created_at.isoformat())
+
+        if rows:
+            with sqlite3.connect(self.index_path) as conn:
+                conn.execute("UPDATE segment_records SET metadata = NULL")
+                conn.commit()
+        self.metadata_index.set_state("segment_metadata_migrated", "1")
+
+    def _backfill_metadata(self, vault_ref: str, metadata: dict, created_at: str) -> None:
+        """Index an object stored before the metadata index, hashing its content."""
+        digest = hmac.new(self._hash_key, digestmod=hashlib.sha256)
+        size = 0
+        try:
+            location = self._locate(vault_ref)
+            for chunk in self._open_located(*location):
+                digest.update(chunk)
+                size += len(chunk)
+            content_hash = digest.hexdigest()
+            key_id = self._key_id_of(*location)
+        except FileNotFoundError:
+            size = content_hash = None
+            key_id = self.keyring.legacy_id
+        self.metadata_index.add(
+            vault_ref,
+            metadata,
+            size=size,
+            content_hash=content_hash,
+            key_id=key_id,
+            created_at=created_at,
+        )
+
+    def compact(self, min_garbage_ratio: float = 0.5) -> Dict:
+        """Reclaim space held by deleted blobs in segment files."""
+        return self.segments.compact(min_garbage_ratio)
+
+    def index_tokens(
+        self, vault_ref: str, token_log: Iterable[Dict], text: Optional[str] = None
+    ) -> int:
+        """Record where each pseudonym token came from in a vaulted original.
+
+        The location (vault_ref, offsets, entity type) is encrypted; only the
+        pseudonym token itself, which already appears in redacted artifacts,
+        and a keyed hash of vault_ref (so delete() can drop the entries) are
+        stored in the clear. Given the text that was vaulted (UTF-8 encoded),
+        byte offsets are recorded too so values can be read back as ranges.
+        """
+        token_log = list(token_log)
+        byte_positions = {}
+        if text is not None:
+            position = byte_position = 0
+            for char_position in sorted({p for e in token_log for p in (e["start"], e["end"])}):
+                byte_position += len(text[position:char_position].encode("utf-8"))
+                byte_positions[char_position] = byte_position
+                position = char_position
+
+        grouped: Dict[str, Dict] = {}
+        for entry in token_log:
+            record = grouped.setdefault(
+                entry["token"],
+                {"vault_ref": vault_ref, "entity_type": entry["entity_type"], "offsets": []},
+            )
+            record["offsets"].append([entry["start"], entry["end"]])
+            if byte_positions:
+                record.setdefault("byte_offsets", []).append(
+                    [byte_positions[entry["start"]], byte_positions[entry["end"]]]
+                )
+
+        ref_hash = self._ref_hash(vault_ref)
+        rows = [
+            (
+                token,
+                self._cipher.encrypt(json.dumps(record, sort_keys=True).encode("utf-8")),
+                ref_hash,
+            )
+            for token, record in grouped.items()
+        ]
+        with sqlite3.connect(self.index_path) as conn:
+            conn.executemany(
+                "INSERT INTO token_index (token, payload, ref_hash) VALUES (?, ?, ?)", rows
+            )
+            conn.commit()
+        return len(rows)
+
+    def resolve_tokens(self, tokens: List[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve pseudonym tokens back to their original values.
+
+        Tokens carry only 32 bits of the HMAC, so different values can share
+        one. Every occurrence is resolved on its own: "values" lists each
+        distinct original, "ambiguous" is set when there are several, and
+        "value" is only given when the token is unambiguous. Values are read
+        as byte ranges where their byte offsets were indexed; otherwise each
+        vault blob referenced by the batch is decrypted at most once.
+        Occurrences whose blob is gone or unreadable are left out, and tokens
+        without any remaining occurrence map to None, like unknown tokens.
+        """
+        unique_tokens = list(dict.fromkeys(tokens))
+        records: Dict[str, List[Dict]] = {token: [] for token in unique_tokens}
+        with sqlite3.connect(self.index_path) as conn:
+            for i in range(0, len(unique_tokens), 500):
+                batch = unique_tokens[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    f"SELECT token, payload FROM token_index WHERE token IN ({placeholders})",
+                    batch,
+                )
+                for token, payload in cursor.fetchall():
+                    records[token].append(json.loads(self._cipher.decrypt(payload)))
+
+        originals: Dict[str, Optional[str]] = {}
+
+        def read_values(occurrence: Dict) -> Optional[List[str]]:
+            vault_ref = occurrence["vault_ref"]
+            try:
+                if "byte_offsets" in occurrence:
+                    return [
+                        self.retrieve_range(vault_ref, start, end).decode("utf-8")
+                        for start, end in occurrence["byte_offsets"]
+                    ]
+                if vault_ref not in originals:
+                    originals[vault_ref] = self.retrieve(vault_ref).decode("utf-8")
+            except (OSError, ValueError, KeyError, InvalidTag, InvalidToken):
+                originals[vault_ref] = None
+            if originals.get(vault_ref) is None:
+                return None
+            return [originals[vault_ref][start:end] for start, end in occurrence["offsets"]]
 
+        resolved: Dict[str, Optional[Dict]] = {}
+        for token, occurrences in records.items():
+            resolved_occurrences = []
+            for occurrence in occurrences:
+                # One blob can hold several values behind the same token
+                occurrence_values = read_values(occurrence)
+                if occurrence_values is None:
+                    continue
+                vault_ref = occurrence["vault_ref"]
+                resolved_occurrences.append(
+                    {
+                        "values": list(dict.fromkeys(occurrence_values)),
+                        "entity_type": occurrence["entity_type"],
+                        "vault_ref": vault_ref,
+                        "case_id": (self.get_metadata(vault_ref) or {}).get("case_id"),
+                        "offsets": occurrence["offsets"],
+                    }
+                )
+            if not resolved_occurrences:
+                resolved[token] = None
+                continue
+            values = list(dict.fromkeys(v for o in resolved_occurrences for v in o["values"]))
+            resolved[token] = {
+                "value": values[0] if len(values) == 1 else None,
+                "values": values,
+                "ambiguous": len(values) > 1,
+                "entity_type": resolved_occurrences[0]["entity_type"],
+                "occurrences": resolved_occurrences,
+            }
+        return resolved
@@ -0,0 +1,136 @@
+"""Reference-counted content deduplication for the vault."""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class VaultDedupIndex:
+    """Map vault references onto shared, reference-counted blobs.
+
+    Blobs are keyed by the vault's keyed content hash (an HMAC of the
+    plaintext, so the index does not reveal content to anyone without the
+    vault key). Every deduplicated vault_ref is an alias of a blob_ref, the
+    name the ciphertext is actually stored under; the blob is removed once
+    its last alias is released.
+    """
+
+    def __init__(self, db_path: Path):
+        """Initialize dedup index."""
+        self.db_path = Path(db_path)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vault_blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    blob_ref TEXT NOT NULL UNIQUE,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vault_aliases (
+                    vault_ref TEXT PRIMARY KEY,
+                    blob_ref TEXT NOT NULL
+                )
+            """
+            )
+            conn.commit()
+
+    @staticmethod
+    def _add_alias(conn: sqlite3.Connection, content_hash: str, vault_ref: str) -> Optional[str]:
+        """Point vault_ref at the blob for content_hash, if there is one."""
+        row = conn.execute(
+            "SELECT blob_ref FROM vault_blobs WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE vault_blobs SET refcount = refcount + 1 WHERE content_hash = ?",
+            (content_hash,),
+        )
+        conn.execute(
+            "INSERT INTO vault_aliases (vault_ref, blob_ref) VALUES (?, ?)", (vault_ref, row[0])
+        )
+        return row[0]
+
+    def acquire(self, content_hash: str, vault_ref: str) -> Optional[str]:
+        """Alias vault_ref to an existing blob with this content; return its blob_ref."""
+        with sqlite3.connect(self.db_path) as conn:
+            blob_ref = self._add_alias(conn, content_hash, vault_ref)
+            conn.commit()
+        return blob_ref
+
+    def register(self, content_hash: str, blob_ref: str, size: int, vault_ref: str) -> str:
+        """Register a freshly written blob and alias vault_ref to it.
+
+        If a blob with the same content was registered in the meantime, the
+        alias points at that one instead; the returned blob_ref then differs
+        from the one passed in and the caller should discard its copy.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO vault_blobs (content_hash, blob_ref, size, refcount)
+                VALUES (?, ?, ?, 0)
+            """,
+                (content_hash, blob_ref, size),
+            )
+            stored_ref = self._add_alias(conn, content_hash, vault_ref)
+            conn.commit()
+        return stored_ref
+
+    def resolve(self, vault_ref: str) -> str:
+        """Return the blob_ref a vault_ref is stored under."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT blob_ref FROM vault_aliases WHERE vault_ref = ?", (vault_ref,)
+            ).fetchone()
+        return row[0] if row else vault_ref
+
+    def release(self, vault_ref: str) -> Tuple[bool, Optional[str]]:
+        """Drop an alias.
+
+        Returns (was_alias, blob_ref to remove); the blob_ref is only set
+        when the released alias was the blob's last reference.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT blob_ref FROM vault_aliases WHERE vault_ref = ?", (vault_ref,)
+            ).fetchone()
+            if row is None:
+                return False, None
+
+            blob_ref = row[0]
+            conn.execute("DELETE FROM vault_aliases WHERE vault_ref = ?", (vault_ref,))
+            conn.execute(
+                "UPDATE vault_blobs SET refcount = refcount - 1 WHERE blob_ref = ?", (blob_ref,)
+            )
+            deleted = conn.execute(
+                "DELETE FROM vault_blobs WHERE blob_ref = ? AND refcount <= 0", (blob_ref,)
+            ).rowcount
+            conn.commit()
+        return True, blob_ref if deleted else None
+
+    def stats(self) -> Dict:
+        """Return blob and reference counts and the bytes saved by sharing."""
+        with sqlite3.connect(self.db_path) as conn:
+            blobs, references, stored, saved = conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(size), 0),
+                       COALESCE(SUM((refcount - 1) * size), 0)
+                FROM vault_blobs
+            """
+            ).fetchone()
+        return {
+            "blobs": blobs,
+            "references": references,
+            "stored_bytes": stored,
+            "saved_bytes": saved,
+        }
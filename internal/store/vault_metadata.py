@@ -0,0 +1,181 @@
+"""Queryable metadata index for vault objects."""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# Metadata keys with their own columns; anything else is kept in "extra"
+_COLUMN_KEYS = {"case_id": "case_id", "type": "type", "url": "source_url"}
+
+
+class VaultMetadataIndex:
+    """SQLite table describing every vault object, indexed by case, type and host."""
+
+    def __init__(self, db_path: Path):
+        """Initialize vault metadata index."""
+        self.db_path = Path(db_path)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vault_objects (
+                    vault_ref TEXT PRIMARY KEY,
+                    case_id TEXT,
+                    type TEXT,
+                    source_url TEXT,
+                    source_host TEXT,
+                    size INTEGER,
+                    content_hash TEXT,
+                    created_at TEXT NOT NULL,
+                    key_id TEXT,
+                    extra TEXT
+                )
+            """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_vault_objects_case ON vault_objects(case_id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_vault_objects_host ON vault_objects(source_host)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_vault_objects_type ON vault_objects(type)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vault_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """
+            )
+            conn.commit()
+
+    def add(
+        self,
+        vault_ref: str,
+        metadata: Optional[dict],
+        size: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        key_id: Optional[str] = None,
+        created_at: Optional[str] = None,
+    ) -> None:
+        """Record a vault object."""
+        metadata = dict(metadata or {})
+        columns = {column: metadata.pop(key, None) for key, column in _COLUMN_KEYS.items()}
+        source_url = columns["source_url"]
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO vault_objects
+                (vault_ref, case_id, type, source_url, source_host, size, content_hash,
+                 created_at, key_id, extra)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    vault_ref,
+                    columns["case_id"],
+                    columns["type"],
+                    source_url,
+                    urlparse(source_url).hostname if source_url else None,
+                    size,
+                    content_hash,
+                    created_at or datetime.now(timezone.utc).isoformat(),
+                    key_id,
+                    json.dumps(metadata, sort_keys=True) if metadata else None,
+                ),
+            )
+            conn.commit()
+
+    def get(self, vault_ref: str) -> Optional[Dict]:
+        """Return the index row for a vault object."""
+        rows = self._query("WHERE vault_ref = ?", (vault_ref,))
+        return rows[0] if rows else None
+
+    def find(
+        self,
+        case_id: Optional[str] = None,
+        object_type: Optional[str] = None,
+        host: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Return vault objects matching all given filters, oldest first."""
+        conditions = []
+        params: List = []
+        for column, value in (("case_id", case_id), ("type", object_type), ("source_host", host)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value.lower() if column == "source_host" else value)
+
+        clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        clause += " ORDER BY created_at, vault_ref"
+        if limit is not None:
+            clause += " LIMIT ?"
+            params.append(limit)
+        return self._query(clause, params)
+
+    def after(self, vault_ref: str = "", limit: int = 100) -> List[Dict]:
+        """Return up to limit vault objects with references after vault_ref, in order."""
+        return self._query("WHERE vault_ref > ? ORDER BY vault_ref LIMIT ?", (vault_ref, limit))
+
+    def delete(self, vault_ref: str) -> bool:
+        """Remove a vault object from the index."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("DELETE FROM vault_objects WHERE vault_ref = ?", (vault_ref,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def set_key_id(self, blob_ref: str, key_id: str) -> None:
+        """Record the master key of a stored blob on every reference sharing it."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE vault_objects SET key_id = ?
+                WHERE vault_ref = ?
+                   OR vault_ref IN (SELECT vault_ref FROM vault_aliases WHERE blob_ref = ?)
+            """,
+                (key_id, blob_ref, blob_ref),
+            )
+            conn.commit()
+
+    def _query(self, clause: str, params) -> List[Dict]:
+        """Select vault objects and decode their extra metadata."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT * FROM vault_objects {clause}", params).fetchall()
+
+        objects = []
+        for row in rows:
+            entry = dict(row)
+            entry["extra"] = json.loads(entry["extra"]) if entry["extra"] else {}
+            objects.append(entry)
+        return objects
+
+    @staticmethod
+    def to_metadata(entry: Dict) -> Dict:
+        """Rebuild the metadata dict a vault object was stored with."""
+        metadata = dict(entry["extra"])
+        for key, column in _COLUMN_KEYS.items():
+            if entry[column] is not None:
+                metadata[key] = entry[column]
+        return metadata
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a vault state flag."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT value FROM vault_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        """Write a vault state flag."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO vault_state (key, value) VALUES (?, ?)", (key, value)
+            )
+            conn.commit()
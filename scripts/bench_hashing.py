@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark file hashing throughput: 4 KiB reads vs adaptive buffers, mmap and hash_many."""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from internal.crypto.hash import hash_file, hash_many  # noqa: E402
+
+
+def legacy_hash_file(file_path: Path) -> str:
+    """Previous implementation: 4 KiB reads."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def throughput(func, paths, total_bytes: int, repeat: int) -> float:
+    """Return the best MB/s of func over paths across repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(paths)
+        best = min(best, time.perf_counter() - start)
+    return total_bytes / (1024 * 1024) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[16, 1024, 16384, 131072])
+    parser.add_argument("--files", type=int, default=8, help="files per size for hash_many")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'size KiB':>9} {'4 KiB MB/s':>11} {'buffered':>9} {'mmap':>9} "
+        f"{'sequential':>11} {'hash_many':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size_kb in args.sizes_kb:
+            paths = []
+            for i in range(args.files):
+                path = Path(tmpdir) / f"{size_kb}-{i}.bin"
+                path.write_bytes(os.urandom(size_kb * 1024))
+                paths.append(path)
+            total = size_kb * 1024 * len(paths)
+            assert hash_many(paths) == [legacy_hash_file(path) for path in paths]
+
+            legacy = throughput(
+                lambda ps: [legacy_hash_file(p) for p in ps], paths, total, args.repeat
+            )
+            buffered = throughput(
+                lambda ps: [hash_file(p, use_mmap=False) for p in ps], paths, total, args.repeat
+            )
+            mapped = throughput(
+                lambda ps: [hash_file(p, use_mmap=True) for p in ps], paths, total, args.repeat
+            )
+            sequential = throughput(
+                lambda ps: [hash_file(p) for p in ps], paths, total, args.repeat
+            )
+            parallel = throughput(hash_many, paths, total, args.repeat)
+            print(
+                f"{size_kb:>9} {legacy:>11.0f} {buffered:>9.0f} {mapped:>9.0f} "
+                f"{sequential:>11.0f} {parallel:>10.0f}"
+            )
+            for path in paths:
+                path.unlink()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark single-pass pseudonymization against the old splice-per-detection approach."""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from internal.pii.pseudonymizer import Pseudonymizer  # noqa: E402
+
+
+def legacy_pseudonymize_text(pseudonymizer: Pseudonymizer, text: str, detections: list) -> str:
+    """Previous implementation: rebuild the string once per detection, no memo."""
+    sorted_detections = sorted(detections, key=lambda x: x["start"], reverse=True)
+    result = text
+    for detection in sorted_detections:
+        start = detection["start"]
+        end = detection["end"]
+        original = text[start:end]
+        entity_type = detection.get("entity_type", "UNKNOWN")
+        pseudonym = pseudonymizer._compute_pseudonym(original, entity_type)
+        result = result[:start] + pseudonym + result[end:]
+    return result
+
+
+def build_document(detection_count: int, distinct_values: int, seed: int = 0):
+    """Build a synthetic document with the requested number of email detections."""
+    rng = random.Random(seed)
+    values = [f"user{i}@example.com" for i in range(distinct_values)]
+    parts = []
+    detections = []
+    position = 0
+    for _ in range(detection_count):
+        filler = "lorem ipsum dolor sit amet " * rng.randint(1, 4)
+        parts.append(filler)
+        position += len(filler)
+        value = rng.choice(values)
+        parts.append(value)
+        detections.append(
+            {"entity_type": "EMAIL", "start": position, "end": position + len(value)}
+        )
+        position += len(value)
+    return "".join(parts), detections
+
+
+def timed(func, *args) -> float:
+    """Run func once and return elapsed seconds."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--detections", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--distinct", type=int, default=500, help="distinct PII values")
+    args = parser.parse_args()
+
+    print(f"{'detections':>10} {'doc size':>10} {'legacy s':>10} {'single-pass s':>14} {'speedup':>8}")
+    for count in args.detections:
+        text, detections = build_document(count, args.distinct)
+        pseudonymizer = Pseudonymizer("benchmark-key")
+
+        legacy = timed(legacy_pseudonymize_text, pseudonymizer, text, detections)
+        current = timed(pseudonymizer.pseudonymize_text, text, detections)
+        assert legacy_pseudonymize_text(
+            pseudonymizer, text, detections
+        ) == pseudonymizer.pseudonymize_text(text, detections)
+
+        print(
+            f"{count:>10} {len(text):>10} {legacy:>10.3f} {current:>14.3f} "
+            f"{legacy / current:>7.1f}x"
+        )
@@ -0,0 +1,57 @@
+"""In-process stub of the ML classifier service for tests."""
+
+import json
+from typing import List
+
+import httpx
+
+
+class MLStubServer:
+    """Stub ML service served through httpx.MockTransport.
+
+    Handles POST /classify (single text) and, if batch_support is enabled,
+    POST /classify/batch. Every request is recorded for assertions.
+    """
+
+    def __init__(
+        self,
+        batch_support: bool = True,
+        model_version: str = "v1.0",
+        negative_confidence: float = 0.1,
+    ):
+        """Initialize stub server."""
+        self.batch_support = batch_support
+        self.model_version = model_version
+        self.negative_confidence = negative_confidence
+        self.requests: List[httpx.Request] = []
+
+    def result_for(self, text: str) -> dict:
+        """Deterministic fake classification for a text."""
+        positive = "hate" in text.lower()
+        return {
+            "classification": "positive" if positive else "negative",
+            "confidence": 0.9 if positive else self.negative_confidence,
+            "categories": ["hate_speech"] if positive else [],
+            "model_version": self.model_version,
+            "timestamp": "2025-01-01T00:00:00Z",
+        }
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Serve one request."""
+        self.requests.append(request)
+        body = json.loads(request.content)
+
+        if request.url.path == "/classify":
+            return httpx.Response(200, json=self.result_for(body["text"]))
+        if request.url.path == "/classify/batch" and self.batch_support:
+            results = [self.result_for(item["text"]) for item in body["items"]]
+            return httpx.Response(200, json={"results": results})
+        return httpx.Response(404, json={"detail": "Not Found"})
+
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client whose requests are answered by this stub."""
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    def paths(self) -> List[str]:
+        """Paths of all recorded requests."""
+        return [request.url.path for request in self.requests]
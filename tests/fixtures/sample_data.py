@@ -79,3 +79,63 @@ TEST_IMAGE_URLS = [
     "https://httpbin.org/image/jpeg",
 ]
 
+
+# Multi-paragraph documents for checking that cascade PII detection keeps recall
+PII_RECALL_CORPUS = [
+    SAMPLE_TEXT_WITH_PII,
+    SAMPLE_TEXT_NO_PII,
+    """
+The community meeting covered general topics.
+
+Questions can be sent to organizer@example.org before Friday.
+
+nothing of interest in this paragraph at all.
+
+Call the front desk at 555-222-3333 or (555) 444-5555.
+""",
+    """
+card on file: 4111 1111 1111 1111
+
+ssn was listed as 078-05-1120 in the scanned form.
+
+plain lowercase text without any signal.
+""",
+    "",
+    "single paragraph mentioning jane.doe@example.com inline",
+    """
+John went home.
+
+The report was filed and nobody answered.
+
+later that day Maria Cohen called.
+""",
+]
+
+
+# PII-free prose paragraphs for measuring how often the cascade prefilter
+# escalates ordinary text to the full analyzer
+CASCADE_PROSE_CORPUS = [
+    "The thread started as a complaint about delivery times and quickly turned into an "
+    "argument about who was to blame.",
+    "Several users replied that the service had been slow for weeks. Others said they had "
+    "never noticed a problem.",
+    "Moderators locked the discussion after it became abusive. Nobody was banned, but a "
+    "warning was posted at the top of the page.",
+    "This post is a summary of the main points raised so far. Please read it before adding "
+    "another reply.",
+    "Comments like these are reported every day. Most of them are removed within hours, "
+    "although some stay up much longer.",
+    "The article claims that the new policy will reduce harassment. Critics say it only moves "
+    "the problem somewhere else.",
+    "Some of the replies were clearly meant as jokes. Many readers did not take them that way.",
+    "After the video was shared, the account gained thousands of followers overnight.",
+    "Screenshots of the original messages were collected by volunteers and added to the report.",
+    "Nothing in the statement explains why the earlier posts were deleted.",
+    "Users in the group often repeat the same slogans. Several of them link to the same "
+    "external pages.",
+    "The debate moved to another forum once the original board was closed.",
+    "Reports from Europe suggest that similar campaigns are running on several platforms.",
+    "Members of the Facebook group shared the post again on Sunday.",
+    "Researchers at the University have studied this kind of coordinated behaviour.",
+    "When asked for comment, the company said it was reviewing the content.",
+]
@@ -0,0 +1,109 @@
+"""Tests for API endpoints."""
+
+import asyncio
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as api_main
+from tests.fixtures.ml_stub import MLStubServer
+from tests.test_integration import make_config, make_pipeline
+
+ADMIN = {"Authorization": "Bearer test-admin-token"}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Point the API at a pipeline with two ingested cases."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = make_config(tmpdir)
+        config.api.admin_token = "test-admin-token"
+        pipeline = make_pipeline(config, MLStubServer())
+        case_ids = [
+            asyncio.run(pipeline.ingest(f"https://example.com/page{i}")) for i in range(2)
+        ]
+        monkeypatch.setattr(api_main, "config", config)
+        monkeypatch.setattr(api_main, "pipeline", pipeline)
+        yield TestClient(api_main.app), pipeline, case_ids
+        asyncio.run(pipeline.close())
+
+
+def test_bundles_require_admin_token(service):
+    """Test that bundles cannot be requested anonymously."""
+    client, _, case_ids = service
+
+    assert client.post("/bundles", json={"case_ids": case_ids}).status_code == 401
+    response = client.post(
+        "/bundles",
+        json={"case_ids": case_ids},
+        headers={"Authorization": "Bearer wrong"},
+    )
+    assert response.status_code == 403
+
+
+def test_bundles_reject_ids_mixed_with_filters(service):
+    """Test that case ids and filters cannot be combined."""
+    client, _, case_ids = service
+
+    response = client.post(
+        "/bundles", json={"case_ids": case_ids, "status": "completed"}, headers=ADMIN
+    )
+    assert response.status_code == 400
+    assert client.post("/bundles", json={}, headers=ADMIN).status_code == 400
+
+
+def test_bundle_download_and_progress(service):
+    """Test a filtered bundle download and its progress record."""
+    client, _, case_ids = service
+
+    response = client.post("/bundles", json={"status": "completed"}, headers=ADMIN)
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as bundle:
+        names = bundle.namelist()
+    assert [f"packs/{case_id}.zip" for case_id in case_ids] == names[:2]
+    assert {"index.json", "index.sig", "pubkey.pem"} <= set(names)
+
+    bundle_id = response.headers["X-Bundle-Id"]
+    assert client.get(f"/bundles/{bundle_id}").status_code == 401
+    progress = client.get(f"/bundles/{bundle_id}", headers=ADMIN).json()
+    assert progress["status"] == "complete"
+    assert progress["cases_done"] == progress["cases_total"] == 2
+    assert progress["bytes_sent"] == len(response.content)
+
+
+@pytest.mark.parametrize("on_demand", [False, True])
+def test_pack_conditional_and_range_requests(service, on_demand):
+    """Test 304, 206 and 416 responses for stored and rebuilt packs."""
+    client, pipeline, case_ids = service
+    if on_demand:
+        # Without the stored file the pack is rebuilt from its signed manifest
+        Path(pipeline.case_store.get_case(case_ids[0])["pack_path"]).unlink()
+    url = f"/cases/{case_ids[0]}/pack.zip"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    etag = full.headers["ETag"]
+    assert etag.startswith(f'"{pipeline.case_store.get_case(case_ids[0])["manifest_hash"]}-')
+    assert etag.endswith(f'-{pipeline.pack_generator.build_id}"')
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(url, headers={"Range": "bytes=10-99"})
+    assert response.status_code == 206
+    assert response.content == full.content[10:100]
+    assert response.headers["Content-Range"] == f"bytes 10-99/{len(full.content)}"
+
+    # A stale If-Range validator gets the whole pack
+    response = client.get(url, headers={"Range": "bytes=10-99", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == full.content
+
+    response = client.get(url, headers={"Range": f"bytes={len(full.content)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(full.content)}"
@@ -0,0 +1,208 @@
+"""Tests for classifier integration."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from internal.classify.batcher import BatchingClassifier
+from internal.classify.cache import CachingClassifier, ClassificationCache
+from internal.classify.chunking import ChunkedClassifier, reduce_chunk_results, split_windows
+from internal.classify.classifier import Classifier
+from tests.fixtures.ml_stub import MLStubServer
+
+ML_ENDPOINT = "http://ml.test/classify"
+
+
+@pytest.mark.asyncio
+async def test_classifier_single_request():
+    """Test single-text classification against the stub service."""
+    stub = MLStubServer()
+    classifier = Classifier(ML_ENDPOINT, client=stub.client())
+
+    result = await classifier.classify("some hate text", metadata={"case_id": "c1"})
+
+    assert result["classification"] == "positive"
+    assert result["model_version"] == "v1.0"
+    assert stub.paths() == ["/classify"]
+    await classifier.close()
+
+
+@pytest.mark.asyncio
+async def test_batching_classifier_coalesces_concurrent_calls():
+    """Test that concurrent calls are sent as bounded batches."""
+    stub = MLStubServer()
+    batcher = BatchingClassifier(
+        Classifier(ML_ENDPOINT, client=stub.client()), max_batch_size=4, max_wait=0.05
+    )
+
+    texts = [f"text {i} hate" if i % 2 else f"text {i}" for i in range(10)]
+    results = await asyncio.gather(*(batcher.classify(text) for text in texts))
+
+    assert [r["classification"] for r in results] == [
+        "positive" if i % 2 else "negative" for i in range(10)
+    ]
+    assert stub.paths() == ["/classify/batch"] * 3
+    assert batcher.stats["batches"] == 3
+    assert batcher.stats["batched_items"] == 10
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batching_classifier_falls_back_without_batch_endpoint():
+    """Test fallback to single requests when the service lacks batch support."""
+    stub = MLStubServer(batch_support=False)
+    batcher = BatchingClassifier(
+        Classifier(ML_ENDPOINT, client=stub.client()), max_batch_size=8, max_wait=0.01
+    )
+
+    results = await asyncio.gather(*(batcher.classify(f"text {i}") for i in range(3)))
+    assert all(r["classification"] == "negative" for r in results)
+    assert batcher.batch_supported is False
+    assert stub.paths() == ["/classify/batch"] + ["/classify"] * 3
+
+    # Once unsupported, batches go straight to single requests
+    await asyncio.gather(*(batcher.classify(f"more {i}") for i in range(2)))
+    assert stub.paths().count("/classify/batch") == 1
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batching_classifier_gives_each_caller_its_own_error():
+    """Test that a failed batch resolves every caller with a separate error result."""
+    import httpx
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    batcher = BatchingClassifier(Classifier(ML_ENDPOINT, client=client), max_wait=0.01)
+
+    results = await asyncio.gather(*(batcher.classify(f"text {i}") for i in range(3)))
+    assert all(r["classification"] == "error" for r in results)
+    results[0]["chunks"] = []
+    assert "chunks" not in results[1]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_caching_classifier_skips_repeat_calls():
+    """Test that repeated texts are served from the persistent cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "classify_cache.db"
+        stub = MLStubServer()
+        classifier = CachingClassifier(
+            Classifier(ML_ENDPOINT, client=stub.client()), ClassificationCache(db_path)
+        )
+
+        first = await classifier.classify("repeated hate text")
+        second = await classifier.classify("repeated hate text")
+        assert first == second
+        assert len(stub.requests) == 1
+        assert classifier.cache.stats()["hits"] == 1
+
+        # A fresh cache on the same database (e.g. after restart) still hits
+        reopened = ClassificationCache(db_path, memory_entries=0)
+        assert reopened.get("repeated hate text") == first
+        await classifier.close()
+
+
+@pytest.mark.asyncio
+async def test_classification_cache_invalidated_on_model_version_change():
+    """Test that results from a previous model version are dropped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ClassificationCache(Path(tmpdir) / "classify_cache.db")
+        stub = MLStubServer(model_version="v1.0")
+        classifier = CachingClassifier(Classifier(ML_ENDPOINT, client=stub.client()), cache)
+
+        await classifier.classify("text a")
+        stub.model_version = "v2.0"
+        await classifier.classify("text b")
+
+        assert cache.model_version == "v2.0"
+        assert cache.stats()["invalidations"] == 1
+        assert cache.get("text a") is None
+        assert cache.get("text b")["model_version"] == "v2.0"
+
+        # Error results are never cached
+        cache.put("text c", {"classification": "error", "error": "down"})
+        assert cache.get("text c") is None
+        await classifier.close()
+
+
+def test_split_windows_respects_size_and_overlap():
+    """Test window splitting on word boundaries with overlap."""
+    text = " ".join(f"word{i}" for i in range(200))
+    windows = split_windows(text, max_chars=100, overlap=20)
+
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(text)
+    for (start, end), (next_start, _) in zip(windows, windows[1:]):
+        assert end - start <= 100
+        assert next_start < end  # overlapping
+        assert text[end] == " "  # cut at whitespace
+    assert split_windows("short", max_chars=100) == [(0, 5)]
+
+
+@pytest.mark.asyncio
+async def test_chunked_classifier_reduces_window_results():
+    """Test that long texts are classified per window and reduced."""
+    stub = MLStubServer()
+    classifier = ChunkedClassifier(
+        Classifier(ML_ENDPOINT, client=stub.client()), max_chars=60, overlap=10, max_concurrency=2
+    )
+
+    text = "calm words here " * 10 + "then hate appears " + "calm words here " * 10
+    result = await classifier.classify(text, metadata={"case_id": "c1"})
+
+    assert len(stub.requests) == len(result["chunks"]) > 2
+    assert result["classification"] == "positive"
+    assert result["confidence"] == 0.9
+    assert result["categories"] == ["hate_speech"]
+    positive = [c for c in result["chunks"] if c["classification"] == "positive"]
+    assert all("hate" in text[c["start"]:c["end"]] for c in positive)
+    await classifier.close()
+
+
+@pytest.mark.asyncio
+async def test_chunked_classifier_positive_window_outweighs_confident_negatives():
+    """Test that one positive window is not hidden by more confident negative ones."""
+    stub = MLStubServer(negative_confidence=0.97)
+    classifier = ChunkedClassifier(
+        Classifier(ML_ENDPOINT, client=stub.client()), max_chars=60, overlap=10
+    )
+
+    text = "calm words here " * 10 + "then hate appears " + "calm words here " * 10
+    result = await classifier.classify(text)
+
+    labels = [c["classification"] for c in result["chunks"]]
+    assert "positive" in labels and "negative" in labels
+    assert result["classification"] == "positive"
+    assert result["confidence"] == 0.9
+    await classifier.close()
+
+    # Positive windows below the threshold are not enough
+    windows = [(0, 10), (10, 20)]
+    results = [
+        {"classification": "negative", "confidence": 0.8},
+        {"classification": "positive", "confidence": 0.3},
+    ]
+    assert reduce_chunk_results(windows, results)["classification"] == "negative"
+    assert reduce_chunk_results(windows, results, positive_threshold=0.2)["confidence"] == 0.3
+
+
+def test_reduce_chunk_results_with_failed_windows():
+    """Test that a failed window prevents a confident negative but not a positive."""
+    windows = [(0, 10), (10, 20)]
+    timed_out = {"classification": "error", "confidence": 0.0, "error": "timeout"}
+    negative = {"classification": "negative", "confidence": 0.9, "categories": ["a"]}
+
+    result = reduce_chunk_results(windows, [negative, timed_out])
+    assert result["classification"] == "error"
+    assert result["error"] == "1 of 2 windows failed: timeout"
+    assert result["categories"] == ["a"]
+    assert [c["classification"] for c in result["chunks"]] == ["negative", "error"]
+    assert result["chunks"][1]["error"] == "timeout"
+
+    positive = {"classification": "positive", "confidence": 0.7}
+    result = reduce_chunk_results(windows, [timed_out, positive])
+    assert result["classification"] == "positive"
+    assert "error" not in result
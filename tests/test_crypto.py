@@ -5,7 +5,14 @@ from pathlib import Path
 
 import pytest
 
-from internal.crypto.hash import compute_sha256, hash_file
+from internal.crypto.hash import (
+    MAX_BUFFER_SIZE,
+    MIN_BUFFER_SIZE,
+    buffer_size_for,
+    compute_sha256,
+    hash_file,
+    hash_many,
+)
 from internal.crypto.sign import (
     generate_keypair,
     get_or_create_keypair,
@@ -40,6 +47,42 @@ def test_hash_file():
         temp_path.unlink()
 
 
+def test_hash_file_buffered_and_mmap():
+    """Test buffered and memory-mapped hashing agree with compute_sha256."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data = bytes(range(256)) * 40000  # spans several buffers
+        path = Path(tmpdir) / "data.bin"
+        path.write_bytes(data)
+        empty = Path(tmpdir) / "empty.bin"
+        empty.write_bytes(b"")
+
+        assert hash_file(path, use_mmap=False) == compute_sha256(data)
+        assert hash_file(path, use_mmap=True) == compute_sha256(data)
+        assert hash_file(empty, use_mmap=True) == compute_sha256(b"")
+        assert hash_file(empty) == compute_sha256(b"")
+
+
+def test_buffer_size_for():
+    """Test read buffers grow with file size within bounds."""
+    assert buffer_size_for(0) == MIN_BUFFER_SIZE
+    assert buffer_size_for(4 * 1024 * 1024) == 256 * 1024
+    assert buffer_size_for(10 * 1024**3) == MAX_BUFFER_SIZE
+
+
+def test_hash_many_preserves_order():
+    """Test parallel hashing returns hashes in input order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for i in range(8):
+            path = Path(tmpdir) / f"file{i}.bin"
+            path.write_bytes(f"content {i}".encode() * (i + 1))
+            paths.append(path)
+
+        assert hash_many(paths, workers=3) == [hash_file(path) for path in paths]
+        assert hash_many(paths[:1]) == [hash_file(paths[0])]
+        assert hash_many([]) == []
+
+
 def test_keypair_generation():
     """Test Ed25519 keypair generation."""
     private_key, public_key = generate_keypair()
@@ -81,3 +124,41 @@ def test_get_or_create_keypair():
 
 
 
+
+
+def test_merkle_proofs():
+    """Test inclusion proofs for every leaf of trees of various sizes."""
+    from internal.crypto.merkle import MerkleTree, leaf_hash, verify_proof
+
+    for count in (1, 2, 3, 5, 8, 13):
+        leaves = [leaf_hash(str(i).encode()) for i in range(count)]
+        tree = MerkleTree(leaves)
+        for index, leaf in enumerate(leaves):
+            assert verify_proof(leaf, tree.proof(index), tree.root)
+        assert not verify_proof(leaf_hash(b"other"), tree.proof(0), tree.root)
+
+
+def test_signing_service_batch_receipts():
+    """Test batch signing with per-manifest receipts and latency metrics."""
+    from internal.crypto.signing import SigningService, verify_batch_receipt
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        signer = SigningService(Path(tmpdir), "test-key")
+        manifest_hashes = [compute_sha256(f"manifest {i}".encode()) for i in range(7)]
+        receipts = signer.sign_batch(manifest_hashes)
+
+        assert len({r["merkle_root"] for r in receipts}) == 1
+        assert all(verify_batch_receipt(signer.public_key, r) for r in receipts)
+
+        forged = dict(receipts[2], manifest_hash=compute_sha256(b"forged"))
+        assert not verify_batch_receipt(signer.public_key, forged)
+        resized = dict(receipts[2], leaf_count=8)
+        assert not verify_batch_receipt(signer.public_key, resized)
+
+        signature = signer.sign(b"data")
+        assert verify_signature(signer.public_key, signature, b"data")
+        metrics = signer.metrics()
+        assert metrics["signatures"] == 2
+        assert metrics["batches"] == 1
+        assert metrics["batched_manifests"] == 7
+        assert metrics["latency_ms"]["max"] >= metrics["latency_ms"]["p50"]
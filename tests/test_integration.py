@@ -56,3 +56,468 @@ async def test_pipeline_ingest_simple():
 
         await pipeline.close()
 
+
+
+class FakeFetcher:
+    """Content fetcher returning canned page content."""
+
+    def __init__(self, text: str, html: str):
+        self.text = text
+        self.html = html
+
+    async def fetch(self, url):
+        return {"url": url, "html": self.html, "text": self.text, "images": []}
+
+    async def fetch_image(self, url):
+        raise Exception("no images in tests")
+
+    async def close(self):
+        pass
+
+
+def make_config(tmpdir: str, **classify_options) -> Config:
+    """Build a pipeline config rooted in a temporary directory."""
+    from internal.config import ClassifyConfig, CryptoConfig, PIIConfig, StorageConfig
+
+    return Config(
+        storage=StorageConfig(
+            base_path=str(Path(tmpdir) / "data"),
+            vault_path=str(Path(tmpdir) / "vault"),
+            sqlite_path=str(Path(tmpdir) / "test.db"),
+        ),
+        crypto=CryptoConfig(key_path=str(Path(tmpdir) / "keys"), key_name="test-key"),
+        pii=PIIConfig(hmac_key="test-hmac-key-for-deterministic-pseudonymization-12345"),
+        classify=ClassifyConfig(ml_endpoint="http://ml.test/classify", **classify_options),
+    )
+
+
+def make_pipeline(config: Config, stub, text: str = "Some hate text by a@b.com") -> IngestionPipeline:
+    """Create a pipeline with a fake fetcher and the ML stub classifier."""
+    from internal.classify.classifier import Classifier
+
+    Path(config.crypto.key_path).mkdir(parents=True, exist_ok=True)
+    pipeline = IngestionPipeline(config)
+    pipeline.fetcher = FakeFetcher(text, f"<html><body><p>{text}</p></body></html>")
+    pipeline.classifier = Classifier(config.classify.ml_endpoint, client=stub.client())
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_pipeline_deferred_classification_resigns_manifest():
+    """Test that deferred classification writes a new linked manifest version."""
+    import json
+    import zipfile
+
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        pipeline = make_pipeline(make_config(tmpdir, deferred=True), stub)
+
+        case_id = await pipeline.ingest("https://example.com/page")
+        case = pipeline.case_store.get_case(case_id)
+        assert case["status"] == "classification_pending"
+        first_hash = case["manifest_hash"]
+
+        await pipeline.drain()
+
+        case = pipeline.case_store.get_case(case_id)
+        assert case["status"] == "completed"
+        versions = pipeline.case_store.get_manifest_versions(case_id)
+        assert [v["version"] for v in versions] == [1, 2]
+        assert versions[0]["manifest_hash"] == first_hash
+        assert versions[1]["previous_manifest_hash"] == first_hash
+        assert case["manifest_hash"] == versions[1]["manifest_hash"]
+
+        with zipfile.ZipFile(versions[0]["pack_path"]) as pack:
+            first = json.loads(pack.read("manifest.json"))
+        with zipfile.ZipFile(case["pack_path"]) as pack:
+            second = json.loads(pack.read("manifest.json"))
+        assert first["classification"] == {"classification": "pending"}
+        assert second["classification"]["classification"] == "positive"
+        assert second["previous_manifest_hash"] == first_hash
+        assert second["version"] == 2
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_on_demand_version_clears_stored_pack():
+    """Test that a version packed on demand does not serve the previous stored pack."""
+    from internal.pack.serving import PackMetadataCache
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = make_pipeline(make_config(tmpdir, deferred=True), MLStubServer())
+        case_id = await pipeline.ingest("https://example.com/page")
+        assert pipeline.case_store.get_case(case_id)["pack_path"]
+
+        # Switched to on-demand packs before the classified version is written
+        pipeline.config.pack.on_demand = True
+        await pipeline.drain()
+
+        case = pipeline.case_store.get_case(case_id)
+        assert case["pack_path"] is None
+        metadata = PackMetadataCache().get(pipeline.case_store, case_id)
+        assert metadata["pack_path"] is None
+        assert metadata["manifest_hash"] == case["manifest_hash"]
+        assert '"positive"' in metadata["manifest_json"]
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_requeues_pending_classifications_after_restart():
+    """Test that cases left pending by a restart are classified by the next pipeline."""
+    import asyncio
+
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = make_config(tmpdir, deferred=True, deferred_queue_size=1)
+        config.dedup.enabled = True
+        stub = MLStubServer()
+        pipeline = make_pipeline(config, stub)
+        case_id = await pipeline.ingest("https://example.com/page")
+        # Crash before the queued job runs
+        for worker in pipeline._classification_workers:
+            worker.cancel()
+        await asyncio.gather(*pipeline._classification_workers, return_exceptions=True)
+        assert pipeline.case_store.get_case(case_id)["status"] == "classification_pending"
+        assert stub.requests == []
+
+        restarted = make_pipeline(config, stub)
+        assert await restarted.resume_deferred() == 1
+        assert restarted._classification_queue.maxsize == 1
+        # Ingests still complete through the bounded queue
+        restarted.fetcher = FakeFetcher("An unrelated report", "<p>An unrelated report</p>")
+        other_id = await restarted.ingest("https://example.com/other")
+        await restarted.drain()
+
+        for done_id in (case_id, other_id):
+            case = restarted.case_store.get_case(done_id)
+            assert case["status"] == "completed"
+            versions = restarted.case_store.get_manifest_versions(done_id)
+            assert [v["version"] for v in versions] == [1, 2]
+            assert case["manifest_hash"] == versions[1]["manifest_hash"]
+        events = [e["action"] for e in restarted.custody_logger.get_events(case_id)]
+        assert "classification-resumed" in events
+        assert restarted.near_duplicates.find_exact(
+            restarted.pseudonymizer.content_fingerprint("Some hate text by a@b.com")
+        )["case_id"] == case_id
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_ingest_redacts_and_packs():
+    """Test a full ingest with PII redaction, vaulting and packing."""
+    import zipfile
+
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        config = make_config(tmpdir)
+        pipeline = make_pipeline(config, stub)
+
+        case_id = await pipeline.ingest("https://example.com/page")
+        case = pipeline.case_store.get_case(case_id)
+        assert case["status"] == "completed"
+
+        redacted = (Path(config.storage.base_path) / case_id / "text_redacted.txt").read_text()
+        assert "a@b.com" not in redacted
+        artifacts = pipeline.case_store.get_artifacts(case_id)
+        vault_ref = next(a["vault_ref"] for a in artifacts if a["artifact_type"] == "text_redacted")
+        assert pipeline.vault.retrieve(vault_ref) == b"Some hate text by a@b.com"
+
+        with zipfile.ZipFile(case["pack_path"]) as pack:
+            assert {"manifest.json", "manifest.sig", "pubkey.pem"} <= set(pack.namelist())
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_links_duplicates_and_reuses_classification():
+    """Test that a repeated page reuses the canonical redaction and classification."""
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        config = make_config(tmpdir)
+        config.dedup.enabled = True
+        config.dedup.skip_pii = True
+        pipeline = make_pipeline(config, stub)
+
+        first = await pipeline.ingest("https://example.com/page")
+        second = await pipeline.ingest("https://mirror.example.com/page")
+        assert len(stub.requests) == 1
+
+        case = pipeline.case_store.get_case(second)
+        assert case["status"] == "completed"
+        assert case["duplicate_of"] == first
+        assert pipeline.case_store.get_case(first)["duplicate_of"] is None
+
+        base_path = Path(config.storage.base_path)
+        assert (base_path / second / "text_redacted.txt").read_text() == (
+            base_path / first / "text_redacted.txt"
+        ).read_text()
+        artifacts = pipeline.case_store.get_artifacts(second)
+        vault_ref = next(a["vault_ref"] for a in artifacts if a["artifact_type"] == "text_redacted")
+        assert pipeline.vault.retrieve(vault_ref) == b"Some hate text by a@b.com"
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_links_near_duplicates_with_different_pii():
+    """Test that copies of a page differing only in PII are linked as near duplicates."""
+    from tests.fixtures.ml_stub import MLStubServer
+
+    # PII throughout the page: raw and redacted fingerprints of the same text are far apart
+    body = " ".join(
+        f"Reply {i} from poster{i}@forum.example repeats the claim and urges readers to share it."
+        for i in range(40)
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        config = make_config(tmpdir)
+        config.dedup.enabled = True
+        pipeline = make_pipeline(config, stub, body + " Contact alice.smith@example.com")
+        first = await pipeline.ingest("https://example.com/thread")
+
+        text = body + " Contact bob.jones@example.org"
+        pipeline.fetcher = FakeFetcher(text, f"<html><body><p>{text}</p></body></html>")
+        second = await pipeline.ingest("https://mirror.example.com/thread")
+
+        case = pipeline.case_store.get_case(second)
+        assert case["duplicate_of"] == first
+        event = next(
+            e
+            for e in pipeline.custody_logger.get_events(second)
+            if e["action"] == "near-duplicate"
+        )
+        assert event["metadata"]["exact"] is False
+        assert event["metadata"]["distance"] <= config.dedup.max_hamming_distance
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_packs_are_reproducible():
+    """Test that a stored pack can be rebuilt byte for byte from its manifest record."""
+    import hashlib
+    import zipfile
+
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        pipeline = make_pipeline(make_config(tmpdir), stub)
+
+        case_id = await pipeline.ingest("https://example.com/page")
+        case = pipeline.case_store.get_case(case_id)
+        record = pipeline.case_store.get_manifest_version(case_id)
+        pipeline.custody_logger.log(case_id, "viewed")
+
+        events = pipeline.custody_logger.get_events(case_id)[: record["custody_count"]]
+        rebuilt = b"".join(pipeline.pack_generator.iter_pack(record["manifest_json"], events))
+        assert rebuilt == Path(case["pack_path"]).read_bytes()
+
+        with zipfile.ZipFile(case["pack_path"]) as pack:
+            manifest = pack.read("manifest.json")
+            custody = pack.read("chain_of_custody.log").decode().splitlines()
+        assert hashlib.sha256(manifest).hexdigest() == case["manifest_hash"]
+        assert len(custody) == record["custody_count"]
+        assert all(case_id in line for line in custody)
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_on_demand_packs_are_not_stored():
+    """Test that on-demand packing records the manifest instead of writing a pack."""
+    import zipfile
+    from io import BytesIO
+
+    from internal.config import PackConfig
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        config = make_config(tmpdir)
+        config.pack = PackConfig(on_demand=True)
+        pipeline = make_pipeline(config, stub)
+
+        case_id = await pipeline.ingest("https://example.com/page")
+        case = pipeline.case_store.get_case(case_id)
+        assert case["pack_path"] is None
+        assert not list(Path(config.storage.base_path).rglob("*.zip"))
+
+        record = pipeline.case_store.get_manifest_version(case_id)
+        events = pipeline.custody_logger.get_events(case_id)[: record["custody_count"]]
+        first = b"".join(pipeline.pack_generator.iter_pack(record["manifest_json"], events))
+        second = b"".join(pipeline.pack_generator.iter_pack(record["manifest_json"], events))
+        assert first == second
+
+        with zipfile.ZipFile(BytesIO(first)) as pack:
+            assert pack.testzip() is None
+            assert {"manifest.json", "manifest.sig", "pubkey.pem", "text_redacted.txt"} <= set(
+                pack.namelist()
+            )
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pack_metadata_cache():
+    """Test that pack metadata is cached per case and dropped when the case is repacked."""
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        pipeline = make_pipeline(make_config(tmpdir), stub)
+        case_id = await pipeline.ingest("https://example.com/page")
+        case = pipeline.case_store.get_case(case_id)
+
+        cache = pipeline.pack_cache
+        metadata = cache.get(pipeline.case_store, case_id)
+        assert metadata["manifest_hash"] == case["manifest_hash"]
+        assert metadata["pack_path"] == case["pack_path"]
+        assert cache.get(pipeline.case_store, case_id) is metadata
+        assert cache.get(pipeline.case_store, "missing") is None
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+        pipeline._finalize(case_id, case["url"], [], False, None, version=2)
+        assert cache.get(pipeline.case_store, case_id)["manifest_hash"] != case["manifest_hash"]
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_bundle_streams_packs_with_signed_index():
+    """Test that a bundle holds every selected pack and a signed index covering them."""
+    import hashlib
+    import io
+    import json
+    import zipfile
+
+    from internal.config import PackConfig
+    from internal.crypto.sign import verify_signature
+    from internal.pack.bundle import BundleBuilder
+    from internal.pack.verify import verify_pack
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        config = make_config(tmpdir)
+        pipeline = make_pipeline(config, stub)
+        stored = await pipeline.ingest("https://example.com/stored")
+        pipeline.config.pack = PackConfig(on_demand=True)
+        rebuilt = await pipeline.ingest("https://example.com/rebuilt")
+        pending = pipeline.case_store.create_case("https://example.com/pending")
+
+        builder = BundleBuilder(
+            pipeline.case_store, pipeline.pack_generator, pipeline.custody_logger
+        )
+        assert builder.select(status="completed") == [stored, rebuilt]
+        with pytest.raises(ValueError):
+            builder.select(["missing"])
+        with pytest.raises(ValueError):
+            builder.select([stored], status="completed")
+
+        progress = []
+        output = io.BytesIO()
+        summary = builder.write_bundle(
+            [stored, rebuilt, pending], output, progress=lambda d, t: progress.append((d, t))
+        )
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        assert summary["skipped"] == [pending]
+        assert summary["bundle_size"] == len(output.getvalue())
+
+        with zipfile.ZipFile(output) as bundle:
+            assert bundle.testzip() is None
+            index_bytes = bundle.read("index.json")
+            assert verify_signature(
+                pipeline.signer.public_key, bundle.read("index.sig"), index_bytes
+            )
+            index = json.loads(index_bytes)
+            assert [record["case_id"] for record in index["cases"]] == [stored, rebuilt]
+            for record in index["cases"]:
+                pack_bytes = bundle.read(record["pack"])
+                assert hashlib.sha256(pack_bytes).hexdigest() == record["sha256"]
+                pack_path = Path(tmpdir) / f"{record['case_id']}.zip"
+                pack_path.write_bytes(pack_bytes)
+                report = verify_pack(pack_path, pipeline.signer.public_key)
+                assert report["valid"], report
+                assert report["manifest_hash"] == record["manifest_hash"]
+
+        events = pipeline.custody_logger.get_events(stored)
+        assert events[-1]["action"] == "bundled"
+        assert events[-1]["metadata"]["bundle_id"] == summary["bundle_id"]
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_ingest_batch_signs_merkle_root():
+    """Test that a batch ingest writes a verifiable receipt per case."""
+    import json
+
+    from internal.crypto.signing import verify_batch_receipt
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        pipeline = make_pipeline(make_config(tmpdir), stub)
+
+        urls = [f"https://example.com/page{i}" for i in range(3)]
+        summary = await pipeline.ingest_batch(urls, concurrency=2)
+        assert len(summary["cases"]) == 3
+        assert summary["failed"] == {}
+
+        receipts = json.loads(Path(summary["receipts_path"]).read_text())
+        for receipt in receipts:
+            case = pipeline.case_store.get_case(receipt["case_id"])
+            assert receipt["manifest_hash"] == case["manifest_hash"]
+            assert verify_batch_receipt(pipeline.signer.public_key, receipt)
+        assert pipeline.signer.metrics()["batches"] == 1
+
+        await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_verify_packs_detects_tampering():
+    """Test pack verification of an intact and a tampered pack."""
+    import shutil
+    import zipfile
+
+    from internal.pack.verify import verify_directory, verify_pack
+    from tests.fixtures.ml_stub import MLStubServer
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stub = MLStubServer()
+        pipeline = make_pipeline(make_config(tmpdir), stub)
+        case = pipeline.case_store.get_case(await pipeline.ingest("https://example.com/page"))
+        await pipeline.close()
+
+        report = verify_pack(case["pack_path"], pipeline.signer.public_key)
+        assert report["valid"], report
+        assert report["signature"] == "valid"
+        assert report["key_trusted"] is True
+        assert report["custody"]["status"] == "ok"
+        assert {a["status"] for a in report["artifacts"]} == {"ok"}
+
+        packs = Path(tmpdir) / "received"
+        packs.mkdir()
+        shutil.copy(case["pack_path"], packs / "good.zip")
+        with zipfile.ZipFile(case["pack_path"]) as source, zipfile.ZipFile(
+            packs / "tampered.zip", "w"
+        ) as target:
+            for name in source.namelist():
+                data = source.read(name)
+                target.writestr(name, b"altered" if name == "text_redacted.txt" else data)
+
+        summary = verify_directory(packs, workers=2)
+        assert (summary["total"], summary["valid"], summary["invalid"]) == (2, 1, 1)
+        tampered = next(r for r in summary["packs"] if r["path"].endswith("tampered.zip"))
+        assert tampered["signature"] == "valid"
+        assert any(a["status"] == "mismatch" for a in tampered["artifacts"])
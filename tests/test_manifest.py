@@ -76,5 +76,162 @@ def test_manifest_with_classification():
     assert data["classification"]["classification"] == "positive"
 
 
-
-
+def test_pack_compression_policy():
+    """Test that compressed formats and random data are stored, text is deflated."""
+    import os
+
+    from internal.pack.compression import CompressionPolicy
+    from internal.pack.zipstream import ZIP_DEFLATED, ZIP_STORED
+
+    policy = CompressionPolicy(level=6)
+    assert policy.choose(b"\xff\xd8\xff\xe0" + b"\x00" * 100) == ZIP_STORED
+    assert policy.choose(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100) == ZIP_STORED
+    assert policy.choose(os.urandom(16 * 1024)) == ZIP_STORED
+    assert policy.choose(b"hate speech report " * 500) == ZIP_DEFLATED
+    assert CompressionPolicy(level=0).choose(b"text " * 500) == ZIP_STORED
+
+
+def test_pack_parallel_deflate_round_trip():
+    """Test that block-wise parallel deflate yields a valid, deterministic ZIP."""
+    import io
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from internal.pack.compression import CompressionPolicy
+    from internal.pack.zipstream import ZIP_DEFLATED, ZipStreamWriter
+
+    data = b"".join(b"line %d of a long artifact\n" % i for i in range(20000))
+    policy = CompressionPolicy(block_size=32 * 1024)
+
+    def build() -> bytes:
+        out = io.BytesIO()
+        zipf = ZipStreamWriter(out)
+        zipf.write_entry("small.txt", b"hello", ZIP_DEFLATED)
+        zipf.begin_entry("big.txt", ZIP_DEFLATED, len(data))
+        blocks = [data[i : i + policy.block_size] for i in range(0, len(data), policy.block_size)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for block, deflated in policy.deflate_blocks(blocks, pool, window=3):
+                zipf.write(block, deflated)
+        zipf.end_entry()
+        zipf.write_entry("empty.txt", b"", ZIP_DEFLATED)
+        zipf.close()
+        return out.getvalue()
+
+    first = build()
+    assert first == build()
+    with zipfile.ZipFile(io.BytesIO(first)) as archive:
+        assert archive.testzip() is None
+        assert archive.read("big.txt") == data
+        assert archive.read("small.txt") == b"hello"
+        assert archive.read("empty.txt") == b""
+        assert archive.getinfo("big.txt").compress_size < len(data) // 4
+
+
+def test_pack_generator_is_deterministic():
+    """Test that packs built twice from the same inputs are byte-identical."""
+    import io
+    import json
+    import os
+    import zipfile
+
+    from internal.pack.packer import PackGenerator
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir) / "data"
+        (base / "case").mkdir(parents=True)
+        (base / "case" / "text_redacted.txt").write_text("redacted text " * 1000)
+        (base / "case" / "image.jpg").write_bytes(b"\xff\xd8\xff\xe0" + os.urandom(5000))
+        keys = Path(tmpdir) / "keys"
+        keys.mkdir()
+
+        manifest = Manifest(case_id="case", url="https://example.com")
+        for name in ("text_redacted.txt", "image.jpg"):
+            manifest.add_artifact("text", f"case/{name}", hash_file(base / "case" / name))
+        events = [{"case_id": "case", "action": "signed"}]
+        generator = PackGenerator(base, keys, "test-key")
+
+        stats = {}
+        pack_path = generator.create_pack("case", manifest, events, stats=stats)
+        rebuilt = b"".join(generator.iter_pack(manifest.to_json(canonical=True), events))
+        assert pack_path.read_bytes() == rebuilt
+
+        assert stats["entries"] == 6
+        assert stats["stored_entries"] == 1
+        assert stats["compression_ratio"] < 1
+        with zipfile.ZipFile(io.BytesIO(rebuilt)) as pack:
+            assert pack.getinfo("image.jpg").compress_type == zipfile.ZIP_STORED
+            assert pack.getinfo("text_redacted.txt").compress_type == zipfile.ZIP_DEFLATED
+            assert json.loads(pack.read("chain_of_custody.log")) == events[0]
+
+
+
+def test_manifest_chunk_hashes():
+    """Test chunked Merkle hashes in manifests and per-chunk verification."""
+    from internal.crypto.hash import compute_sha256
+    from internal.pack.manifest import create_manifest
+    from internal.pack.packer import PackGenerator
+    from internal.pack.verify import verify_chunk, verify_chunks, verify_pack
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir) / "data"
+        (base / "case").mkdir(parents=True)
+        data = b"".join(i.to_bytes(4, "big") for i in range(2561))  # three 4 KiB chunks
+        (base / "case" / "text_redacted.txt").write_bytes(data)
+        (base / "case" / "small.txt").write_bytes(b"small")
+        artifacts = [
+            {"type": "text", "path": "case/text_redacted.txt"},
+            {"type": "text", "path": "case/small.txt"},
+        ]
+
+        manifest = create_manifest("case", "https://example.com", base, artifacts, chunk_size=4096)
+        big, small = manifest.artifacts
+        assert big["hash"] == compute_sha256(data)
+        assert "chunks" not in small
+        chunks = big["chunks"]
+        assert (chunks["size"], chunks["count"]) == (4096, 3)
+        assert chunks["hashes"][2] == compute_sha256(data[8192:])
+
+        assert verify_chunk(data[4096:8192], 1, chunks)
+        assert not verify_chunk(data[:4096], 1, chunks)
+        assert verify_chunks(base / "case" / "text_redacted.txt", chunks) == []
+
+        keys = Path(tmpdir) / "keys"
+        keys.mkdir()
+        events = [{"case_id": "case", "action": "signed"}]
+        pack_path = PackGenerator(base, keys, "test-key").create_pack("case", manifest, events)
+        report = verify_pack(pack_path)
+        assert report["artifacts"][0]["chunks"] == {"count": 3, "root": "ok", "bad": []}
+
+        altered = bytearray(data)
+        altered[5000] ^= 1
+        (base / "case" / "text_redacted.txt").write_bytes(bytes(altered))
+        path = base / "case" / "text_redacted.txt"
+        assert verify_chunks(path, chunks, workers=2) == [1]
+        assert verify_chunks(path, chunks, indices=[0, 2]) == []
+
+
+def test_pack_serving_ranges_and_etags():
+    """Test Range parsing, range slicing and ETag matching for pack downloads."""
+    from internal.pack.serving import etag_matches, pack_etag, parse_range, slice_stream
+
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+    data = bytes(range(200))
+    chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+    assert b"".join(slice_stream(chunks, 10, 99)) == data[10:100]
+    assert b"".join(slice_stream(chunks, 0, 0)) == data[:1]
+    assert b"".join(slice_stream(chunks, 195, 199)) == data[195:]
+
+    etag = pack_etag("ab" * 32, "build1")
+    assert etag != pack_etag("ab" * 32, "build2")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
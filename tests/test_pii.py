@@ -1,9 +1,17 @@
 """Tests for PII detection and pseudonymization."""
 
+import re
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 
+from internal.pii.cache import DetectionCache
 from internal.pii.detector import PIIDetector
+from internal.pii.language import AnalyzerPool
 from internal.pii.pseudonymizer import Pseudonymizer
+from tests.fixtures.sample_data import CASCADE_PROSE_CORPUS, PII_RECALL_CORPUS
 
 
 def test_pii_detector_basic():
@@ -69,3 +77,262 @@ def test_pseudonymizer_requires_key():
         Pseudonymizer("")
 
 
+
+
+def _spans(detections):
+    return sorted((d["entity_type"], d["start"], d["end"]) for d in detections)
+
+
+class _FakeNerAnalyzer:
+    """Stand-in for Presidio that tags PERSON names the way its NER model would."""
+
+    NAMES = {"John", "Maria", "Cohen", "Jane", "Doe"}
+
+    def __init__(self, language):
+        self.patterns = PIIDetector(languages=["en"])
+
+    def analyze(self, text, language):
+        results = [
+            SimpleNamespace(entity_type="PERSON", start=m.start(), end=m.end(), score=0.85)
+            for m in re.finditer(r"\w+", text)
+            if m.group() in self.NAMES
+        ]
+        for detection in self.patterns._analyze(text):
+            results.append(SimpleNamespace(score=detection.pop("score"), **detection))
+        return results
+
+
+def _with_fake_ner(detector):
+    detector._use_presidio = True
+    detector.analyzer_pool = AnalyzerPool(_FakeNerAnalyzer)
+    return detector
+
+
+def test_cascade_recall_parity():
+    """Test that cascade mode finds the same PII, names included, as full analysis."""
+    full = _with_fake_ner(PIIDetector(languages=["en"]))
+    cascade = _with_fake_ner(PIIDetector(languages=["en"], cascade=True))
+
+    for text in PII_RECALL_CORPUS:
+        assert _spans(cascade.detect(text)) == _spans(full.detect(text))
+    # A name at the start of a sentence is enough to escalate a paragraph,
+    # a common word there is not
+    assert cascade.is_candidate("John went home.")
+    assert cascade.is_candidate("The report was filed. Later Cohen called.")
+    assert not cascade.is_candidate("The report was filed and nobody answered.")
+    assert not cascade.is_candidate("Users replied. Several said nothing changed.")
+    assert cascade.is_candidate("Users replied to the Guardian.")
+
+
+def test_cascade_escalation_rate_on_prose():
+    """Test that ordinary prose is mostly not escalated to the full analyzer."""
+    detector = PIIDetector(languages=["en"], cascade=True)
+    for text in CASCADE_PROSE_CORPUS:
+        detector.detect(text)
+
+    # Only the paragraphs naming a place, organization or day are escalated
+    assert detector.cascade_stats == {"segments": 16, "escalated": 3}
+
+
+def test_cascade_recall_parity_with_presidio():
+    """Test cascade parity against the real analyzer where a spaCy model is installed."""
+    full = PIIDetector(languages=["en"])
+    if not full._use_presidio:
+        pytest.skip("no spaCy model installed for Presidio")
+    cascade = PIIDetector(languages=["en"], cascade=True)
+
+    for text in PII_RECALL_CORPUS:
+        assert _spans(cascade.detect(text)) == _spans(full.detect(text))
+
+
+def test_cascade_escalation_counters():
+    """Test that cascade mode only escalates paragraphs with candidate signals."""
+    detector = PIIDetector(languages=["en"], cascade=True, name_dictionary=["shira"])
+
+    text = "plain lowercase text.\n\nanother quiet line.\n\nmail me at a@b.com\n\nask shira"
+    detections = detector.detect(text)
+
+    assert detector.cascade_stats == {"segments": 4, "escalated": 2}
+    assert detector.escalation_rate() == 0.5
+    assert [text[d["start"]:d["end"]] for d in detections] == ["a@b.com"]
+
+
+def test_detection_cache_reoffsets_cached_paragraphs():
+    """Test that cached paragraph detections are re-offset into new documents."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DetectionCache(Path(tmpdir) / "pii_cache.db")
+        detector = PIIDetector(languages=["en"], cache=cache)
+
+        first = "Header line\n\nWrite to a@b.com today"
+        second = "A brand new intro paragraph\n\nWrite to a@b.com today"
+
+        assert _spans(detector.detect(first)) == _spans(detector._analyze(first))
+        assert cache.stats()["hits"] == 0
+
+        detections = detector.detect(second)
+        assert [second[d["start"]:d["end"]] for d in detections] == ["a@b.com"]
+        assert cache.hits == 1
+        assert cache.misses == 3
+        assert cache.hit_rate() == 0.25
+
+
+def test_detection_cache_invalidated_on_recognizer_change():
+    """Test that entries from another detector version are dropped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "pii_cache.db"
+        cache = DetectionCache(db_path)
+        cache.put_many("old-version", {"a@b.com": [{"entity_type": "EMAIL", "start": 0, "end": 7}]})
+
+        detector = PIIDetector(languages=["en"], cache=DetectionCache(db_path))
+        assert detector.version != "old-version"
+        assert cache.get_many("old-version", ["a@b.com"]) == {}
+
+
+def test_detection_cache_survives_detector_restart():
+    """Test that a new detector on the same cache reuses same-version entries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "pii_cache.db"
+        text = "Write to a@b.com today\n\nCall 555-123-4567"
+        first = PIIDetector(languages=["en"], cache=DetectionCache(db_path))
+        expected = _spans(first.detect(text))
+
+        cache = DetectionCache(db_path)
+        restarted = PIIDetector(languages=["en"], cache=cache)
+        assert restarted.version == first.version
+        assert _spans(restarted.detect(text)) == expected
+        assert cache.hits == 2
+        assert cache.misses == 0
+
+
+def test_detection_cache_evicts_oldest_in_batches():
+    """Test that a full cache is trimmed by a batch of its oldest entries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DetectionCache(Path(tmpdir) / "pii_cache.db", max_entries=10, evict_batch=4)
+        for i in range(10):
+            cache.put_many("v1", {f"paragraph {i}": []})
+        assert len(cache.get_many("v1", [f"paragraph {i}" for i in range(10)])) == 10
+
+        cache.put_many("v1", {"paragraph 10": []})
+        kept = cache.get_many("v1", [f"paragraph {i}" for i in range(11)])
+        assert set(kept) == {f"paragraph {i}" for i in range(5, 11)}
+
+        # Room for the batch again before the next eviction
+        cache.put_many("v1", {f"more {i}": [] for i in range(4)})
+        assert len(cache.get_many("v1", [f"paragraph {i}" for i in range(5, 11)])) == 6
+
+
+def test_pseudonymize_text_single_pass():
+    """Test forward-pass pseudonymization, chunked output and token memoization."""
+    pseudonymizer = Pseudonymizer("test-key-12345")
+    text = "a@b.com wrote to c@d.com and a@b.com"
+    detections = [
+        {"entity_type": "EMAIL", "start": 29, "end": 36},
+        {"entity_type": "EMAIL", "start": 0, "end": 7},
+        {"entity_type": "EMAIL", "start": 17, "end": 24},
+    ]
+
+    token_a = pseudonymizer.pseudonymize("a@b.com", "EMAIL")
+    token_c = pseudonymizer.pseudonymize("c@d.com", "EMAIL")
+    expected = f"{token_a} wrote to {token_c} and {token_a}"
+
+    assert pseudonymizer.pseudonymize_text(text, detections) == expected
+    assert "".join(pseudonymizer.iter_pseudonymized(text, detections)) == expected
+    assert pseudonymizer.memo_info().hits >= 3
+
+
+def test_pseudonymize_text_overlapping_detections():
+    """Test that overlapping detections keep the earliest, longest span."""
+    pseudonymizer = Pseudonymizer("test-key-12345")
+    text = "see https://a.example.com/x now"
+    detections = [
+        {"entity_type": "DOMAIN", "start": 12, "end": 25},
+        {"entity_type": "URL", "start": 4, "end": 27},
+    ]
+
+    redacted = pseudonymizer.pseudonymize_text(text, detections)
+    url_token = pseudonymizer.pseudonymize("https://a.example.com/x", "URL")
+    assert redacted == f"see {url_token} now"
+
+
+def test_pseudonymize_text_partially_overlapping_detections():
+    """Test that partially overlapping detections are merged, leaving no tail in the clear."""
+    pseudonymizer = Pseudonymizer("test-key-12345")
+    text = "call Jane Doe-Smith at home"
+    detections = [
+        {"entity_type": "PERSON", "start": 5, "end": 13},  # "Jane Doe"
+        {"entity_type": "PERSON", "start": 10, "end": 19},  # "Doe-Smith"
+        {"entity_type": "LOCATION", "start": 23, "end": 27},
+    ]
+
+    token_log = []
+    redacted = pseudonymizer.pseudonymize_text(text, detections, token_log)
+    name_token = pseudonymizer.pseudonymize("Jane Doe-Smith", "PERSON")
+    home_token = pseudonymizer.pseudonymize("home", "LOCATION")
+    assert redacted == f"call {name_token} at {home_token}"
+    assert "Smith" not in redacted
+    assert [(e["start"], e["end"]) for e in token_log] == [(5, 19), (23, 27)]
+
+
+def test_detect_language():
+    """Test lightweight language identification among configured languages."""
+    from internal.pii.language import detect_language
+
+    languages = ["en", "de", "fr", "he"]
+    assert detect_language("The report was filed with the police.", languages) == "en"
+    assert detect_language("Die Polizei ist nicht mit dem Bericht zufrieden.", languages) == "de"
+    assert detect_language("Le rapport est dans les mains de la police.", languages) == "fr"
+    assert detect_language("הדוח הועבר למשטרה", languages) == "he"
+    assert detect_language("12345", languages) == "en"
+    # A short foreign phrase does not outweigh the letters of the surrounding text
+    mixed = "We were told about it in a short note: שלום עליכם ולהתראות"
+    assert detect_language(mixed, languages) == "en"
+
+
+def test_language_without_spacy_model_uses_english_analyzer(capsys):
+    """Test that a language with no configured spaCy model falls back to English."""
+    from internal.pii.language import AnalyzerPool
+
+    class FakeAnalyzer:
+        def __init__(self, language):
+            self.language = language
+
+        def analyze(self, text, language):
+            assert language == self.language
+            return []
+
+    detector = PIIDetector(languages=["en", "de"], spacy_models={"fr": "fr_core_news_sm"})
+    detector._use_presidio = True
+    detector.analyzer_pool = AnalyzerPool(FakeAnalyzer, max_size=2)
+
+    assert detector.identify_language("Die Polizei ist nicht mit dem Bericht zufrieden.") == "de"
+    detector.detect("Die Polizei ist nicht mit dem Bericht zufrieden.")
+    detector.detect("Der Bericht ist nicht da.")
+
+    assert detector.analyzer_pool.loaded() == ["en"]
+    assert capsys.readouterr().out.count("no spaCy model configured for 'de'") == 1
+
+
+def test_analyzer_pool_lazy_loading_and_eviction():
+    """Test that analyzers load on first use and the least recently used is evicted."""
+    from internal.pii.language import AnalyzerPool
+
+    loaded = []
+
+    def factory(language):
+        loaded.append(language)
+        return f"analyzer-{language}"
+
+    pool = AnalyzerPool(factory, max_size=2)
+    assert loaded == []
+
+    assert pool.get("en") == "analyzer-en"
+    pool.get("de")
+    pool.get("en")
+    pool.get("fr")  # evicts "de", the least recently used
+
+    assert pool.loaded() == ["en", "fr"]
+    assert pool.evictions == 1
+    assert loaded == ["en", "de", "fr"]
+    assert pool.stats["en"]["uses"] == 2
+    assert pool.stats["de"]["loads"] == 1
+    assert pool.stats["fr"]["load_seconds"] >= 0